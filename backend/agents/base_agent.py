@@ -1,42 +1,142 @@
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterable, Tuple, Callable
+from collections import deque
 from datetime import datetime
+import functools
+import heapq
+import time
+from config import settings
+from telemetry import span
+
+# Timestamps are kept as monotonic floats and mapped to wall-clock time
+# only when a message is serialised
+WALL_CLOCK_OFFSET = time.time() - time.monotonic()
+
+
+def format_timestamp(at: float) -> str:
+    return datetime.fromtimestamp(at + WALL_CLOCK_OFFSET).isoformat()
+
+
+class Message:
+    __slots__ = ("role", "content", "at", "data")
+    
+    def __init__(self, role: str, content: str, at: float, data: Optional[Dict] = None):
+        self.role = role
+        self.content = content
+        self.at = at
+        self.data = data
+    
+    def to_dict(self) -> Dict:
+        message = {
+            "role": self.role,
+            "content": self.content,
+            "timestamp": format_timestamp(self.at)
+        }
+        if self.data:
+            message.update(self.data)
+        return message
 
 
 class AgentState:
-    def __init__(self):
-        self.messages: List[Dict] = []
+    FIELDS = ("competitor_data", "sentiment_data", "recommendations", "search_results", "scraped_data")
+    SECTIONS = ("messages",) + FIELDS + ("timestamp",)
+    
+    __slots__ = ("messages", "dropped_messages", "competitor_data", "sentiment_data", "recommendations",
+                 "search_results", "scraped_data", "started_at", "listeners", "previous", "snapshot")
+    
+    def __init__(self, max_messages: Optional[int] = None):
+        # Oldest messages fall off once the ring buffer is full
+        self.messages: deque = deque(maxlen=max_messages or settings.state_max_messages)
+        self.dropped_messages = 0
         self.competitor_data: Dict = {}
         self.sentiment_data: Dict = {}
         self.recommendations: Dict = {}
         self.search_results: List[Dict] = []
         self.scraped_data: List[Dict] = []
-        self.timestamp = datetime.now().isoformat()
+        self.started_at = time.monotonic()
+        self.listeners: List[Callable[[str, Any], None]] = []
+        # Agents read the last run's snapshot from `previous` and record what
+        # the next run needs under their own key in `snapshot`
+        self.previous: Dict = {}
+        self.snapshot: Dict = {}
     
-    def add_message(self, role: str, content: str):
-        self.messages.append({
-            "role": role,
-            "content": content,
-            "timestamp": datetime.now().isoformat()
-        })
+    @property
+    def timestamp(self) -> str:
+        return format_timestamp(self.started_at)
     
-    def to_dict(self) -> Dict:
-        return {
-            "messages": self.messages,
-            "competitor_data": self.competitor_data,
-            "sentiment_data": self.sentiment_data,
-            "recommendations": self.recommendations,
-            "search_results": self.search_results,
-            "scraped_data": self.scraped_data,
-            "timestamp": self.timestamp
-        }
+    def emit(self, event: str, data: Any):
+        for listener in self.listeners:
+            listener(event, data)
+    
+    def add_message(self, role: str, content: str, **data: Any):
+        message = Message(role, content, time.monotonic(), data)
+        if len(self.messages) == self.messages.maxlen:
+            self.dropped_messages += 1
+        self.messages.append(message)
+        if self.listeners:
+            self.emit("message", message.to_dict())
+    
+    def slice(self, fields: Iterable[str]) -> "AgentState":
+        child = AgentState(self.messages.maxlen)
+        child.started_at = self.started_at
+        child.listeners = self.listeners
+        child.previous = self.previous
+        child.snapshot = self.snapshot
+        for field in fields:
+            setattr(child, field, getattr(self, field))
+        return child
+    
+    def merge(self, other: "AgentState", fields: Iterable[str]):
+        for field in fields:
+            setattr(self, field, getattr(other, field))
+        
+        # Both buffers are already in time order, so a merge keeps it sorted
+        total = len(self.messages) + len(other.messages)
+        self.dropped_messages += other.dropped_messages + max(0, total - self.messages.maxlen)
+        self.messages = deque(
+            heapq.merge(self.messages, other.messages, key=lambda m: m.at),
+            maxlen=self.messages.maxlen
+        )
+    
+    def serialize_messages(self) -> List[Dict]:
+        return [message.to_dict() for message in self.messages]
+    
+    def to_dict(self, sections: Optional[Iterable[str]] = None) -> Dict:
+        wanted = self.SECTIONS if sections is None else set(sections)
+        data = {}
+        for section in self.SECTIONS:
+            if section not in wanted:
+                continue
+            if section == "messages":
+                data["messages"] = self.serialize_messages()
+            else:
+                data[section] = getattr(self, section)
+        return data
 
 
 class BaseAgent:
+    # State fields the agent consumes and produces; the orchestrator derives
+    # the execution graph from these
+    reads: Tuple[str, ...] = ()
+    writes: Tuple[str, ...] = ()
+    
+    def __init_subclass__(cls, **kwargs):
+        # Every agent's execute runs inside a timing span without opting in
+        super().__init_subclass__(**kwargs)
+        if "execute" in cls.__dict__:
+            execute = cls.__dict__["execute"]
+            
+            @functools.wraps(execute)
+            async def traced_execute(self, state: AgentState, task: str) -> AgentState:
+                with span(f"agent.{self.name}"):
+                    return await execute(self, state, task)
+            
+            cls.execute = traced_execute
+    
     def __init__(self, name: str, role: str):
         self.name = name
         self.role = role
     
-    def execute(self, state: AgentState, task: str) -> AgentState:
+    async def execute(self, state: AgentState, task: str) -> AgentState:
         raise NotImplementedError("Each agent must implement execute method")
     
     def log_action(self, state: AgentState, action: str):
@@ -1,42 +1,132 @@
+import asyncio
 from .base_agent import BaseAgent, AgentState
-from tools.search_tool import SearchTool
-from tools.web_scraper import WebScraper
-from typing import Dict, List
+from config import settings
+from tools.search_tool import AsyncSearchTool, get_search_cache
+from tools.web_scraper import AsyncWebScraper
+from tools.http_cache import get_response_cache
+from tools.corpus_store import CorpusStore
+from typing import Dict, List, Optional, Tuple
 
 
 class CompetitiveResearchAgent(BaseAgent):
-    def __init__(self):
+    reads = ()
+    writes = ("competitor_data", "search_results", "scraped_data")
+    # Top search results scraped per competitor; stored pages are capped to match
+    pages_per_competitor = 2
+    
+    def __init__(self, pipelined: Optional[bool] = None, max_concurrency: Optional[int] = None,
+                 per_competitor_concurrency: Optional[int] = None, search_tool: Optional[AsyncSearchTool] = None,
+                 scraper: Optional[AsyncWebScraper] = None, corpus: Optional[CorpusStore] = None):
         super().__init__(
             name="CompetitiveResearcher",
             role="Competitive Intelligence Analyst"
         )
-        self.search_tool = SearchTool()
-        self.scraper = WebScraper()
+        self.search_tool = search_tool or AsyncSearchTool(cache=get_search_cache())
+        self.corpus = corpus
+        self.scraper = scraper or AsyncWebScraper(cache=get_response_cache(), corpus=corpus)
+        
+        self.pipelined = settings.research_pipelined if pipelined is None else pipelined
+        self.max_concurrency = max_concurrency or settings.research_max_concurrency
+        self.per_competitor_concurrency = per_competitor_concurrency or settings.research_per_competitor_concurrency
     
-    def execute(self, state: AgentState, task: str) -> AgentState:
+    async def execute(self, state: AgentState, task: str) -> AgentState:
         self.log_action(state, f"Starting competitive research for: {task}")
         
         competitors = self.extract_competitors(task)
         
-        for competitor in competitors:
-            self.log_action(state, f"Researching competitor: {competitor}")
-            
-            search_results = self.search_tool.search_competitor(competitor)
-            state.search_results.extend(search_results)
-            
-            for result in search_results[:2]:
-                if result.get('url'):
-                    scraped = self.scraper.extract_product_info(result['url'])
-                    if scraped.get('status') == 'success':
-                        state.scraped_data.append(scraped)
+        if self.pipelined:
+            await self.research_pipelined(state, competitors)
+        else:
+            await self.research_sequential(state, competitors)
         
         analysis = self.analyze_competitors(state.scraped_data, state.search_results)
         state.competitor_data = analysis
+        state.snapshot["pages"] = {page["url"]: page for page in state.scraped_data}
         
         self.log_action(state, f"Completed research on {len(competitors)} competitors")
         
         return state
     
+    async def research_pipelined(self, state: AgentState, competitors: List[str]):
+        # Semaphores must belong to the running loop, so build them per call
+        limit = asyncio.Semaphore(self.max_concurrency)
+        
+        known_pages = state.previous.get("pages", {})
+        
+        chains = await asyncio.gather(*(
+            self.research_competitor(state, competitor, limit, known_pages) for competitor in competitors
+        ))
+        
+        for search_results, scraped_pages in chains:
+            state.search_results.extend(search_results)
+            state.scraped_data.extend(scraped_pages)
+    
+    async def research_competitor(self, state: AgentState, competitor: str, limit: asyncio.Semaphore,
+                                  known_pages: Dict[str, Dict]) -> Tuple[List[Dict], List[Dict]]:
+        self.log_action(state, f"Researching competitor: {competitor}")
+        competitor_limit = asyncio.Semaphore(self.per_competitor_concurrency)
+        
+        async with limit:
+            search_results = await self.search_tool.search_competitor(competitor)
+        
+        urls = self.page_urls(search_results)
+        stored = await self.stored_pages(competitor, urls, known_pages)
+        if stored:
+            self.log_action(state, f"Answered {competitor} from {len(stored)} indexed pages")
+            return search_results, stored
+        
+        async def scrape(url: str) -> Dict:
+            async with competitor_limit:
+                async with limit:
+                    return await self.scraper.extract_product_info(url, known_pages.get(url))
+        
+        scraped = await asyncio.gather(*(scrape(url) for url in urls))
+        pages = [page for page in scraped if page.get('status') == 'success']
+        await self.index_pages(competitor, pages)
+        
+        return search_results, pages
+    
+    def page_urls(self, search_results: List[Dict]) -> List[str]:
+        return [result['url'] for result in search_results[:self.pages_per_competitor] if result.get('url')]
+    
+    async def stored_pages(self, competitor: str, urls: List[str], known_pages: Dict[str, Dict]) -> List[Dict]:
+        # Pages in the last run's snapshot are re-checked through the scraper's
+        # fingerprint path; the corpus only answers competitors it never saw
+        if self.corpus is None or any(url in known_pages for url in urls):
+            return []
+        return await asyncio.to_thread(
+            self.corpus.pages_for, competitor, settings.corpus_max_age, self.pages_per_competitor
+        )
+    
+    async def index_pages(self, competitor: str, pages: List[Dict]):
+        if self.corpus is not None and pages:
+            await asyncio.to_thread(self.corpus.tag_pages, competitor, [page['url'] for page in pages])
+    
+    async def research_sequential(self, state: AgentState, competitors: List[str]):
+        known_pages = state.previous.get("pages", {})
+        
+        for competitor in competitors:
+            self.log_action(state, f"Researching competitor: {competitor}")
+            
+            search_results = await self.search_tool.search_competitor(competitor)
+            state.search_results.extend(search_results)
+            
+            urls = self.page_urls(search_results)
+            stored = await self.stored_pages(competitor, urls, known_pages)
+            if stored:
+                self.log_action(state, f"Answered {competitor} from {len(stored)} indexed pages")
+                state.scraped_data.extend(stored)
+                continue
+            
+            pages = []
+            for url in urls:
+                scraped = await self.scraper.extract_product_info(url, known_pages.get(url))
+                if scraped.get('status') == 'success':
+                    pages.append(scraped)
+            
+            state.scraped_data.extend(pages)
+            await self.index_pages(competitor, pages)
+    
     def extract_competitors(self, task: str) -> List[str]:
         words = task.split()
         competitors = []
@@ -61,6 +151,7 @@ class CompetitiveResearchAgent(BaseAgent):
             competitor_summary[url] = {
                 "title": data.get('title', ''),
                 "pricing_info": data.get('pricing_mentions', []),
+                "prices": data.get('prices', []),
                 "features": data.get('feature_mentions', []),
                 "description": data.get('description', '')
             }
@@ -79,6 +170,15 @@ class CompetitiveResearchAgent(BaseAgent):
         if pricing_count > 0:
             findings.append(f"Found pricing information for {pricing_count} competitors")
         
+        # Ranges are per currency; amounts in different currencies do not compare
+        monthly: Dict[str, List[float]] = {}
+        for d in scraped_data:
+            for price in d.get('prices', []):
+                if price.get('period') == 'month':
+                    monthly.setdefault(price['currency'], []).append(price['amount'])
+        for currency, amounts in sorted(monthly.items()):
+            findings.append(f"Monthly {currency} price points range from {min(amounts):g} to {max(amounts):g}")
+        
         feature_count = sum(1 for d in scraped_data if d.get('feature_mentions'))
         if feature_count > 0:
             findings.append(f"Identified features for {feature_count} competitors")
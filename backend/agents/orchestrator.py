@@ -1,53 +1,187 @@
-from .base_agent import AgentState
+import asyncio
+from .base_agent import AgentState, BaseAgent
 from .competitive_research_agent import CompetitiveResearchAgent
 from .sentiment_agent import SentimentAnalysisAgent
 from .strategy_agent import LaunchStrategyAgent
-from typing import Dict
+from .snapshot_store import SnapshotStore
+from typing import Any, Callable, Dict, Iterable, List, Optional
 from datetime import datetime
+from telemetry import span
 
 
 class AgentOrchestrator:
-    def __init__(self):
-        self.competitive_agent = CompetitiveResearchAgent()
-        self.sentiment_agent = SentimentAnalysisAgent()
-        self.strategy_agent = LaunchStrategyAgent()
+    # Report sections streamed as soon as the agent producing them finishes
+    SECTIONS = {
+        "competitor_data": "competitive_intelligence",
+        "sentiment_data": "sentiment_analysis",
+        "recommendations": "launch_strategy"
+    }
+    REPORT_SECTIONS = ("executive_summary", "competitive_intelligence", "sentiment_analysis",
+                       "launch_strategy", "agent_logs", "data_sources")
+    # State fields each report section is built from
+    SECTION_FIELDS = {
+        "executive_summary": ("competitor_data", "sentiment_data", "recommendations"),
+        "competitive_intelligence": ("competitor_data",),
+        "sentiment_analysis": ("sentiment_data",),
+        "launch_strategy": ("recommendations",),
+        "agent_logs": (),
+        "data_sources": ("search_results", "scraped_data", "sentiment_data")
+    }
     
-    def run_analysis(self, product_name: str, competitors: str = "") -> Dict:
-        state = AgentState()
+    def __init__(self, agents: Optional[List[BaseAgent]] = None,
+                 competitive_agent: Optional[CompetitiveResearchAgent] = None,
+                 sentiment_agent: Optional[SentimentAnalysisAgent] = None,
+                 strategy_agent: Optional[LaunchStrategyAgent] = None,
+                 snapshots: Optional[SnapshotStore] = None):
+        self.competitive_agent = competitive_agent or CompetitiveResearchAgent()
+        self.sentiment_agent = sentiment_agent or SentimentAnalysisAgent()
+        self.strategy_agent = strategy_agent or LaunchStrategyAgent()
+        self.snapshots = snapshots
         
+        self.agents = agents or [self.competitive_agent, self.sentiment_agent, self.strategy_agent]
+        self.stages = self.build_stages(self.agents)
+        self.planned_stages: Dict[frozenset, List[List[BaseAgent]]] = {}
+    
+    @staticmethod
+    def make_task(product_name: str, competitors: str = "") -> str:
         task = f"{product_name}"
         if competitors:
             task += f" vs {competitors}"
+        return task
+    
+    @classmethod
+    def normalize_sections(cls, sections: Optional[Iterable[str]]) -> Optional[frozenset]:
+        if sections is None:
+            return None
         
-        state.add_message("system", f"Starting multi-agent analysis for: {task}")
+        requested = frozenset(s.strip() for s in sections if s.strip())
+        unknown = requested - set(cls.REPORT_SECTIONS)
+        if unknown:
+            raise ValueError(f"Unknown report sections: {', '.join(sorted(unknown))}")
+        if not requested or requested == set(cls.REPORT_SECTIONS):
+            return None
+        return requested
+    
+    def stages_for(self, sections: Optional[frozenset]) -> List[List[BaseAgent]]:
+        if sections is None:
+            return self.stages
         
-        state = self.competitive_agent.execute(state, task)
+        stages = self.planned_stages.get(sections)
+        if stages is None:
+            # Walk back from the requested fields, keeping only the agents
+            # that write them and, transitively, whatever those agents read
+            needed = {field for section in sections for field in self.SECTION_FIELDS[section]}
+            selected = []
+            for agent in reversed(self.agents):
+                if needed & set(agent.writes):
+                    selected.append(agent)
+                    needed |= set(agent.reads)
+            
+            stages = self.planned_stages[sections] = self.build_stages(selected[::-1])
+        return stages
+    
+    def build_stages(self, agents: List[BaseAgent]) -> List[List[BaseAgent]]:
+        # An agent depends on every earlier agent that writes a field it reads
+        # or writes itself, so conflicting writers keep their declared order
+        dependencies = {}
+        for i, agent in enumerate(agents):
+            touched = set(agent.reads) | set(agent.writes)
+            dependencies[i] = {j for j in range(i) if touched & set(agents[j].writes)}
         
-        state = self.sentiment_agent.execute(state, task)
+        stages = []
+        done = set()
+        while len(done) < len(agents):
+            ready = [i for i in range(len(agents)) if i not in done and dependencies[i] <= done]
+            if not ready:
+                raise ValueError("Agent dependency graph contains a cycle")
+            stages.append([agents[i] for i in ready])
+            done.update(ready)
         
-        state = self.strategy_agent.execute(state, task)
+        return stages
+    
+    async def run_stage(self, state: AgentState, stage: List[BaseAgent], task: str) -> AgentState:
+        slices = [state.slice(agent.reads) for agent in stage]
         
-        state.add_message("system", "Multi-agent analysis complete")
+        results = await asyncio.gather(*(
+            self.run_agent(agent, agent_state, task) for agent, agent_state in zip(stage, slices)
+        ))
         
-        report = self.generate_final_report(state, product_name)
+        for agent, result in zip(stage, results):
+            state.merge(result, agent.writes)
         
-        return report
+        return state
     
-    def generate_final_report(self, state: AgentState, product_name: str) -> Dict:
-        return {
-            "product_name": product_name,
-            "analysis_timestamp": datetime.now().isoformat(),
-            "executive_summary": self.create_executive_summary(state),
-            "competitive_intelligence": state.competitor_data,
-            "sentiment_analysis": state.sentiment_data,
-            "launch_strategy": state.recommendations,
-            "agent_logs": state.messages,
-            "data_sources": {
+    async def run_agent(self, agent: BaseAgent, state: AgentState, task: str) -> AgentState:
+        state = await agent.execute(state, task)
+        
+        for field in agent.writes:
+            if field in self.SECTIONS:
+                state.emit(self.SECTIONS[field], getattr(state, field))
+        
+        return state
+    
+    async def run_analysis(self, product_name: str, competitors: str = "",
+                           listener: Optional[Callable[[str, Any], None]] = None,
+                           sections: Optional[Iterable[str]] = None) -> Dict:
+        state = AgentState()
+        if listener is not None:
+            state.listeners.append(listener)
+        
+        task = self.make_task(product_name, competitors)
+        
+        sections = self.normalize_sections(sections)
+        
+        snapshot_key = SnapshotStore.make_key(product_name, competitors)
+        if self.snapshots is not None:
+            state.previous = await asyncio.to_thread(self.snapshots.get, snapshot_key)
+        
+        with span("analysis", task=task) as root:
+            state.add_message("system", f"Starting multi-agent analysis for: {task}")
+            
+            for stage in self.stages_for(sections):
+                state = await self.run_stage(state, stage, task)
+            
+            state.add_message("system", "Multi-agent analysis complete")
+        
+        if self.snapshots is not None and state.snapshot:
+            # Agents skipped by a projection keep their part of the old snapshot
+            await asyncio.to_thread(self.snapshots.put, snapshot_key, {**state.previous, **state.snapshot})
+        
+        state.add_message(
+            "telemetry",
+            f"Span tree for the analysis ({root.duration * 1000:.1f} ms)",
+            spans=root.to_dict()
+        )
+        
+        return self.generate_final_report(state, product_name, sections)
+    
+    def generate_final_report(self, state: AgentState, product_name: str,
+                              sections: Optional[Iterable[str]] = None) -> Dict:
+        # Sections are built only when requested; agent logs are the costly one
+        builders = {
+            "executive_summary": lambda: self.create_executive_summary(state),
+            "competitive_intelligence": lambda: state.competitor_data,
+            "sentiment_analysis": lambda: state.sentiment_data,
+            "launch_strategy": lambda: state.recommendations,
+            "agent_logs": state.serialize_messages,
+            "data_sources": lambda: {
                 "search_results_count": len(state.search_results),
                 "scraped_pages_count": len(state.scraped_data),
-                "sentiment_samples": state.sentiment_data.get('total_samples', 0)
+                "sentiment_samples": state.sentiment_data.get('total_samples', 0),
+                "dropped_log_messages": state.dropped_messages
             }
         }
+        wanted = self.REPORT_SECTIONS if sections is None else frozenset(sections)
+        
+        report = {
+            "product_name": product_name,
+            "analysis_timestamp": datetime.now().isoformat()
+        }
+        for section in self.REPORT_SECTIONS:
+            if section in wanted:
+                report[section] = builders[section]()
+        
+        return report
     
     def create_executive_summary(self, state: AgentState) -> Dict:
         competitor_data = state.competitor_data
@@ -0,0 +1,190 @@
+import asyncio
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, FrozenSet, List, Optional, Tuple
+from config import settings
+from tools.cache import TTLCache
+from tools.shared_cache import SharedCache, get_shared_cache
+
+Listener = Callable[[str, Any], None]
+Runner = Callable[[Listener], Awaitable[Dict]]
+ReportKey = Tuple[str, str, str]
+
+
+class EventChannel:
+    # Fan-out of one analysis run's events; late subscribers replay the history
+    def __init__(self):
+        self.history: List[Tuple[str, Any]] = []
+        self.queues: List[asyncio.Queue] = []
+        self.closed = False
+    
+    def publish(self, event: str, data: Any):
+        self.history.append((event, data))
+        for queue in self.queues:
+            queue.put_nowait((event, data))
+    
+    def close(self):
+        self.closed = True
+        for queue in self.queues:
+            queue.put_nowait(None)
+    
+    async def subscribe(self) -> AsyncIterator[Tuple[str, Any]]:
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in self.history:
+            queue.put_nowait(item)
+        if self.closed:
+            queue.put_nowait(None)
+        else:
+            self.queues.append(queue)
+        
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                yield item
+        finally:
+            if queue in self.queues:
+                self.queues.remove(queue)
+
+
+class ReportCache:
+    def __init__(self, fresh_ttl: float, stale_ttl: float, maxsize: int = 256,
+                 shared: Optional[SharedCache] = None):
+        self.fresh_ttl = fresh_ttl
+        self.stale_ttl = max(stale_ttl, fresh_ttl)
+        # Creation times are wall-clock so reports stay comparable across worker processes
+        self.cache = TTLCache(maxsize=maxsize, shared=shared)
+        self.in_flight: Dict[ReportKey, asyncio.Future] = {}
+        self.channels: Dict[ReportKey, EventChannel] = {}
+        self.counters = {
+            "fresh_hits": 0,
+            "projected_hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "run_errors": 0
+        }
+    
+    @staticmethod
+    def make_key(product_name: str, competitors: str = "",
+                 sections: Optional[FrozenSet[str]] = None) -> ReportKey:
+        # Projections are cached apart from the full report ("" sections)
+        return (
+            " ".join(product_name.split()).casefold(),
+            " ".join(competitors.split()).casefold(),
+            ",".join(sorted(sections)) if sections else ""
+        )
+    
+    @staticmethod
+    def project(report: Dict, sections: FrozenSet[str]) -> Dict:
+        return {
+            name: value for name, value in report.items()
+            if name in sections or name in ("product_name", "analysis_timestamp")
+        }
+    
+    async def lookup(self, key: ReportKey, run: Runner,
+                     sections: Optional[FrozenSet[str]] = None) -> Optional[Dict]:
+        item = await self.cache.get_async(key)
+        if item is None and sections:
+            # A fresh full report answers any projection without a new run
+            full = await self.cache.get_async(key[:2] + ("",))
+            if full is not None and time.time() - full[1] < self.fresh_ttl:
+                self.counters["projected_hits"] += 1
+                return self.project(full[0], sections)
+        
+        if item is None:
+            self.counters["misses"] += 1
+            return None
+        
+        report, created_at = item
+        if time.time() - created_at >= self.fresh_ttl:
+            # Another worker may have refreshed it already
+            newer = await self.cache.reload(key)
+            if newer is not None:
+                report, created_at = newer
+        
+        if time.time() - created_at < self.fresh_ttl:
+            self.counters["fresh_hits"] += 1
+        else:
+            # Serve the stale copy now and refresh it behind the response
+            self.counters["stale_hits"] += 1
+            if key not in self.in_flight:
+                self.counters["refreshes"] += 1
+                self.start_run(key, run)
+        return report
+    
+    async def get_report(self, product_name: str, competitors: str, run: Runner,
+                         sections: Optional[FrozenSet[str]] = None) -> Dict:
+        key = self.make_key(product_name, competitors, sections)
+        report = await self.lookup(key, run, sections)
+        if report is not None:
+            return report
+        
+        # Concurrent misses attach to the one in-flight analysis
+        return await asyncio.shield(self.start_run(key, run))
+    
+    async def stream_report(self, product_name: str, competitors: str, run: Runner,
+                            sections: Optional[FrozenSet[str]] = None) -> AsyncIterator[Tuple[str, Any]]:
+        key = self.make_key(product_name, competitors, sections)
+        report = await self.lookup(key, run, sections)
+        if report is not None:
+            yield "report", report
+            return
+        
+        self.start_run(key, run)
+        async for event in self.channels[key].subscribe():
+            yield event
+    
+    def start_run(self, key: ReportKey, run: Runner) -> asyncio.Future:
+        future = self.in_flight.get(key)
+        if future is None:
+            channel = EventChannel()
+            self.channels[key] = channel
+            future = asyncio.ensure_future(self.run_and_store(key, run, channel))
+            self.in_flight[key] = future
+            future.add_done_callback(lambda done: self.finish_run(key, done))
+        return future
+    
+    async def run_and_store(self, key: ReportKey, run: Runner, channel: EventChannel) -> Dict:
+        try:
+            report = await run(channel.publish)
+            await self.cache.set_async(key, (report, time.time()), self.stale_ttl)
+            channel.publish("report", report)
+            return report
+        except Exception as e:
+            channel.publish("error", {"detail": str(e)})
+            raise
+        finally:
+            channel.close()
+    
+    def finish_run(self, key: ReportKey, future: asyncio.Future):
+        if self.in_flight.get(key) is future:
+            del self.in_flight[key]
+            self.channels.pop(key, None)
+        
+        if not future.cancelled() and future.exception() is not None:
+            self.counters["run_errors"] += 1
+            print(f"Report run error: {future.exception()}")
+    
+    def stats(self) -> Dict:
+        return {
+            **self.counters,
+            "entries": len(self.cache.entries),
+            "shared": self.cache.shared.stats() if self.cache.shared is not None else None,
+            "in_flight": len(self.in_flight)
+        }
+
+
+_report_cache: Optional[ReportCache] = None
+
+
+def get_report_cache() -> ReportCache:
+    global _report_cache
+    if _report_cache is None:
+        _report_cache = ReportCache(
+            fresh_ttl=settings.report_cache_fresh_ttl,
+            stale_ttl=settings.report_cache_stale_ttl,
+            maxsize=settings.report_cache_maxsize,
+            shared=get_shared_cache("reports")
+        )
+    return _report_cache
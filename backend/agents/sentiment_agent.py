@@ -1,40 +1,46 @@
+import asyncio
 from .base_agent import BaseAgent, AgentState
-from tools.sentiment_analyzer import SentimentAnalyzer
-from tools.reddit_scraper import RedditScraper
-from typing import Dict, List
+from config import settings
+from tools.sentiment_analyzer import SentimentAnalyzer, SentimentBatch, merge_aggregates, summarize_aggregates
+from tools.sentiment_cache import get_sentiment_cache
+from tools.reddit_scraper import AsyncRedditScraper
+from tools.corpus_store import CorpusStore
+from typing import Dict, List, Optional, Set, Tuple
 
 
 class SentimentAnalysisAgent(BaseAgent):
-    def __init__(self):
+    reads = ()
+    writes = ("sentiment_data",)
+    
+    def __init__(self, sentiment_tool: Optional[SentimentAnalyzer] = None,
+                 reddit_scraper: Optional[AsyncRedditScraper] = None, corpus: Optional[CorpusStore] = None):
         super().__init__(
             name="SentimentAnalyzer",
             role="Social Media Sentiment Analyst"
         )
-        self.sentiment_tool = SentimentAnalyzer()
-        self.reddit_scraper = RedditScraper()
+        self.sentiment_tool = sentiment_tool or SentimentAnalyzer(cache=get_sentiment_cache())
+        self.reddit_scraper = reddit_scraper or AsyncRedditScraper()
+        self.corpus = corpus
     
-    def execute(self, state: AgentState, task: str) -> AgentState:
+    async def execute(self, state: AgentState, task: str) -> AgentState:
         self.log_action(state, f"Starting sentiment analysis for: {task}")
         
         keywords = self.extract_keywords(task)
-        
-        all_texts = []
+        previous = state.previous.get("sentiment") or {}
+        last_seen = previous.get("keywords", {})
+        seen_posts = previous.get("posts", {})
         
         for keyword in keywords:
             self.log_action(state, f"Collecting social media data for: {keyword}")
-            
-            reddit_posts = self.reddit_scraper.search_posts(keyword, limit=5)
-            
-            for post in reddit_posts:
-                if post.get('title'):
-                    all_texts.append(post['title'])
-                if post.get('text') and len(post['text']) > 10:
-                    all_texts.append(post['text'])
-                
-                comments = self.reddit_scraper.get_comments(post.get('url', ''), limit=10)
-                all_texts.extend(comments)
-        
-        if not all_texts:
+        
+        collected = await asyncio.gather(*(
+            self.collect_posts(state, keyword, last_seen.get(keyword), seen_posts) for keyword in keywords
+        ))
+        
+        all_texts, scored = self.select_texts(collected, settings.sentiment_sample_limit)
+        
+        sample_only = not all_texts and not previous
+        if sample_only:
             all_texts = [
                 f"Sample positive text about {task}",
                 f"Sample negative feedback regarding {task}",
@@ -42,18 +48,113 @@ class SentimentAnalysisAgent(BaseAgent):
             ]
             self.log_action(state, "No social media data available, using sample texts")
         
-        self.log_action(state, f"Analyzing sentiment for {len(all_texts)} text samples")
-        
-        sentiment_results = self.sentiment_tool.analyze_batch(all_texts[:50])
-        overall_sentiment = self.sentiment_tool.get_overall_sentiment(all_texts[:50])
+        if all_texts:
+            self.log_action(state, f"Analyzing sentiment for {len(all_texts)} text samples")
+            
+            batch = await self.sentiment_tool.score_batch_async(all_texts)
+            self.log_action(state, f"Reused cached scores for {batch.cache_hits} of {len(batch)} samples")
+            
+            aggregates = merge_aggregates(previous.get("aggregates"), batch.aggregates())
+            samples = self.merge_samples(batch, previous.get("samples"))
+        else:
+            aggregates = previous["aggregates"]
+            samples = previous["samples"]
+            self.log_action(state, "No new posts since the last run, reusing previous sentiment")
         
-        analysis = self.create_sentiment_report(sentiment_results, overall_sentiment, keywords)
+        overall_sentiment = summarize_aggregates(aggregates)
+        analysis = self.create_sentiment_report(overall_sentiment, samples, keywords)
         state.sentiment_data = analysis
         
+        # Sample texts say nothing about the product, so they never seed a snapshot
+        if not sample_only:
+            state.snapshot["sentiment"] = self.build_snapshot(
+                previous, keywords, collected, scored, all_texts, aggregates, samples
+            )
+        
         self.log_action(state, f"Sentiment analysis complete: {overall_sentiment['overall_sentiment']}")
         
         return state
     
+    async def collect_posts(self, state: AgentState, keyword: str, since: Optional[float],
+                            seen: Dict[str, float]) -> List[Dict]:
+        # Keywords this product has no snapshot for may still be in the corpus
+        # from another product's run
+        if since is None and self.corpus is not None:
+            stored = await asyncio.to_thread(self.corpus.posts_for, keyword, settings.corpus_max_age)
+            posts = [p for p in stored if p['id'] not in seen]
+            if posts:
+                self.log_action(state, f"Answered {keyword} from {len(posts)} indexed posts")
+                return posts
+        
+        posts = await self.reddit_scraper.collect(keyword, post_limit=5, comment_limit=10, since=since, seen=seen)
+        if self.corpus is not None and posts:
+            await asyncio.to_thread(self.corpus.add_posts, keyword, posts)
+        return posts
+    
+    def post_texts(self, post: Dict) -> List[str]:
+        texts = []
+        if post.get('title'):
+            texts.append(post['title'])
+        if post.get('text') and len(post['text']) > 10:
+            texts.append(post['text'])
+        texts.extend(post['comments'])
+        return texts
+    
+    def select_texts(self, collected: List[List[Dict]], limit: int) -> Tuple[List[str], Set[str]]:
+        # Whole posts up to the sample limit; a post that does not fit is left
+        # for the next run rather than half-scored and marked seen
+        texts: List[str] = []
+        scored: Set[str] = set()
+        for reddit_posts in collected:
+            for post in reddit_posts:
+                room = limit - len(texts)
+                if room <= 0:
+                    break
+                post_texts = self.post_texts(post)
+                if len(post_texts) > room and texts:
+                    continue
+                texts.extend(post_texts[:room])
+                scored.add(post['id'])
+        return texts, scored
+    
+    def merge_samples(self, batch: SentimentBatch, previous: Optional[Dict] = None) -> Dict[str, List[str]]:
+        previous = previous or {}
+        samples = {}
+        for label in ("positive", "negative"):
+            # Newest samples first, earlier runs fill the remaining slots
+            texts = [batch.texts[i][:100] for i in batch.indices(label)[:3]] + previous.get(label, [])
+            samples[label] = list(dict.fromkeys(texts))[:3]
+        return samples
+    
+    def build_snapshot(self, previous: Dict, keywords: List[str], collected: List[List[Dict]], scored: Set[str],
+                       texts: List[str], aggregates: Dict, samples: Dict) -> Dict:
+        last_seen = dict(previous.get("keywords", {}))
+        posts = dict(previous.get("posts", {}))
+        
+        for keyword, reddit_posts in zip(keywords, collected):
+            for post in reddit_posts:
+                if post['id'] in scored:
+                    posts[post['id']] = post['created_utc']
+                    last_seen[keyword] = max(last_seen.get(keyword, 0), post['created_utc'])
+            
+            # Posts past the sample limit stay unseen; keep `since` below them so
+            # the next run collects them again and the seen ids skip the rest
+            unscored = [post['created_utc'] for post in reddit_posts if post['id'] not in scored]
+            if unscored and keyword in last_seen:
+                last_seen[keyword] = min(last_seen[keyword], min(unscored) - 1)
+        
+        if len(posts) > settings.snapshot_max_posts:
+            newest = sorted(posts.items(), key=lambda item: item[1], reverse=True)
+            posts = dict(newest[:settings.snapshot_max_posts])
+        
+        return {
+            "keywords": last_seen,
+            "posts": posts,
+            "texts": (texts + previous.get("texts", []))[:settings.sentiment_sample_limit],
+            "aggregates": aggregates,
+            "samples": samples
+        }
+    
     def extract_keywords(self, task: str) -> List[str]:
         words = task.lower().split()
         
@@ -62,20 +163,19 @@ class SentimentAnalysisAgent(BaseAgent):
         
         return keywords[:3]
     
-    def create_sentiment_report(self, results: List[Dict], overall: Dict, keywords: List[str]) -> Dict:
-        positive_samples = [r for r in results if r['sentiment'] == 'positive']
-        negative_samples = [r for r in results if r['sentiment'] == 'negative']
+    def create_sentiment_report(self, overall: Dict, samples: Dict[str, List[str]], keywords: List[str]) -> Dict:
+        distribution = overall['sentiment_distribution']
         
         return {
             "keywords_analyzed": keywords,
             "total_samples": overall['total_analyzed'],
             "overall_sentiment": overall['overall_sentiment'],
-            "sentiment_distribution": overall['sentiment_distribution'],
+            "sentiment_distribution": distribution,
             "average_score": overall['average_compound_score'],
-            "positive_mentions": len(positive_samples),
-            "negative_mentions": len(negative_samples),
-            "sample_positive_comments": [p['text'][:100] for p in positive_samples[:3]],
-            "sample_negative_comments": [n['text'][:100] for n in negative_samples[:3]],
+            "positive_mentions": distribution['positive'],
+            "negative_mentions": distribution['negative'],
+            "sample_positive_comments": samples.get('positive', []),
+            "sample_negative_comments": samples.get('negative', []),
             "insights": self.generate_insights(overall)
         }
     
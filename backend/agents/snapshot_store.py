@@ -0,0 +1,74 @@
+import threading
+import time
+import orjson
+from typing import Dict, Optional
+from config import settings
+from tools.shared_cache import open_database
+
+
+class SnapshotStore:
+    # Last known raw inputs per product (post ids, page fingerprints, sentiment
+    # aggregates) so a re-run only fetches and scores what changed
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.entries: Dict[str, Dict] = {}
+        self.lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "stores": 0}
+        self.db = None
+        
+        if path:
+            self.db = open_database(path)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS snapshots "
+                "(key TEXT PRIMARY KEY, data BLOB, updated_at REAL)"
+            )
+            self.db.commit()
+    
+    @staticmethod
+    def make_key(product_name: str, competitors: str = "") -> str:
+        return "|".join((" ".join(product_name.split()).casefold(), " ".join(competitors.split()).casefold()))
+    
+    def get(self, key: str) -> Dict:
+        with self.lock:
+            snapshot = self.entries.get(key)
+            if self.db:
+                # Always read through: another worker process may have stored a newer one
+                row = self.db.execute("SELECT data FROM snapshots WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    snapshot = self.entries[key] = orjson.loads(row[0])
+            
+            self.counters["hits" if snapshot is not None else "misses"] += 1
+            return snapshot or {}
+    
+    def put(self, key: str, snapshot: Dict):
+        with self.lock:
+            self.entries[key] = snapshot
+            self.counters["stores"] += 1
+            
+            if self.db:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?)",
+                    (key, orjson.dumps(snapshot, option=orjson.OPT_SERIALIZE_NUMPY), time.time())
+                )
+                self.db.commit()
+    
+    def stats(self) -> Dict:
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "entries": len(self.entries),
+            "persistent": self.db is not None,
+            "hit_rate": self.counters["hits"] / lookups if lookups else 0.0
+        }
+
+
+_snapshot_store: Optional[SnapshotStore] = None
+
+
+def get_snapshot_store() -> Optional[SnapshotStore]:
+    global _snapshot_store
+    if not settings.snapshot_enabled:
+        return None
+    if _snapshot_store is None:
+        _snapshot_store = SnapshotStore(path=settings.snapshot_path or None)
+    return _snapshot_store
@@ -3,13 +3,16 @@ from typing import Dict, List
 
 
 class LaunchStrategyAgent(BaseAgent):
+    reads = ("competitor_data", "sentiment_data")
+    writes = ("recommendations",)
+    
     def __init__(self):
         super().__init__(
             name="StrategyAdvisor",
             role="Launch Strategy Consultant"
         )
     
-    def execute(self, state: AgentState, task: str) -> AgentState:
+    async def execute(self, state: AgentState, task: str) -> AgentState:
         self.log_action(state, "Synthesizing insights for launch strategy")
         
         competitor_data = state.competitor_data
@@ -0,0 +1,218 @@
+import argparse
+import asyncio
+import sys
+import time
+import orjson
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, FrozenSet, Hashable, List, Optional, Sequence, Tuple
+from config import settings
+from agents.competitive_research_agent import CompetitiveResearchAgent
+from agents.sentiment_agent import SentimentAnalysisAgent
+from agents.orchestrator import AgentOrchestrator
+
+
+class FetchMemo:
+    # Results are kept for the whole batch, so every analysis that needs the
+    # same query, URL or keyword shares one upstream fetch
+    def __init__(self):
+        self.results: Dict[Hashable, asyncio.Future] = {}
+        self.counters: Dict[str, Dict[str, int]] = {}
+    
+    async def run(self, kind: str, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        counters = self.counters.setdefault(kind, {"requests": 0, "fetches": 0})
+        counters["requests"] += 1
+        
+        future = self.results.get((kind, key))
+        if future is None:
+            counters["fetches"] += 1
+            future = self.results[(kind, key)] = asyncio.ensure_future(func())
+        return await asyncio.shield(future)
+    
+    def stats(self) -> Dict:
+        return {kind: dict(counters) for kind, counters in self.counters.items()}
+
+
+class MemoSearchTool:
+    def __init__(self, search_tool, memo: FetchMemo):
+        self.search_tool = search_tool
+        self.memo = memo
+    
+    async def search_competitor(self, company_name: str, product_name: str = "") -> List[Dict]:
+        key = (" ".join(company_name.split()).casefold(), " ".join(product_name.split()).casefold())
+        return await self.memo.run("search", key, lambda: self.search_tool.search_competitor(company_name, product_name))
+
+
+class MemoScraper:
+    def __init__(self, scraper, memo: FetchMemo):
+        self.scraper = scraper
+        self.memo = memo
+    
+    async def extract_product_info(self, url: str, known: Optional[Dict] = None) -> Dict:
+        key = (url, known.get("fingerprint") if known else None)
+        return await self.memo.run("scrape", key, lambda: self.scraper.extract_product_info(url, known))
+
+
+class MemoRedditScraper:
+    def __init__(self, reddit_scraper, memo: FetchMemo):
+        self.reddit_scraper = reddit_scraper
+        self.memo = memo
+    
+    async def collect(self, query: str, post_limit: int = 5, comment_limit: int = 10,
+                      subreddit: str = "all", since: Optional[float] = None, seen=()) -> List[Dict]:
+        # Products differ in which posts they have already scored, so the shared
+        # fetch ignores `seen` and each caller filters its own copy
+        key = (query.casefold(), post_limit, comment_limit, subreddit, since)
+        posts = await self.memo.run(
+            "reddit", key, lambda: self.reddit_scraper.collect(query, post_limit, comment_limit, subreddit, since)
+        )
+        return [post for post in posts if post["id"] not in seen]
+
+
+# (product_name, competitors, fields); fields of None fall back to the batch's own
+BatchItem = Tuple[str, str, Optional[Sequence[str]]]
+
+
+class BatchAnalyzer:
+    def __init__(self, registry, concurrency: Optional[int] = None):
+        self.registry = registry
+        self.concurrency = concurrency or settings.batch_concurrency
+    
+    def build_orchestrator(self, memo: FetchMemo) -> AgentOrchestrator:
+        base = self.registry.orchestrator
+        competitive = base.competitive_agent
+        sentiment = base.sentiment_agent
+        
+        return AgentOrchestrator(
+            competitive_agent=CompetitiveResearchAgent(
+                pipelined=competitive.pipelined,
+                max_concurrency=competitive.max_concurrency,
+                per_competitor_concurrency=competitive.per_competitor_concurrency,
+                search_tool=MemoSearchTool(competitive.search_tool, memo),
+                scraper=MemoScraper(competitive.scraper, memo),
+                corpus=competitive.corpus
+            ),
+            sentiment_agent=SentimentAnalysisAgent(
+                sentiment_tool=sentiment.sentiment_tool,
+                reddit_scraper=MemoRedditScraper(sentiment.reddit_scraper, memo),
+                corpus=sentiment.corpus
+            ),
+            strategy_agent=base.strategy_agent,
+            snapshots=base.snapshots
+        )
+    
+    def resolve(self, items: Sequence[BatchItem],
+                sections: Optional[Sequence[str]] = None) -> List[Tuple[str, str, Optional[FrozenSet[str]]]]:
+        # Validates every item's sections up front, so a bad one fails the whole batch before it starts
+        normalize = self.registry.orchestrator.normalize_sections
+        default = normalize(sections)
+        return [
+            (product_name, competitors, normalize(fields) if fields is not None else default)
+            for product_name, competitors, fields in items
+        ]
+    
+    def plan(self, items: Sequence[Tuple[str, str, Optional[FrozenSet[str]]]]) -> Dict:
+        orchestrator = self.registry.orchestrator
+        competitors: List[str] = []
+        keywords: List[str] = []
+        for product_name, product_competitors, _ in items:
+            task = orchestrator.make_task(product_name, product_competitors)
+            competitors.extend(c.casefold() for c in orchestrator.competitive_agent.extract_competitors(task))
+            keywords.extend(orchestrator.sentiment_agent.extract_keywords(task))
+        
+        return {
+            "products": len(items),
+            "distinct_products": len({self.registry.report_cache.make_key(*item) for item in items}),
+            "competitor_searches": len(competitors),
+            "distinct_competitor_searches": len(set(competitors)),
+            "keyword_collections": len(keywords),
+            "distinct_keyword_collections": len(set(keywords))
+        }
+    
+    async def run(self, items: Sequence[BatchItem],
+                  sections: Optional[Sequence[str]] = None) -> AsyncIterator[Dict]:
+        items = self.resolve(items, sections)
+        memo = FetchMemo()
+        orchestrator = self.build_orchestrator(memo)
+        limit = asyncio.Semaphore(self.concurrency)
+        started = time.perf_counter()
+        
+        yield {"type": "plan", **self.plan(items)}
+        
+        async def analyze(index: int, product_name: str, competitors: str,
+                          sections: Optional[FrozenSet[str]]) -> Dict:
+            result = {"index": index, "product_name": product_name, "competitors": competitors}
+            async with limit:
+                try:
+                    report = await self.registry.report_cache.get_report(
+                        product_name,
+                        competitors,
+                        lambda listener: orchestrator.run_analysis(product_name, competitors, listener, sections),
+                        sections
+                    )
+                    return {"type": "report", **result, "report": report}
+                except Exception as e:
+                    return {"type": "error", **result, "detail": str(e)}
+        
+        tasks = [asyncio.ensure_future(analyze(i, *item)) for i, item in enumerate(items)]
+        failed = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                failed += result["type"] == "error"
+                yield result
+        finally:
+            for task in tasks:
+                task.cancel()
+        
+        yield {
+            "type": "summary",
+            "completed": len(items) - failed,
+            "failed": failed,
+            "fetches": memo.stats(),
+            "elapsed_seconds": time.perf_counter() - started
+        }
+
+
+def read_items(path: str) -> List[BatchItem]:
+    # JSON list of {"product_name", "competitors", "fields"} objects, or one
+    # "product,competitor and competitor" pair per line
+    with (sys.stdin if path == "-" else open(path)) as f:
+        content = f.read()
+    
+    if content.lstrip().startswith("["):
+        return [
+            (item["product_name"], item.get("competitors", ""), item.get("fields"))
+            for item in orjson.loads(content)
+        ]
+    
+    items = []
+    for line in content.splitlines():
+        if line.strip():
+            product_name, _, competitors = line.partition(",")
+            items.append((product_name.strip(), competitors.strip(), None))
+    return items
+
+
+async def run_cli(args: argparse.Namespace):
+    from registry import registry
+    
+    await registry.start()
+    try:
+        analyzer = BatchAnalyzer(registry, concurrency=args.concurrency)
+        fields = args.fields.split(",") if args.fields else None
+        async for event in analyzer.run(read_items(args.input), fields):
+            sys.stdout.buffer.write(orjson.dumps(event, default=str, option=orjson.OPT_SERIALIZE_NUMPY) + b"\n")
+            sys.stdout.flush()
+    finally:
+        await registry.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyse many products at once, writing NDJSON to stdout")
+    parser.add_argument("input", help="JSON list or 'product,competitors' lines; '-' reads stdin")
+    parser.add_argument("--fields", help="comma-separated report sections to keep")
+    parser.add_argument("--concurrency", type=int, help="analyses in flight at once")
+    asyncio.run(run_cli(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+import httpx
+from benchmarks.stubs import Fixtures, upstream_transport, stub_orchestrator
+from tools.search_tool import SearchTool, AsyncSearchTool
+from tools.web_scraper import AsyncWebScraper
+from tools.sentiment_analyzer import SentimentAnalyzer
+from agents.snapshot_store import SnapshotStore
+
+
+# Page size tier -> (body repetitions, rounds)
+PAGE_SCALES = {"small": (1, 30), "medium": (20, 10), "large": (200, 5)}
+SENTIMENT_BATCH = 1000
+
+
+class Benchmark:
+    def __init__(self, name: str, func: Callable, rounds: int, is_async: bool = False):
+        self.name = name
+        self.func = func
+        self.rounds = rounds
+        self.is_async = is_async
+
+
+def build_benchmarks(fixtures: Fixtures) -> List[Benchmark]:
+    benchmarks = []
+    
+    page_urls = [f"https://pages.bench/{name}" for name in sorted(fixtures.pages)]
+    for tier, (scale, rounds) in PAGE_SCALES.items():
+        scraper = AsyncWebScraper(client=httpx.AsyncClient(transport=upstream_transport(fixtures, scale)))
+        
+        async def extract(scraper=scraper):
+            for url in page_urls:
+                await scraper.extract_product_info(url)
+        
+        benchmarks.append(Benchmark(f"scraper.extract_product_info[{tier}]", extract, rounds=rounds, is_async=True))
+    
+    texts = (fixtures.texts() * (SENTIMENT_BATCH // len(fixtures.texts()) + 1))[:SENTIMENT_BATCH]
+    analyzer = SentimentAnalyzer(parallel=False)
+    benchmarks.append(Benchmark(
+        f"sentiment.analyze_batch[{SENTIMENT_BATCH}]", lambda: analyzer.analyze_batch(texts), rounds=10
+    ))
+    benchmarks.append(Benchmark(
+        f"sentiment.get_overall_sentiment[{SENTIMENT_BATCH}]", lambda: analyzer.get_overall_sentiment(texts), rounds=10
+    ))
+    
+    search_tool = SearchTool()
+    responses = list(fixtures.search.values())
+    
+    def parse():
+        for data in responses:
+            search_tool.parse_results(data)
+    
+    benchmarks.append(Benchmark("search.parse_results", parse, rounds=200))
+    
+    async_search = AsyncSearchTool(client=httpx.AsyncClient(transport=upstream_transport(fixtures)))
+    queries = [f"{name} product features pricing" for name in fixtures.search]
+    
+    async def search():
+        for query in queries:
+            await async_search.search(query)
+    
+    benchmarks.append(Benchmark("search.search[stubbed]", search, rounds=50, is_async=True))
+    
+    orchestrator = stub_orchestrator(fixtures)
+    benchmarks.append(Benchmark(
+        "orchestrator.run_analysis[stubbed]",
+        lambda: orchestrator.run_analysis("Slack", "Notion and Zulip"),
+        rounds=10,
+        is_async=True
+    ))
+    
+    # The warm-up call seeds the in-memory snapshot, so every measured round is a re-run
+    incremental = stub_orchestrator(fixtures)
+    incremental.snapshots = SnapshotStore()
+    benchmarks.append(Benchmark(
+        "orchestrator.run_analysis[incremental]",
+        lambda: incremental.run_analysis("Slack", "Notion and Zulip"),
+        rounds=10,
+        is_async=True
+    ))
+    
+    return benchmarks
+
+
+def measure(benchmark: Benchmark, loop: asyncio.AbstractEventLoop, rounds_scale: float) -> Dict:
+    rounds = max(1, int(benchmark.rounds * rounds_scale))
+    
+    def call():
+        if benchmark.is_async:
+            loop.run_until_complete(benchmark.func())
+        else:
+            benchmark.func()
+    
+    call()
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - start)
+    
+    return {
+        "rounds": rounds,
+        "mean": statistics.fmean(samples),
+        "median": statistics.median(samples),
+        "min": min(samples),
+        "max": max(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0
+    }
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[Dict]:
+    regressions = []
+    for name, current in results["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            continue
+        ratio = current["median"] / previous["median"] if previous["median"] else 1.0
+        current["baseline_median"] = previous["median"]
+        current["ratio"] = ratio
+        if ratio > 1 + threshold:
+            regressions.append({"name": name, "ratio": ratio})
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline benchmarks against recorded fixtures")
+    parser.add_argument("--output", help="Write JSON results to this file instead of stdout")
+    parser.add_argument("--compare", help="Baseline JSON file to compare medians against")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="Allowed slowdown ratio before flagging a regression (default 0.15)")
+    parser.add_argument("--filter", default="", help="Only run benchmarks whose name contains this text")
+    parser.add_argument("--rounds-scale", type=float, default=1.0, help="Multiply every benchmark's rounds")
+    args = parser.parse_args(argv)
+    
+    fixtures = Fixtures()
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    
+    results = {
+        "created_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": {}
+    }
+    
+    for benchmark in build_benchmarks(fixtures):
+        if args.filter not in benchmark.name:
+            continue
+        stats = measure(benchmark, loop, args.rounds_scale)
+        results["results"][benchmark.name] = stats
+        print(f"{benchmark.name:<48} median {stats['median'] * 1000:9.3f} ms  ({stats['rounds']} rounds)",
+              file=sys.stderr)
+    
+    loop.close()
+    
+    regressions = []
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        results["regressions"] = regressions
+        for regression in regressions:
+            print(f"REGRESSION {regression['name']}: {regression['ratio']:.2f}x baseline median", file=sys.stderr)
+    
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
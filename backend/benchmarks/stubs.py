@@ -0,0 +1,144 @@
+import json
+import zlib
+from pathlib import Path
+from typing import Dict, List
+import httpx
+from tools.search_tool import AsyncSearchTool
+from tools.web_scraper import AsyncWebScraper
+from tools.reddit_scraper import AsyncRedditScraper
+from tools.rate_limit import TokenBucket
+from tools.sentiment_analyzer import SentimentAnalyzer
+from agents.competitive_research_agent import CompetitiveResearchAgent
+from agents.sentiment_agent import SentimentAnalysisAgent
+from agents.orchestrator import AgentOrchestrator
+
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+SEARCH_HOST = "api.duckduckgo.com"
+
+
+class Fixtures:
+    def __init__(self, directory: Path = FIXTURES_DIR):
+        self.search = {p.stem: json.loads(p.read_text()) for p in sorted((directory / "ddg").glob("*.json"))}
+        self.pages = {p.stem: p.read_bytes() for p in sorted((directory / "pages").glob("*.html"))}
+        self.posts: List[Dict] = json.loads((directory / "reddit" / "posts.json").read_text())
+    
+    def search_response(self, query: str) -> Dict:
+        name = query.split()[0].lower() if query.split() else ""
+        if name in self.search:
+            return self.search[name]
+        names = sorted(self.search)
+        return self.search[names[zlib.crc32(query.encode()) % len(names)]]
+    
+    def page(self, name: str, scale: int = 1) -> bytes:
+        # Larger pages repeat the recorded body, like long landing pages and SPAs
+        html = self.pages[name]
+        if scale <= 1:
+            return html
+        start = html.index(b">", html.index(b"<body")) + 1
+        end = html.rindex(b"</body>")
+        return html[:start] + html[start:end] * scale + html[end:]
+    
+    def page_for_url(self, url: str, scale: int = 1) -> bytes:
+        names = sorted(self.pages)
+        return self.page(names[zlib.crc32(url.encode()) % len(names)], scale)
+    
+    def texts(self) -> List[str]:
+        texts = []
+        for post in self.posts:
+            texts.append(post["title"])
+            if post["selftext"]:
+                texts.append(post["selftext"])
+            texts.extend(post["comments"])
+        return texts
+
+
+def upstream_transport(fixtures: Fixtures, page_scale: int = 1) -> httpx.MockTransport:
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == SEARCH_HOST:
+            return httpx.Response(200, json=fixtures.search_response(request.url.params.get("q", "")))
+        return httpx.Response(
+            200,
+            content=fixtures.page_for_url(str(request.url), page_scale),
+            headers={"content-type": "text/html; charset=utf-8"}
+        )
+    
+    return httpx.MockTransport(handler)
+
+
+class FakeComment:
+    def __init__(self, body: str):
+        self.body = body
+
+
+class FakeCommentForest:
+    def __init__(self, bodies: List[str]):
+        self.comments = [FakeComment(body) for body in bodies]
+    
+    def replace_more(self, limit: int = 0):
+        return []
+    
+    def list(self) -> List[FakeComment]:
+        return list(self.comments)
+
+
+class FakeSubmission:
+    def __init__(self, post: Dict):
+        self.id = post["id"]
+        self.title = post["title"]
+        self.selftext = post["selftext"]
+        self.score = post["score"]
+        self.url = post["url"]
+        self.permalink = post["permalink"]
+        self.created_utc = post["created_utc"]
+        self.num_comments = post["num_comments"]
+        self.subreddit = post["subreddit"]
+        self.comments = FakeCommentForest(post["comments"])
+
+
+class FakeSubreddit:
+    def __init__(self, posts: List[Dict]):
+        self.posts = posts
+    
+    def search(self, query: str, limit: int = 10, sort: str = "relevance"):
+        # Rotate by query so different keywords see different recorded posts
+        offset = zlib.crc32(query.encode()) % len(self.posts)
+        ordered = self.posts[offset:] + self.posts[:offset]
+        if sort == "new":
+            ordered = sorted(self.posts, key=lambda post: post["created_utc"], reverse=True)
+        return [FakeSubmission(post) for post in ordered[:limit]]
+
+
+class FakeReddit:
+    def __init__(self, posts: List[Dict]):
+        self.posts = posts
+    
+    def subreddit(self, name: str) -> FakeSubreddit:
+        return FakeSubreddit(self.posts)
+    
+    def submission(self, id: str = "", url: str = "") -> FakeSubmission:
+        for post in self.posts:
+            if post["id"] == id or (url and (post["url"] == url or post["permalink"] in url)):
+                return FakeSubmission(post)
+        raise ValueError(f"Unknown submission: {id or url}")
+
+
+def stub_reddit_scraper(fixtures: Fixtures) -> AsyncRedditScraper:
+    return AsyncRedditScraper(
+        limiter=TokenBucket(rate=1e9, capacity=1e9),
+        factory=lambda: FakeReddit(fixtures.posts)
+    )
+
+
+def stub_orchestrator(fixtures: Fixtures, page_scale: int = 1) -> AgentOrchestrator:
+    # Caches stay off so every run measures the full pipeline
+    client = httpx.AsyncClient(transport=upstream_transport(fixtures, page_scale))
+    competitive_agent = CompetitiveResearchAgent(
+        search_tool=AsyncSearchTool(client=client),
+        scraper=AsyncWebScraper(client=client)
+    )
+    sentiment_agent = SentimentAnalysisAgent(
+        sentiment_tool=SentimentAnalyzer(parallel=False),
+        reddit_scraper=stub_reddit_scraper(fixtures)
+    )
+    return AgentOrchestrator(competitive_agent=competitive_agent, sentiment_agent=sentiment_agent)
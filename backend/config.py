@@ -6,10 +6,83 @@ class Settings(BaseSettings):
     reddit_client_id: Optional[str] = None
     reddit_client_secret: Optional[str] = None
     reddit_user_agent: str = "ProductLaunchBot/1.0"
+    reddit_requests_per_minute: float = 100
+    reddit_burst: float = 10
+    reddit_max_concurrency: int = 16
     
     ollama_base_url: str = "http://localhost:11434"
     llm_model: str = "llama3.2"
     
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    host_latency_window: int = 100
+    host_min_samples: int = 10
+    host_timeout_multiplier: float = 3.0
+    host_min_timeout: float = 1.0
+    host_max_timeout: float = 10.0
+    circuit_failure_threshold: int = 5
+    circuit_cooldown: float = 30
+    search_hedging: bool = True
+    hedge_max_ratio: float = 0.1
+    warmup_enabled: bool = True
+    
+    research_pipelined: bool = True
+    research_max_concurrency: int = 6
+    research_per_competitor_concurrency: int = 2
+    
+    search_base_url: str = "https://api.duckduckgo.com/"
+    search_cache_maxsize: int = 1024
+    search_cache_ttl: float = 6 * 60 * 60
+    search_cache_error_ttl: float = 60
+    
+    scrape_cache_enabled: bool = True
+    scrape_cache_dir: str = ".cache/http"
+    scrape_cache_max_bytes: int = 64 * 1024 * 1024
+    scrape_max_bytes: int = 2 * 1024 * 1024
+    
+    report_cache_maxsize: int = 256
+    report_cache_fresh_ttl: float = 10 * 60
+    report_cache_stale_ttl: float = 60 * 60
+    
+    shared_cache_enabled: bool = True
+    shared_cache_path: str = ".cache/shared.sqlite3"
+    sqlite_busy_timeout: float = 5.0
+    metrics_publish_interval: float = 10
+    
+    sentiment_sample_limit: int = 50
+    sentiment_parallel: bool = True
+    sentiment_parallel_threshold: int = 2000
+    sentiment_chunk_size: int = 1000
+    sentiment_workers: int = 0
+    sentiment_cache_enabled: bool = True
+    sentiment_cache_maxsize: int = 100_000
+    sentiment_cache_path: str = ".cache/sentiment.sqlite3"
+    
+    snapshot_enabled: bool = True
+    snapshot_path: str = ".cache/snapshots.sqlite3"
+    snapshot_max_posts: int = 500
+    
+    corpus_enabled: bool = True
+    corpus_path: str = ".cache/corpus.sqlite3"
+    corpus_max_age: float = 6 * 60 * 60
+    
+    job_workers: int = 4
+    job_queue_size: int = 100
+    job_result_ttl: float = 60 * 60
+    
+    batch_concurrency: int = 8
+    batch_max_items: int = 1000
+    
+    state_max_messages: int = 200
+    
+    compression_minimum_size: int = 1024
+    gzip_level: int = 6
+    brotli_quality: int = 4
+    
+    host: str = "0.0.0.0"
+    port: int = 8000
+    web_workers: int = 0
+    
     app_name: str = "Product Launch Intelligence Platform"
     debug: bool = True
     
@@ -0,0 +1,252 @@
+import asyncio
+import os
+import threading
+import time
+import uuid
+import orjson
+from typing import Awaitable, Callable, Dict, FrozenSet, List, Optional
+from agents.report_cache import ReportCache, ReportKey
+from tools.shared_cache import open_database
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class Job:
+    COLUMNS = (
+        "id", "key", "product_name", "competitors", "status", "result",
+        "error", "created_at", "started_at", "finished_at", "owner"
+    )
+    
+    def __init__(self, key: ReportKey, product_name: str, competitors: str):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.product_name = product_name
+        self.competitors = competitors
+        self.status = "queued"
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.owner = os.getpid()
+    
+    def to_row(self) -> tuple:
+        return (
+            self.id, orjson.dumps(self.key).decode(), self.product_name, self.competitors, self.status,
+            orjson.dumps(self.result, option=orjson.OPT_SERIALIZE_NUMPY) if self.result is not None else None,
+            self.error, self.created_at, self.started_at, self.finished_at, self.owner
+        )
+    
+    @classmethod
+    def from_row(cls, row: tuple) -> "Job":
+        job = cls.__new__(cls)
+        for name, value in zip(cls.COLUMNS, row):
+            setattr(job, name, value)
+        job.key = tuple(orjson.loads(job.key))
+        job.result = orjson.loads(job.result) if job.result is not None else None
+        return job
+    
+    @property
+    def sections(self) -> Optional[FrozenSet[str]]:
+        # The requested sections are the key's last part, so they need no column of their own
+        return frozenset(self.key[2].split(",")) if self.key[2] else None
+    
+    def to_dict(self) -> Dict:
+        data = {
+            "job_id": self.id,
+            "status": self.status,
+            "product_name": self.product_name,
+            "competitors": self.competitors,
+            "fields": sorted(self.sections) if self.sections else None,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+        if self.status == "completed":
+            data["result"] = self.result
+        if self.status == "failed":
+            data["error"] = self.error
+        return data
+
+
+def process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class JobStore:
+    # Job state is kept in SQLite rather than in the worker that queued it, so
+    # any serving process can answer GET /jobs/{id} and dedupe submissions
+    def __init__(self, path: str = ":memory:"):
+        self.db = open_database(path)
+        self.lock = threading.Lock()
+        
+        with self.lock:
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, key TEXT, product_name TEXT, "
+                "competitors TEXT, status TEXT, result BLOB, error TEXT, created_at REAL, "
+                "started_at REAL, finished_at REAL, owner INTEGER)"
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS jobs_key ON jobs (key, status)")
+            self.db.commit()
+    
+    def claim(self, job: Job) -> Optional[Job]:
+        # Returns the queued or running job for the same key, or stores this one
+        key = orjson.dumps(job.key).decode()
+        with self.lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self.db.execute(
+                    f"SELECT {', '.join(Job.COLUMNS)} FROM jobs WHERE key = ? AND status IN ('queued', 'running')",
+                    (key,)
+                ).fetchall()
+                for row in rows:
+                    existing = Job.from_row(row)
+                    if process_alive(existing.owner):
+                        return existing
+                    # Its worker died before finishing it
+                    self.db.execute(
+                        "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                        ("Worker exited before the job finished", time.time(), existing.id)
+                    )
+                self.db.execute(f"INSERT INTO jobs VALUES ({', '.join('?' * len(Job.COLUMNS))})", job.to_row())
+            finally:
+                self.db.commit()
+        return None
+    
+    def save(self, job: Job):
+        with self.lock:
+            self.db.execute(f"INSERT OR REPLACE INTO jobs VALUES ({', '.join('?' * len(Job.COLUMNS))})", job.to_row())
+            self.db.commit()
+    
+    def delete(self, job_id: str):
+        with self.lock:
+            self.db.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+            self.db.commit()
+    
+    def get(self, job_id: str) -> Optional[Job]:
+        with self.lock:
+            row = self.db.execute(f"SELECT {', '.join(Job.COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job.from_row(row) if row is not None else None
+    
+    def purge(self, cutoff: float):
+        with self.lock:
+            self.db.execute("DELETE FROM jobs WHERE finished_at < ?", (cutoff,))
+            self.db.commit()
+    
+    def abandon(self, owner: int):
+        with self.lock:
+            self.db.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? "
+                "WHERE owner = ? AND status IN ('queued', 'running')",
+                ("Server shut down before the job finished", time.time(), owner)
+            )
+            self.db.commit()
+    
+    def count(self) -> int:
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+
+class JobManager:
+    def __init__(self, run: Callable[[str, str, Optional[FrozenSet[str]]], Awaitable[Dict]], workers: int = 4,
+                 queue_size: int = 100, result_ttl: float = 3600, store: Optional[JobStore] = None):
+        self.run = run
+        self.workers = workers
+        self.queue_size = queue_size
+        self.result_ttl = result_ttl
+        self.store = store or JobStore()
+        # Jobs this process queued and is responsible for running
+        self.active: Dict[ReportKey, Job] = {}
+        self.queue: Optional[asyncio.Queue] = None
+        self.tasks: List[asyncio.Task] = []
+    
+    async def start(self):
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self.tasks = [asyncio.ensure_future(self.worker()) for _ in range(self.workers)]
+        self.tasks.append(asyncio.ensure_future(self.sweep()))
+    
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        await asyncio.to_thread(self.store.abandon, os.getpid())
+    
+    async def submit(self, product_name: str, competitors: str = "",
+                     sections: Optional[FrozenSet[str]] = None) -> Job:
+        key = ReportCache.make_key(product_name, competitors, sections)
+        
+        # Identical queued or running jobs (same sections too) share one id,
+        # whichever worker holds them
+        existing = self.active.get(key)
+        if existing is not None:
+            return existing
+        
+        if self.queue.full():
+            raise JobQueueFull(f"Job queue is full ({self.queue_size} pending)")
+        
+        job = Job(key, product_name, competitors)
+        existing = await asyncio.to_thread(self.store.claim, job)
+        if existing is not None:
+            return existing
+        
+        if self.queue.full():
+            await asyncio.to_thread(self.store.delete, job.id)
+            raise JobQueueFull(f"Job queue is full ({self.queue_size} pending)")
+        
+        self.active[key] = job
+        self.queue.put_nowait(job)
+        return job
+    
+    async def get(self, job_id: str) -> Optional[Job]:
+        return await asyncio.to_thread(self.store.get, job_id)
+    
+    async def worker(self):
+        while True:
+            job = await self.queue.get()
+            job.status = "running"
+            job.started_at = time.time()
+            
+            try:
+                await asyncio.to_thread(self.store.save, job)
+                job.result = await self.run(job.product_name, job.competitors, job.sections)
+                job.status = "completed"
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                job.error = str(e)
+                job.status = "failed"
+            finally:
+                job.finished_at = time.time()
+                try:
+                    await asyncio.shield(asyncio.to_thread(self.store.save, job))
+                except Exception as e:
+                    print(f"Job store error: {e}")
+                if self.active.get(job.key) is job:
+                    del self.active[job.key]
+                self.queue.task_done()
+    
+    async def sweep(self):
+        while True:
+            await asyncio.sleep(min(self.result_ttl, 60))
+            try:
+                await asyncio.to_thread(self.store.purge, time.time() - self.result_ttl)
+            except Exception as e:
+                print(f"Job store error: {e}")
+    
+    def stats(self) -> Dict:
+        return {
+            "workers": self.workers,
+            "queued": self.queue.qsize() if self.queue else 0,
+            "queue_size": self.queue_size,
+            "active": len(self.active),
+            "retained": self.store.count()
+        }
@@ -0,0 +1,235 @@
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+import httpx
+from loadtest.latency import LatencyProfile, parse_slow_hosts
+
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+PRODUCTS = ["Slack", "Notion", "Zulip", "Mattermost", "Discord", "Coda", "Confluence", "Teams"]
+
+
+def percentile(ordered: List[float], p: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def summarize(samples: List[Dict], elapsed: float) -> Dict:
+    latencies = sorted(s["latency"] for s in samples)
+    errors = [s for s in samples if s["error"]]
+    return {
+        "requests": len(samples),
+        "errors": len(errors),
+        "error_kinds": dict(sorted(
+            {kind: sum(1 for s in errors if s["error"] == kind) for kind in {s["error"] for s in errors}}.items()
+        )),
+        "throughput_rps": len(samples) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": (latencies[-1] if latencies else 0.0) * 1000
+    }
+
+
+class LoadDriver:
+    def __init__(self, base_url: str, endpoints: List[str], concurrency: int, requests: int,
+                 duration: Optional[float], distinct_products: int, timeout: float, offset: int = 0):
+        self.base_url = base_url
+        self.endpoints = endpoints
+        self.concurrency = concurrency
+        self.requests = requests
+        self.duration = duration
+        self.distinct_products = distinct_products
+        self.timeout = timeout
+        self.offset = offset
+        self.counter = itertools.count()
+        self.samples: List[Dict] = []
+    
+    def build_request(self, i: int):
+        endpoint = self.endpoints[i % len(self.endpoints)]
+        # distinct_products == 0 makes every request a cold analysis
+        slot = i + self.offset if self.distinct_products == 0 else i % self.distinct_products
+        product = f"{PRODUCTS[slot % len(PRODUCTS)]} {slot}"
+        
+        if endpoint == "analyze":
+            competitor = PRODUCTS[(slot + 1) % len(PRODUCTS)]
+            return endpoint, "POST", "/analyze-product-launch", {
+                "json": {"product_name": product, "competitors": competitor}
+            }
+        return endpoint, "POST", "/quick-analysis", {"params": {"product_name": product}}
+    
+    async def worker(self, client: httpx.AsyncClient, deadline: Optional[float]):
+        while True:
+            i = next(self.counter)
+            if (deadline is None and i >= self.requests) or (deadline is not None and time.monotonic() >= deadline):
+                return
+            
+            endpoint, method, path, kwargs = self.build_request(i)
+            error = None
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+                if response.status_code >= 400:
+                    error = f"http_{response.status_code}"
+            except httpx.TimeoutException:
+                error = "timeout"
+            except httpx.HTTPError as e:
+                error = type(e).__name__
+            
+            self.samples.append({"endpoint": endpoint, "latency": time.perf_counter() - start, "error": error})
+    
+    async def run(self) -> Dict:
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        async with httpx.AsyncClient(base_url=self.base_url, limits=limits, timeout=self.timeout) as client:
+            await client.get("/_loadtest/loop-lag", params={"reset": True})
+            
+            deadline = time.monotonic() + self.duration if self.duration else None
+            start = time.perf_counter()
+            await asyncio.gather(*(self.worker(client, deadline) for _ in range(self.concurrency)))
+            elapsed = time.perf_counter() - start
+            
+            loop_lag = (await client.get("/_loadtest/loop-lag")).json()
+        
+        return {
+            "concurrency": self.concurrency,
+            "elapsed_s": elapsed,
+            "overall": summarize(self.samples, elapsed),
+            "endpoints": {
+                endpoint: summarize([s for s in self.samples if s["endpoint"] == endpoint], elapsed)
+                for endpoint in self.endpoints
+            },
+            "server_loop_lag": loop_lag
+        }
+
+
+def spawn(module: str, args: List[str], env: Dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, "-m", module, *args], cwd=BACKEND_DIR, env=env)
+
+
+def wait_until_ready(url: str, process: subprocess.Popen, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Process for {url} exited with code {process.returncode}")
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Timed out waiting for {url}")
+
+
+def server_env(args, upstream_url: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "SEARCH_BASE_URL": f"{upstream_url}/ddg/",
+        "REDDIT_REQUESTS_PER_MINUTE": str(args.reddit_rpm),
+        "REDDIT_BURST": str(max(args.reddit_rpm / 60, 1)),
+        "SCRAPE_CACHE_DIR": str(Path(args.work_dir) / "http"),
+        "SENTIMENT_CACHE_PATH": str(Path(args.work_dir) / "sentiment.sqlite3"),
+        "SHARED_CACHE_PATH": str(Path(args.work_dir) / "shared.sqlite3"),
+        "CORPUS_PATH": str(Path(args.work_dir) / "corpus.sqlite3"),
+        "SNAPSHOT_PATH": str(Path(args.work_dir) / "snapshots.sqlite3")
+    })
+    if args.cold:
+        env.update({
+            "SCRAPE_CACHE_ENABLED": "false",
+            "SENTIMENT_CACHE_ENABLED": "false",
+            "SHARED_CACHE_ENABLED": "false",
+            "CORPUS_ENABLED": "false",
+            "SNAPSHOT_ENABLED": "false",
+            "SEARCH_CACHE_TTL": "0",
+            "SEARCH_CACHE_ERROR_TTL": "0",
+            "REPORT_CACHE_FRESH_TTL": "0",
+            "REPORT_CACHE_STALE_TTL": "0"
+        })
+    return env
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="End-to-end load test against local fake upstreams")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50],
+                        help="One or more concurrency levels to run in sequence")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per concurrency level")
+    parser.add_argument("--duration", type=float, help="Run each level for this many seconds instead")
+    parser.add_argument("--endpoints", nargs="+", choices=["analyze", "quick"], default=["analyze", "quick"])
+    parser.add_argument("--distinct-products", type=int, default=0,
+                        help="Cycle through this many products (0 = every request unique)")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--latency", default="lognormal:80,0.5", help="Search/page latency distribution (ms)")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--slow-host", action="append", default=[], help="SITE=MS extra page latency")
+    parser.add_argument("--page-scale", type=int, default=1)
+    parser.add_argument("--reddit-latency", default="lognormal:150,0.5")
+    parser.add_argument("--reddit-error-rate", type=float, default=0.0)
+    parser.add_argument("--reddit-rpm", type=float, default=100000,
+                        help="Reddit token bucket rate; use 100 to reproduce the production quota")
+    parser.add_argument("--cold", action="store_true", help="Disable every cache on the server")
+    parser.add_argument("--upstream-port", type=int, default=8900)
+    parser.add_argument("--server-port", type=int, default=8800)
+    parser.add_argument("--work-dir", default="/tmp/product-launch-loadtest")
+    parser.add_argument("--output", help="Write JSON results to this file instead of stdout")
+    args = parser.parse_args(argv)
+    
+    upstream_url = f"http://127.0.0.1:{args.upstream_port}"
+    server_url = f"http://127.0.0.1:{args.server_port}"
+    
+    upstream_profile = LatencyProfile(args.latency, args.error_rate, parse_slow_hosts(args.slow_host))
+    reddit_profile = LatencyProfile(args.reddit_latency, args.reddit_error_rate)
+    
+    processes = []
+    try:
+        upstream = spawn("loadtest.upstream", [
+            "--port", str(args.upstream_port), "--page-scale", str(args.page_scale), *upstream_profile.to_args()
+        ], dict(os.environ))
+        processes.append(upstream)
+        wait_until_ready(f"{upstream_url}/_stats", upstream)
+        
+        server = spawn("loadtest.serve", [
+            "--port", str(args.server_port), *reddit_profile.to_args("reddit-")
+        ], server_env(args, upstream_url))
+        processes.append(server)
+        wait_until_ready(f"{server_url}/ready", server)
+        
+        runs = []
+        offset = 0
+        for concurrency in args.concurrency:
+            # Unique-product runs keep counting so later levels stay cold too
+            driver = LoadDriver(server_url, args.endpoints, concurrency, args.requests,
+                                args.duration, args.distinct_products, args.timeout, offset)
+            result = asyncio.run(driver.run())
+            offset += result["overall"]["requests"]
+            overall = result["overall"]
+            print(
+                f"c={concurrency:<4} {overall['throughput_rps']:8.1f} req/s  "
+                f"p50 {overall['p50_ms']:8.1f} ms  p95 {overall['p95_ms']:8.1f} ms  "
+                f"p99 {overall['p99_ms']:8.1f} ms  errors {overall['errors']}  "
+                f"loop lag p99 {result['server_loop_lag'].get('p99_ms', 0):.1f} ms",
+                file=sys.stderr
+            )
+            runs.append(result)
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            process.wait(timeout=10)
+    
+    output = json.dumps({"config": vars(args), "runs": runs}, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+import random
+from typing import Dict, List, Optional
+
+
+class LatencyProfile:
+    # Parses specs like "fixed:50", "uniform:20,200" or "lognormal:80,0.6" (milliseconds)
+    def __init__(self, spec: str = "fixed:0", error_rate: float = 0.0,
+                 slow_hosts: Optional[Dict[str, float]] = None, seed: Optional[int] = None):
+        self.spec = spec
+        self.error_rate = error_rate
+        self.slow_hosts = slow_hosts or {}
+        self.random = random.Random(seed)
+        
+        kind, _, raw = spec.partition(":")
+        self.kind = kind
+        self.params = [float(v) for v in raw.split(",") if v]
+        if kind not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+    
+    def sample(self, host: str = "") -> float:
+        if self.kind == "fixed":
+            ms = self.params[0] if self.params else 0.0
+        elif self.kind == "uniform":
+            ms = self.random.uniform(self.params[0], self.params[1])
+        else:
+            median, sigma = self.params[0], self.params[1] if len(self.params) > 1 else 0.5
+            ms = median * self.random.lognormvariate(0, sigma)
+        
+        return (ms + self.slow_hosts.get(host, 0.0)) / 1000
+    
+    def should_fail(self) -> bool:
+        return self.error_rate > 0 and self.random.random() < self.error_rate
+    
+    def to_args(self, prefix: str = "") -> List[str]:
+        args = [f"--{prefix}latency", self.spec, f"--{prefix}error-rate", str(self.error_rate)]
+        for host, ms in self.slow_hosts.items():
+            args += [f"--{prefix}slow-host", f"{host}={ms}"]
+        return args
+
+
+def parse_slow_hosts(values: List[str]) -> Dict[str, float]:
+    hosts = {}
+    for value in values or []:
+        host, _, ms = value.partition("=")
+        hosts[host] = float(ms)
+    return hosts
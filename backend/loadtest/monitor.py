@@ -0,0 +1,45 @@
+import asyncio
+import time
+from collections import deque
+from typing import Dict, Optional
+
+
+class LoopLagMonitor:
+    # Sleeps for a fixed interval and records how late the loop woke it up
+    def __init__(self, interval: float = 0.05, window: int = 20000):
+        self.interval = interval
+        self.samples: deque = deque(maxlen=window)
+        self.task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        self.task = asyncio.ensure_future(self.run())
+    
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+    
+    async def run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.perf_counter() - start - self.interval))
+    
+    def reset(self):
+        self.samples.clear()
+    
+    def stats(self) -> Dict:
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {"samples": 0}
+        
+        def percentile(p: float) -> float:
+            return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+        
+        return {
+            "samples": len(ordered),
+            "mean_ms": sum(ordered) / len(ordered) * 1000,
+            "p50_ms": percentile(0.50) * 1000,
+            "p95_ms": percentile(0.95) * 1000,
+            "p99_ms": percentile(0.99) * 1000,
+            "max_ms": ordered[-1] * 1000
+        }
@@ -0,0 +1,95 @@
+import argparse
+import time
+from contextlib import asynccontextmanager
+import uvicorn
+from benchmarks.stubs import Fixtures, FakeReddit, FakeSubreddit, FakeCommentForest
+from loadtest.latency import LatencyProfile, parse_slow_hosts
+from loadtest.monitor import LoopLagMonitor
+
+
+class LatentCommentForest(FakeCommentForest):
+    def __init__(self, bodies, profile: LatencyProfile):
+        super().__init__(bodies)
+        self.profile = profile
+    
+    def replace_more(self, limit: int = 0):
+        # PRAW calls run on worker threads, so blocking sleeps model them faithfully
+        time.sleep(self.profile.sample("reddit"))
+        if self.profile.should_fail():
+            raise RuntimeError("Injected Reddit comment failure")
+        return []
+
+
+class LatentSubreddit(FakeSubreddit):
+    def __init__(self, posts, profile: LatencyProfile):
+        super().__init__(posts)
+        self.profile = profile
+    
+    def search(self, query: str, limit: int = 10, sort: str = "relevance"):
+        time.sleep(self.profile.sample("reddit"))
+        if self.profile.should_fail():
+            raise RuntimeError("Injected Reddit search failure")
+        submissions = super().search(query, limit, sort)
+        for submission in submissions:
+            submission.comments = LatentCommentForest([c.body for c in submission.comments.comments], self.profile)
+        return submissions
+
+
+class LatentReddit(FakeReddit):
+    def __init__(self, posts, profile: LatencyProfile):
+        super().__init__(posts)
+        self.profile = profile
+    
+    def subreddit(self, name: str) -> LatentSubreddit:
+        return LatentSubreddit(self.posts, self.profile)
+    
+    def submission(self, id: str = "", url: str = ""):
+        submission = super().submission(id, url)
+        submission.comments = LatentCommentForest([c.body for c in submission.comments.comments], self.profile)
+        return submission
+
+
+def install(app, reddit_profile: LatencyProfile, monitor: LoopLagMonitor):
+    # Wraps the app lifespan: swap in the fake Reddit once the registry is
+    # built and sample event-loop lag for the whole run
+    from registry import registry
+    
+    inner = app.router.lifespan_context
+    
+    @asynccontextmanager
+    async def lifespan(app):
+        async with inner(app):
+            posts = Fixtures().posts
+            registry.reddit_scraper.use_factory(lambda: LatentReddit(posts, reddit_profile))
+            monitor.start()
+            yield
+            monitor.stop()
+    
+    app.router.lifespan_context = lifespan
+    
+    @app.get("/_loadtest/loop-lag")
+    async def loop_lag(reset: bool = False):
+        stats = monitor.stats()
+        if reset:
+            monitor.reset()
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API against fake upstreams for load testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--reddit-latency", default="fixed:0")
+    parser.add_argument("--reddit-error-rate", type=float, default=0.0)
+    parser.add_argument("--reddit-slow-host", action="append", default=[])
+    args = parser.parse_args()
+    
+    from main import app
+    
+    profile = LatencyProfile(args.reddit_latency, args.reddit_error_rate, parse_slow_hosts(args.reddit_slow_host))
+    install(app, profile, LoopLagMonitor())
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning", backlog=4096)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import argparse
+import asyncio
+from urllib.parse import urlsplit
+import uvicorn
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+from benchmarks.stubs import Fixtures
+from loadtest.latency import LatencyProfile, parse_slow_hosts
+
+
+def create_app(profile: LatencyProfile, page_scale: int = 1) -> FastAPI:
+    # Stands in for DuckDuckGo and competitor sites; every site is served under
+    # /site/<name>/ so slow-host rules can target one competitor
+    fixtures = Fixtures()
+    app = FastAPI()
+    app.state.requests = 0
+    
+    def rewrite(url: str, base: str) -> str:
+        if not url:
+            return url
+        parts = urlsplit(url)
+        site, _, path = parts.path.lstrip("/").partition("/")
+        return f"{base}/site/{site}/{path}"
+    
+    async def delay(host: str) -> bool:
+        app.state.requests += 1
+        await asyncio.sleep(profile.sample(host))
+        return profile.should_fail()
+    
+    @app.get("/ddg/")
+    async def search(request: Request, q: str = ""):
+        if await delay("ddg"):
+            return Response(status_code=503)
+        
+        base = str(request.base_url).rstrip("/")
+        data = dict(fixtures.search_response(q))
+        data["AbstractURL"] = rewrite(data.get("AbstractURL", ""), base)
+        data["RelatedTopics"] = [
+            {**topic, "FirstURL": rewrite(topic["FirstURL"], base)} if "FirstURL" in topic else topic
+            for topic in data.get("RelatedTopics", [])
+        ]
+        return JSONResponse(data)
+    
+    @app.get("/site/{site}/{path:path}")
+    async def page(site: str, path: str):
+        if await delay(site):
+            return Response(status_code=502)
+        return Response(
+            content=fixtures.page_for_url(f"https://pages.bench/{site}/{path}", page_scale),
+            media_type="text/html"
+        )
+    
+    @app.get("/_stats")
+    async def stats():
+        return {"requests": app.state.requests}
+    
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake search API and competitor sites with injected latency")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", default="fixed:0")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--slow-host", action="append", default=[], help="SITE=MS extra latency, repeatable")
+    parser.add_argument("--page-scale", type=int, default=1)
+    args = parser.parse_args()
+    
+    profile = LatencyProfile(args.latency, args.error_rate, parse_slow_hosts(args.slow_host))
+    uvicorn.run(create_app(profile, args.page_scale), host=args.host, port=args.port,
+                log_level="warning", backlog=4096)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,42 @@
-from fastapi import FastAPI
+import asyncio
+import sqlite3
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List
+import orjson
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse, StreamingResponse
+from typing import List, Optional
 from config import settings
-from tools.sentiment_analyzer import SentimentAnalyzer
-from tools.web_scraper import WebScraper
-from tools.search_tool import SearchTool
-from agents.competitive_research_agent import CompetitiveResearchAgent
 from agents.base_agent import AgentState
-from agents.sentiment_agent import SentimentAnalysisAgent
-from agents.strategy_agent import LaunchStrategyAgent
-from agents.orchestrator import AgentOrchestrator
+from registry import registry
+from jobs import JobQueueFull
+from compression import CompressionMiddleware
 from pydantic import BaseModel
 class AnalysisRequest(BaseModel):
     product_name: str
     competitors: str = ""
+    fields: Optional[List[str]] = None
 
 
+class BatchRequest(BaseModel):
+    items: List[AnalysisRequest]
+    fields: Optional[List[str]] = None
 
 
 
 
 
 
-app = FastAPI(title=settings.app_name)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await registry.start()
+    yield
+    await registry.stop()
+
+
+app = FastAPI(title=settings.app_name, lifespan=lifespan, default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -31,6 +45,16 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.compression_minimum_size,
+    gzip_level=settings.gzip_level,
+    brotli_quality=settings.brotli_quality
+)
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    return fields.split(",") if fields else None
 
 
 @app.get("/")
@@ -46,48 +70,47 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/ready")
+async def readiness_check():
+    if not registry.ready:
+        return JSONResponse(status_code=503, content={"status": "warming_up"})
+    return {"status": "ready"}
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
 
 @app.post("/test-sentiment")
 async def test_sentiment(texts: List[str]):
-    analyzer = SentimentAnalyzer()
-    results = analyzer.analyze_batch(texts)
-    overall = analyzer.get_overall_sentiment(texts)
+    batch = await registry.sentiment_tool.score_batch_async(texts)
     
     return {
-        "individual_results": results,
-        "overall_analysis": overall
+        "individual_results": batch.records(),
+        "overall_analysis": batch.summary()
     }
 @app.post("/test-scraper")
 async def test_scraper(url: str):
-    scraper = WebScraper()
-    result = scraper.extract_product_info(url)
+    result = await registry.scraper.extract_product_info(url)
     return result
 
 
 @app.post("/test-search")
 async def test_search(query: str):
-    searcher = SearchTool()
-    results = searcher.search(query)
+    results = await registry.search_tool.search(query)
     return {"query": query, "results": results}
 
 @app.post("/test-competitive-agent")
 async def test_competitive_agent(task: str):
     state = AgentState()
-    agent = CompetitiveResearchAgent()
-    
-    result_state = agent.execute(state, task)
+    result_state = await registry.competitive_agent.execute(state, task)
     
     return result_state.to_dict()
 
 @app.post("/test-sentiment-agent")
 async def test_sentiment_agent(task: str):
     state = AgentState()
-    agent = SentimentAnalysisAgent()
-    
-    result_state = agent.execute(state, task)
+    result_state = await registry.sentiment_agent.execute(state, task)
     
     return result_state.to_dict()
 
@@ -96,32 +119,48 @@ async def test_sentiment_agent(task: str):
 async def test_strategy_agent(task: str):
     state = AgentState()
     
-    competitive_agent = CompetitiveResearchAgent()
-    state = competitive_agent.execute(state, task)
+    state = await registry.competitive_agent.execute(state, task)
     
-    sentiment_agent = SentimentAnalysisAgent()
-    state = sentiment_agent.execute(state, task)
+    state = await registry.sentiment_agent.execute(state, task)
     
-    strategy_agent = LaunchStrategyAgent()
-    state = strategy_agent.execute(state, task)
+    state = await registry.strategy_agent.execute(state, task)
     
     return state.to_dict()
 
 @app.post("/analyze-product-launch")
 async def analyze_product_launch(request: AnalysisRequest):
-    orchestrator = AgentOrchestrator()
+    try:
+        report = await registry.analyze(request.product_name, request.competitors, request.fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    report = orchestrator.run_analysis(
-        product_name=request.product_name,
-        competitors=request.competitors
-    )
+    # Reports are plain JSON already, so skip jsonable_encoder
+    return ORJSONResponse(report)
+
+@app.get("/analyze-product-launch/stream")
+async def stream_product_launch(product_name: str, competitors: str = "", fields: Optional[str] = None):
+    try:
+        stream = registry.stream_analysis(product_name, competitors, parse_fields(fields))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    return report
+    async def events():
+        async for event, data in stream:
+            payload = orjson.dumps(data, default=str, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+            yield f"event: {event}\ndata: {payload}\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.post("/quick-analysis")
 async def quick_analysis(product_name: str):
-    orchestrator = AgentOrchestrator()
-    report = orchestrator.run_analysis(product_name)
+    report = await registry.analyze(
+        product_name,
+        sections=["executive_summary", "launch_strategy", "sentiment_analysis", "competitive_intelligence"]
+    )
     
     return {
         "product": product_name,
@@ -132,3 +171,67 @@ async def quick_analysis(product_name: str):
         "competitors_analyzed": report["competitive_intelligence"]["competitors_analyzed"]
     }
 
+
+@app.post("/batch-analysis")
+async def batch_analysis(request: BatchRequest):
+    if len(request.items) > settings.batch_max_items:
+        raise HTTPException(status_code=400, detail=f"At most {settings.batch_max_items} items per batch")
+    items = [(item.product_name, item.competitors, item.fields) for item in request.items]
+    try:
+        registry.batch.resolve(items, request.fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # One JSON object per line: the plan, each report as it completes, a summary
+    async def lines():
+        async for event in registry.batch.run(items, request.fields):
+            yield orjson.dumps(event, default=str, option=orjson.OPT_SERIALIZE_NUMPY) + b"\n"
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(request: AnalysisRequest):
+    try:
+        sections = registry.orchestrator.normalize_sections(request.fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        job = await registry.jobs.submit(request.product_name, request.competitors, sections)
+    except JobQueueFull as e:
+        return JSONResponse(status_code=503, content={"detail": str(e)}, headers={"Retry-After": "30"})
+    
+    return {**job.to_dict(), "status_url": f"/jobs/{job.id}"}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await registry.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job.to_dict()
+
+
+@app.get("/corpus/search")
+async def corpus_search(q: str, kind: Optional[str] = None, topic: Optional[str] = None, limit: int = 20):
+    if registry.corpus is None:
+        raise HTTPException(status_code=404, detail="Corpus store is disabled")
+    
+    try:
+        results = await asyncio.to_thread(registry.corpus.search, q, kind, topic, min(limit, 100))
+    except sqlite3.OperationalError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid search query: {e}")
+    
+    return {"query": q, "results": results}
+
+
+@app.get("/cache-stats")
+async def cache_stats():
+    return await asyncio.to_thread(registry.cache_stats)
+
+
+@app.get("/metrics")
+async def metrics():
+    text = await asyncio.to_thread(registry.render_all_metrics)
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4")
@@ -0,0 +1,190 @@
+import asyncio
+import os
+import httpx
+from typing import Any, AsyncIterator, Dict, FrozenSet, Iterable, List, Optional, Tuple
+from config import settings
+from tools.search_tool import AsyncSearchTool, get_search_cache
+from tools.web_scraper import AsyncWebScraper
+from tools.http_cache import get_response_cache
+from tools.reddit_scraper import AsyncRedditScraper, shutdown_reddit_executor
+from tools.sentiment_analyzer import SentimentAnalyzer, warm_process_pool, shutdown_process_pool
+from tools.sentiment_cache import get_sentiment_cache
+from tools.corpus_store import get_corpus_store
+from agents.competitive_research_agent import CompetitiveResearchAgent
+from agents.sentiment_agent import SentimentAnalysisAgent
+from agents.strategy_agent import LaunchStrategyAgent
+from agents.orchestrator import AgentOrchestrator
+from agents.report_cache import get_report_cache
+from agents.snapshot_store import get_snapshot_store
+from jobs import JobManager, JobStore
+from batch import BatchAnalyzer
+from tools.host_health import get_host_health
+from tools.shared_cache import get_shared_metrics
+from telemetry import collect_families, register_collector, render_metrics
+
+
+class AppRegistry:
+    # Process-wide tools and agents, built once by the FastAPI lifespan
+    def __init__(self):
+        self.ready = False
+        self.http_client: Optional[httpx.AsyncClient] = None
+        self.warmup_task: Optional[asyncio.Task] = None
+        self.metrics_task: Optional[asyncio.Task] = None
+        self.shared_metrics = get_shared_metrics()
+        self.worker_id = str(os.getpid())
+    
+    async def start(self):
+        self.http_client = httpx.AsyncClient(
+            timeout=settings.host_max_timeout,
+            limits=httpx.Limits(
+                max_connections=settings.http_max_connections,
+                max_keepalive_connections=settings.http_max_keepalive_connections
+            )
+        )
+        
+        self.search_tool = AsyncSearchTool(client=self.http_client, cache=get_search_cache())
+        self.corpus = get_corpus_store()
+        self.scraper = AsyncWebScraper(client=self.http_client, cache=get_response_cache(), corpus=self.corpus)
+        self.reddit_scraper = AsyncRedditScraper()
+        self.sentiment_tool = SentimentAnalyzer(cache=get_sentiment_cache())
+        
+        self.competitive_agent = CompetitiveResearchAgent(
+            search_tool=self.search_tool,
+            scraper=self.scraper,
+            corpus=self.corpus
+        )
+        self.sentiment_agent = SentimentAnalysisAgent(
+            sentiment_tool=self.sentiment_tool,
+            reddit_scraper=self.reddit_scraper,
+            corpus=self.corpus
+        )
+        self.strategy_agent = LaunchStrategyAgent()
+        self.orchestrator = AgentOrchestrator(
+            competitive_agent=self.competitive_agent,
+            sentiment_agent=self.sentiment_agent,
+            strategy_agent=self.strategy_agent,
+            snapshots=get_snapshot_store()
+        )
+        self.report_cache = get_report_cache()
+        
+        self.jobs = JobManager(
+            self.analyze,
+            workers=settings.job_workers,
+            queue_size=settings.job_queue_size,
+            result_ttl=settings.job_result_ttl,
+            store=JobStore(settings.shared_cache_path if settings.shared_cache_enabled else ":memory:")
+        )
+        await self.jobs.start()
+        self.batch = BatchAnalyzer(self)
+        register_collector(self.collect_metrics)
+        if self.shared_metrics is not None:
+            self.metrics_task = asyncio.ensure_future(self.publish_metrics())
+        
+        if settings.warmup_enabled:
+            self.warmup_task = asyncio.ensure_future(self.warm_up())
+        else:
+            self.ready = True
+    
+    def runner(self, product_name: str, competitors: str = "", sections: Optional[FrozenSet[str]] = None):
+        return lambda listener: self.orchestrator.run_analysis(
+            product_name=product_name,
+            competitors=competitors,
+            listener=listener,
+            sections=sections
+        )
+    
+    async def analyze(self, product_name: str, competitors: str = "",
+                      sections: Optional[Iterable[str]] = None) -> Dict:
+        sections = self.orchestrator.normalize_sections(sections)
+        return await self.report_cache.get_report(
+            product_name, competitors, self.runner(product_name, competitors, sections), sections
+        )
+    
+    def stream_analysis(self, product_name: str, competitors: str = "",
+                        sections: Optional[Iterable[str]] = None) -> AsyncIterator[Tuple[str, Any]]:
+        sections = self.orchestrator.normalize_sections(sections)
+        return self.report_cache.stream_report(
+            product_name, competitors, self.runner(product_name, competitors, sections), sections
+        )
+    
+    async def warm_up(self):
+        try:
+            # First VADER call builds its internal lookups; score one text now
+            self.sentiment_tool.analyze_text("Warm-up text for the sentiment analyzer")
+            
+            # Analyses score at most sentiment_sample_limit texts, so unless that can
+            # reach the pool threshold the pool stays lazy (only /test-sentiment
+            # batches could need it) instead of idling cpu_count processes
+            tool = self.sentiment_tool
+            if tool.parallel and settings.sentiment_sample_limit >= tool.parallel_threshold:
+                await asyncio.to_thread(warm_process_pool)
+        except Exception as e:
+            print(f"Warm-up error: {e}")
+        
+        self.ready = True
+    
+    def cache_stats(self) -> Dict:
+        response_cache = get_response_cache()
+        sentiment_cache = get_sentiment_cache()
+        snapshot_store = get_snapshot_store()
+        corpus = get_corpus_store()
+        return {
+            "http": response_cache.stats() if response_cache else None,
+            "search": get_search_cache().stats(),
+            "reports": get_report_cache().stats(),
+            "sentiment": sentiment_cache.stats() if sentiment_cache else None,
+            "snapshots": snapshot_store.stats() if snapshot_store else None,
+            "corpus": corpus.stats() if corpus else None,
+            "hosts": get_host_health().stats(),
+            "jobs": self.jobs.stats()
+        }
+    
+    def collect_metrics(self) -> List:
+        # Export every numeric cache/job stat as a gauge labelled by its cache
+        samples: Dict[str, List] = {}
+        for cache, stats in self.cache_stats().items():
+            for stat, value in (stats or {}).items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    samples.setdefault(f"cache_{stat}", []).append(({"cache": cache}, value))
+        
+        return [
+            (name, "gauge", f"Current {name[len('cache_'):].replace('_', ' ')} per cache", rows)
+            for name, rows in sorted(samples.items())
+        ]
+    
+    def publish_own_metrics(self):
+        self.shared_metrics.publish(self.worker_id, collect_families())
+    
+    async def publish_metrics(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.publish_own_metrics)
+            except Exception as e:
+                print(f"Metrics publish error: {e}")
+            await asyncio.sleep(settings.metrics_publish_interval)
+    
+    def render_all_metrics(self) -> str:
+        if self.shared_metrics is None:
+            return render_metrics()
+        # Publish first so this worker's own numbers are current
+        self.publish_own_metrics()
+        return render_metrics(self.shared_metrics.gather())
+    
+    async def stop(self):
+        self.ready = False
+        if self.warmup_task is not None:
+            self.warmup_task.cancel()
+        if self.metrics_task is not None:
+            self.metrics_task.cancel()
+            try:
+                await asyncio.to_thread(self.shared_metrics.remove, self.worker_id)
+            except Exception as e:
+                print(f"Metrics publish error: {e}")
+        await self.jobs.stop()
+        if self.http_client is not None:
+            await self.http_client.aclose()
+        shutdown_reddit_executor()
+        shutdown_process_pool()
+
+
+registry = AppRegistry()
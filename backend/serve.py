@@ -0,0 +1,30 @@
+import argparse
+import os
+import uvicorn
+from config import settings
+
+
+def worker_count() -> int:
+    return settings.web_workers or os.cpu_count() or 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the API with one worker process per core")
+    parser.add_argument("--host", default=settings.host)
+    parser.add_argument("--port", type=int, default=settings.port)
+    parser.add_argument("--workers", type=int, default=worker_count(), help="serving processes (default: CPU count)")
+    args = parser.parse_args()
+    
+    # Workers inherit the environment; split per-process budgets between them so
+    # N workers together stay within one process's share of cores and Reddit quota
+    if args.workers > 1:
+        if not settings.sentiment_workers:
+            os.environ["SENTIMENT_WORKERS"] = str(max((os.cpu_count() or 1) // args.workers, 1))
+        os.environ["REDDIT_REQUESTS_PER_MINUTE"] = str(settings.reddit_requests_per_minute / args.workers)
+        os.environ["REDDIT_BURST"] = str(max(settings.reddit_burst / args.workers, 1))
+    
+    uvicorn.run("main:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
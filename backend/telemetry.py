@@ -0,0 +1,192 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+Labels = Tuple[Tuple[str, str], ...]
+# (sample name, labels, value); histograms expand into _bucket/_sum/_count samples
+Sample = Tuple[str, Dict[str, str], float]
+# (metric name, type, help, samples)
+Family = Tuple[str, str, str, List[Sample]]
+
+
+def format_labels(labels: Labels) -> str:
+    items = list(labels)
+    if not items:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in items)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(items, escaped)) + "}"
+
+
+class Counter:
+    kind = "counter"
+    
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.values: Dict[Labels, float] = {}
+        self.lock = threading.Lock()
+    
+    def inc(self, amount: float = 1, **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+    
+    def samples(self) -> List[Sample]:
+        with self.lock:
+            return [(self.name, dict(labels), value) for labels, value in sorted(self.values.items())]
+
+
+class Histogram:
+    kind = "histogram"
+    
+    def __init__(self, name: str, help: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.series: Dict[Labels, List] = {}
+        self.lock = threading.Lock()
+    
+    def observe(self, value: float, **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                # [per-bucket counts..., +Inf count, sum]
+                series = self.series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+    
+    def samples(self) -> List[Sample]:
+        samples = []
+        with self.lock:
+            for labels, series in sorted(self.series.items()):
+                labels = dict(labels)
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    samples.append((f"{self.name}_bucket", {**labels, "le": repr(float(bound))}, cumulative))
+                cumulative += series[len(self.buckets)]
+                samples.append((f"{self.name}_bucket", {**labels, "le": "+Inf"}, cumulative))
+                samples.append((f"{self.name}_sum", labels, series[-1]))
+                samples.append((f"{self.name}_count", labels, cumulative))
+        return samples
+
+
+# A collector returns (name, type, help, [(labels, value), ...]) rows at scrape time
+Collector = Callable[[], List[Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]]]
+
+_metrics: List = []
+_collectors: List[Collector] = []
+
+
+def counter(name: str, help: str) -> Counter:
+    metric = Counter(name, help)
+    _metrics.append(metric)
+    return metric
+
+
+def histogram(name: str, help: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+    metric = Histogram(name, help, buckets)
+    _metrics.append(metric)
+    return metric
+
+
+def register_collector(collector: Collector):
+    if collector not in _collectors:
+        _collectors.append(collector)
+
+
+def collect_families() -> List[Family]:
+    families = [(metric.name, metric.kind, metric.help, metric.samples()) for metric in _metrics]
+    for collector in _collectors:
+        for name, kind, help, samples in collector():
+            families.append((name, kind, help, [(name, labels, value) for labels, value in samples]))
+    return families
+
+
+def render_metrics(workers: Optional[Dict[str, List[Family]]] = None) -> str:
+    # Counters and histograms are summed across serving processes; gauges describe
+    # one process's state, so with several workers they carry a worker label instead
+    if workers is None:
+        workers = {"": collect_families()}
+    
+    merged: Dict[str, Tuple[str, str, Dict]] = {}
+    for worker, families in workers.items():
+        for name, kind, help, samples in families:
+            _, _, series = merged.setdefault(name, (kind, help, {}))
+            for sample, labels, value in samples:
+                if kind == "gauge" and len(workers) > 1:
+                    labels = {**labels, "worker": worker}
+                key = (sample, tuple(sorted(labels.items())))
+                series[key] = series.get(key, 0) + value
+    
+    lines = []
+    for name, (kind, help, series) in merged.items():
+        lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} {kind}")
+        for (sample, labels), value in series.items():
+            lines.append(f"{sample}{format_labels(labels)} {value}")
+    
+    return "\n".join(lines) + "\n"
+
+
+STAGE_SECONDS = histogram("stage_duration_seconds", "Latency of pipeline stages and tool calls")
+STAGE_ERRORS = counter("stage_errors_total", "Failed pipeline stages and tool calls")
+BYTES_FETCHED = counter("http_bytes_fetched_total", "Response bytes fetched from upstreams")
+
+
+class Span:
+    def __init__(self, name: str, attributes: Dict):
+        self.name = name
+        self.attributes = attributes
+        self.children: List["Span"] = []
+        self.started_at = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.error: Optional[str] = None
+    
+    def fail(self, error: BaseException):
+        self.error = f"{type(error).__name__}: {error}"
+    
+    def to_dict(self) -> Dict:
+        data = {
+            "name": self.name,
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None
+        }
+        if self.attributes:
+            data["attributes"] = self.attributes
+        if self.error:
+            data["error"] = self.error
+        if self.children:
+            data["children"] = [child.to_dict() for child in self.children]
+        return data
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Span]:
+    # Tasks and to_thread calls copy the context, so concurrent children
+    # still attach to the span that was current when they were started
+    current = Span(name, attributes)
+    parent = _current_span.get()
+    if parent is not None:
+        parent.children.append(current)
+    
+    token = _current_span.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.fail(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.duration = time.perf_counter() - current.started_at
+        STAGE_SECONDS.observe(current.duration, stage=name)
+        if current.error:
+            STAGE_ERRORS.inc(stage=name)
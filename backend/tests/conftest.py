@@ -0,0 +1,9 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Tests build their own stores; nothing should read or write the on-disk caches
+for name in ("SHARED_CACHE_ENABLED", "SCRAPE_CACHE_ENABLED", "SENTIMENT_CACHE_ENABLED",
+             "SNAPSHOT_ENABLED", "CORPUS_ENABLED", "WARMUP_ENABLED"):
+    os.environ.setdefault(name, "false")
@@ -0,0 +1,74 @@
+import asyncio
+import pytest
+from tools.cache import SingleFlight, TTLCache
+
+
+def test_single_flight_shares_one_call_between_concurrent_callers():
+    calls = []
+    
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+    
+    async def scenario():
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.run("key", fetch) for _ in range(5)))
+        # Once the call has finished the key is free for a fresh one
+        await flight.run("key", fetch)
+        return flight, results
+    
+    flight, results = asyncio.run(scenario())
+    
+    assert results == ["value"] * 5
+    assert len(calls) == 2
+    assert flight.coalesced == 4
+    assert flight.in_flight == {}
+
+
+def test_single_flight_passes_errors_to_every_caller_and_forgets_the_key():
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+    
+    async def scenario():
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.run("key", fail) for _ in range(3)), return_exceptions=True)
+        return flight, results
+    
+    flight, results = asyncio.run(scenario())
+    
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flight.in_flight == {}
+
+
+def test_single_flight_caller_cancellation_leaves_the_call_running():
+    async def scenario():
+        flight = SingleFlight()
+        task = asyncio.ensure_future(flight.run("key", lambda: asyncio.sleep(0.02, result="done")))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return await flight.run("key", lambda: asyncio.sleep(0, result="second"))
+    
+    assert asyncio.run(scenario()) == "done"
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    cache.get("a")
+    cache.set("c", 3, ttl=60)
+    
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_cache_drops_expired_entries():
+    cache = TTLCache()
+    cache.set("gone", 1, ttl=-1)
+    assert cache.get("gone") is None
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,53 @@
+import asyncio
+import pytest
+from agents.base_agent import AgentState
+from agents.competitive_research_agent import CompetitiveResearchAgent
+from tools.corpus_store import CorpusStore
+
+URLS = ["https://acme.test/", "https://acme.test/pricing"]
+
+
+class FakeSearch:
+    async def search_competitor(self, company_name: str, product_name: str = ""):
+        return [{"url": url, "title": company_name} for url in URLS]
+
+
+class FakeScraper:
+    def __init__(self):
+        self.calls = []
+    
+    async def extract_product_info(self, url, known=None):
+        self.calls.append((url, known))
+        return known or {"url": url, "status": "success", "title": "live"}
+
+
+def run_agent(pipelined: bool, previous_pages=None):
+    corpus = CorpusStore()
+    for url in URLS:
+        corpus.add_page(url, "Acme", f"Acme indexed page at {url}")
+        corpus.attach_product_info(url, {"url": url, "status": "success", "title": "indexed"})
+    corpus.tag_pages("Acme", URLS)
+    
+    scraper = FakeScraper()
+    agent = CompetitiveResearchAgent(pipelined=pipelined, search_tool=FakeSearch(), scraper=scraper, corpus=corpus)
+    state = AgentState()
+    if previous_pages is not None:
+        state.previous["pages"] = previous_pages
+    asyncio.run(agent.execute(state, "Widget vs Acme"))
+    return state, scraper
+
+
+@pytest.mark.parametrize("pipelined", [True, False])
+def test_first_run_is_answered_from_the_corpus(pipelined):
+    state, scraper = run_agent(pipelined)
+    assert scraper.calls == []
+    assert {page["title"] for page in state.scraped_data} == {"indexed"}
+
+
+@pytest.mark.parametrize("pipelined", [True, False])
+def test_snapshot_pages_are_rechecked_instead_of_read_from_the_corpus(pipelined):
+    previous = {url: {"url": url, "status": "success", "title": "snapshot", "fingerprint": "f"} for url in URLS}
+    state, scraper = run_agent(pipelined, previous)
+    
+    assert scraper.calls == [(url, previous[url]) for url in URLS]
+    assert {page["title"] for page in state.scraped_data} == {"snapshot"}
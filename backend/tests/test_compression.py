@@ -0,0 +1,58 @@
+import gzip
+import brotli
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+from compression import CompressionMiddleware, parse_accept_encoding
+
+BODY = "competitor pricing " * 200
+
+
+def make_client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+    
+    @app.get("/report")
+    def report():
+        return PlainTextResponse(BODY)
+    
+    @app.get("/small")
+    def small():
+        return PlainTextResponse("ok")
+    
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter([b"event: a\n\n", b"event: b\n\n"]), media_type="text/event-stream")
+    
+    return TestClient(app)
+
+
+def raw(response) -> bytes:
+    return b"".join(response.iter_raw())
+
+
+@pytest.mark.parametrize("accept, encoding, decode", [
+    ("br, gzip", "br", brotli.decompress),
+    ("gzip, br;q=0", "gzip", gzip.decompress),
+])
+def test_large_responses_are_compressed(accept, encoding, decode):
+    with make_client().stream("GET", "/report", headers={"Accept-Encoding": accept}) as response:
+        body = raw(response)
+        assert response.headers["content-encoding"] == encoding
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert int(response.headers["content-length"]) == len(body)
+    assert decode(body).decode() == BODY
+
+
+def test_small_and_streaming_responses_pass_through():
+    client = make_client()
+    with client.stream("GET", "/small", headers={"Accept-Encoding": "br"}) as response:
+        assert "content-encoding" not in response.headers and raw(response) == b"ok"
+    with client.stream("GET", "/stream", headers={"Accept-Encoding": "br"}) as response:
+        assert "content-encoding" not in response.headers
+        assert raw(response) == b"event: a\n\nevent: b\n\n"
+
+
+def test_parse_accept_encoding_reads_quality_values():
+    assert parse_accept_encoding("gzip;q=0.5, br, identity;q=bad") == {"gzip": 0.5, "br": 1.0, "identity": 0.0}
@@ -0,0 +1,56 @@
+from tools.corpus_store import CorpusStore
+
+BODY = "Acme Widgets pricing starts at $10 per month with every feature included."
+
+
+def test_identical_pages_at_different_urls_keep_their_own_rows():
+    corpus = CorpusStore()
+    corpus.add_page("https://a.example/pricing", "Acme", BODY)
+    corpus.add_page("https://b.example/pricing", "Acme", BODY)
+    corpus.attach_product_info("https://a.example/pricing", {"url": "https://a.example/pricing"})
+    corpus.attach_product_info("https://b.example/pricing", {"url": "https://b.example/pricing"})
+    corpus.tag_pages("Acme", ["https://a.example/pricing", "https://b.example/pricing"])
+    
+    urls = {page["url"] for page in corpus.pages_for("acme", max_age=60)}
+    assert urls == {"https://a.example/pricing", "https://b.example/pricing"}
+
+
+def test_changed_page_replaces_the_previous_version():
+    corpus = CorpusStore()
+    corpus.add_page("https://a.example/", "Acme", BODY)
+    corpus.add_page("https://a.example/", "Acme", BODY + " Now with more.")
+    assert corpus.stats()["pages"] == 1
+
+
+def test_pages_for_is_capped():
+    corpus = CorpusStore()
+    urls = [f"https://a.example/{i}" for i in range(5)]
+    for url in urls:
+        corpus.add_page(url, "Acme", f"{BODY} {url}")
+        corpus.attach_product_info(url, {"url": url})
+    corpus.tag_pages("Acme", urls)
+    
+    assert len(corpus.pages_for("Acme", max_age=60)) == 2
+    assert len(corpus.pages_for("Acme", max_age=60, limit=3)) == 3
+
+
+def test_posts_dedupe_across_threads_and_search_finds_them():
+    corpus = CorpusStore()
+    post = {"id": "p1", "title": "Acme review", "text": "Loving the new dashboard", "comments": ["Same here"]}
+    corpus.add_posts("acme", [post])
+    corpus.add_posts("acme", [post])
+    
+    assert corpus.stats()["posts"] == 1
+    assert corpus.posts_for("Acme", max_age=60)[0]["comments"] == ["Same here"]
+    assert corpus.search("dashboard")[0]["source"] == "p1"
+
+
+def test_identical_comments_under_two_posts_stay_with_both():
+    corpus = CorpusStore()
+    corpus.add_posts("acme", [
+        {"id": "p1", "title": "Acme launch", "text": "The launch looks great", "comments": ["Same here", "+1"]},
+        {"id": "p2", "title": "Acme pricing", "text": "Pricing seems fair to me", "comments": ["+1"]}
+    ])
+    
+    comments = {post["id"]: post["comments"] for post in corpus.posts_for("acme", max_age=60)}
+    assert comments == {"p1": ["Same here", "+1"], "p2": ["+1"]}
@@ -0,0 +1,58 @@
+import pytest
+from agents.competitive_research_agent import CompetitiveResearchAgent
+from tools.extraction import ProductInfoExtractor
+from tools.search_tool import AsyncSearchTool
+from tools.web_scraper import AsyncWebScraper
+
+
+def prices(text: str):
+    return ProductInfoExtractor().extract(text)["prices"]
+
+
+@pytest.mark.parametrize("text, currency, amount, period, billing", [
+    ("$29 per month", "USD", 29.0, "month", None),
+    ("$1,299.00 per year", "USD", 1299.0, "year", None),
+    ("€9,99 per month", "EUR", 9.99, "month", None),
+    ("€1.299,00 / year", "EUR", 1299.0, "year", None),
+    ("EUR 19,50 monthly", "EUR", 19.5, "month", "month"),
+    ("£5 a month", "GBP", 5.0, "month", None),
+    ("$12/mo billed annually", "USD", 12.0, "month", "year"),
+    ("$99 billed annually", "USD", 99.0, "year", "year"),
+    ("$10 per user per month", "USD", 10.0, "month", None),
+    ("$10,000", "USD", 10000.0, None, None),
+])
+def test_parses_price_formats(text, currency, amount, period, billing):
+    [price] = prices(text)
+    assert (price["currency"], price["amount"], price["period"], price["billing"]) == (currency, amount, period, billing)
+
+
+def test_separate_prices_in_a_list_are_not_merged():
+    assert [p["amount"] for p in prices("Plans: $10, $20 and $30 per month")] == [10.0, 20.0, 30.0]
+
+
+def test_collects_pricing_and_feature_lines():
+    text = "\n".join([
+        "Pricing",
+        "Our pricing is simple and transparent for every team size.",
+        "Every plan includes unlimited projects and integrations with your tools."
+    ])
+    result = ProductInfoExtractor().extract(text)
+    
+    # The bare heading is too short to say anything on its own
+    assert result["pricing_mentions"] == [
+        "Our pricing is simple and transparent for every team size.",
+        "Every plan includes unlimited projects and integrations with your tools."
+    ]
+    assert result["feature_mentions"] == ["Every plan includes unlimited projects and integrations with your tools."]
+
+
+def test_monthly_price_range_is_reported_per_currency():
+    agent = CompetitiveResearchAgent(search_tool=AsyncSearchTool(), scraper=AsyncWebScraper())
+    scraped = [
+        {"prices": prices("$10 per month and $30 per month")},
+        {"prices": prices("€9,99 per month, or €99 per year")},
+    ]
+    findings = agent.extract_key_findings(scraped)
+    
+    assert "Monthly EUR price points range from 9.99 to 9.99" in findings
+    assert "Monthly USD price points range from 10 to 30" in findings
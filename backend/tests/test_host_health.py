@@ -0,0 +1,170 @@
+import asyncio
+import time
+import httpx
+import pytest
+from tools.host_health import CircuitOpen, HostHealth
+
+URL = "http://api.test/search"
+
+
+def refused(timeout):
+    async def fetch(timeout):
+        raise httpx.ConnectError("refused")
+    return fetch(timeout)
+
+
+async def ok(timeout):
+    return "ok"
+
+
+def status_error(status: int):
+    async def fetch(timeout):
+        request = httpx.Request("GET", URL)
+        raise httpx.HTTPStatusError("error", request=request, response=httpx.Response(status, request=request))
+    return fetch
+
+
+def test_breaker_opens_after_repeated_failures_and_probes_once_after_cooldown():
+    health = HostHealth(failure_threshold=3, cooldown=0.05)
+    
+    async def scenario():
+        for _ in range(3):
+            with pytest.raises(httpx.ConnectError):
+                await health.call(URL, refused)
+        
+        attempts = []
+        
+        async def counted(timeout):
+            attempts.append(1)
+            return "ok"
+        
+        with pytest.raises(CircuitOpen):
+            await health.call(URL, counted)
+        assert attempts == []
+        
+        await asyncio.sleep(0.06)
+        # Half-open: the probe goes through while a second caller is still rejected
+        probe = asyncio.ensure_future(health.call(URL, lambda timeout: asyncio.sleep(0.01, result="ok")))
+        await asyncio.sleep(0)
+        with pytest.raises(CircuitOpen):
+            await health.call(URL, counted)
+        assert await probe == "ok"
+        
+        assert await health.call(URL, counted) == "ok"
+    
+    asyncio.run(scenario())
+    assert health.stats()["opened"] == 1
+    assert health.stats()["open_circuits"] == 0
+
+
+def test_failed_probe_reopens_the_circuit():
+    health = HostHealth(failure_threshold=1, cooldown=0.05)
+    
+    async def scenario():
+        with pytest.raises(httpx.ConnectError):
+            await health.call(URL, refused)
+        await asyncio.sleep(0.06)
+        with pytest.raises(httpx.ConnectError):
+            await health.call(URL, refused)
+        with pytest.raises(CircuitOpen):
+            await health.call(URL, ok)
+    
+    asyncio.run(scenario())
+
+
+def test_client_errors_do_not_count_against_the_host():
+    health = HostHealth(failure_threshold=2)
+    
+    async def scenario():
+        for _ in range(3):
+            with pytest.raises(httpx.HTTPStatusError):
+                await health.call(URL, status_error(404))
+        return await health.call(URL, ok)
+    
+    assert asyncio.run(scenario()) == "ok"
+    assert health.stats()["failures"] == 0
+
+
+def test_timeout_adapts_to_the_hosts_latency():
+    health = HostHealth(min_samples=5, timeout_multiplier=3.0, min_timeout=0.05, max_timeout=10.0)
+    host = health.host_of(URL)
+    assert health.timeout_for(host) == 10.0
+    
+    for _ in range(5):
+        health.record_success(host, 0.1)
+    assert health.timeout_for(host) == pytest.approx(0.3)
+    
+    async def hang(timeout):
+        await asyncio.sleep(1)
+    
+    async def scenario():
+        started = time.perf_counter()
+        with pytest.raises(httpx.TimeoutException):
+            await health.call(URL, hang)
+        return time.perf_counter() - started
+    
+    assert asyncio.run(scenario()) < 0.6
+    assert health.stats()["failures"] == 1
+
+
+def test_hedged_request_races_a_slow_first_attempt():
+    health = HostHealth(min_samples=5, hedge_ratio=0.5)
+    delays = [0.01] * 10 + [0.5, 0.01]
+    
+    async def fetch(timeout):
+        await asyncio.sleep(delays.pop(0))
+        return "ok"
+    
+    async def scenario():
+        for _ in range(10):
+            await health.call(URL, fetch)
+        started = time.perf_counter()
+        result = await health.hedged(URL, fetch)
+        return result, time.perf_counter() - started
+    
+    result, elapsed = asyncio.run(scenario())
+    
+    assert result == "ok"
+    assert elapsed < 0.2
+    assert (health.stats()["hedges"], health.stats()["hedge_wins"]) == (1, 1)
+
+
+def test_hedging_is_capped_and_skipped_without_history():
+    health = HostHealth(min_samples=5, hedge_ratio=0.0)
+    
+    async def scenario():
+        # No latency history yet: nothing to hedge against
+        assert await health.hedged(URL, ok) == "ok"
+        for _ in range(10):
+            await health.call(URL, ok)
+        return await health.hedged(URL, lambda timeout: asyncio.sleep(0.02, result="slow"))
+    
+    assert asyncio.run(scenario()) == "slow"
+    assert health.stats()["hedges"] == 0
+
+
+def test_hedges_stay_within_the_ratio_of_all_calls():
+    # Enough fast history that the unhedged slow attempts do not lift the p95
+    health = HostHealth(window=1000, min_samples=5, hedge_ratio=0.01)
+    
+    async def scenario():
+        for _ in range(200):
+            await health.call(URL, ok)
+        
+        # Every first attempt outlives the p95, so only the budget limits hedging
+        attempts = []
+        
+        async def slow_first(timeout):
+            attempts.append(1)
+            if len(attempts) % 2:
+                await asyncio.sleep(0.03)
+            return "ok"
+        
+        for _ in range(10):
+            attempts.clear()
+            await health.hedged(URL, slow_first)
+    
+    asyncio.run(scenario())
+    stats = health.stats()
+    assert stats["hedges"] == 2
+    assert stats["hedges"] <= 0.01 * stats["calls"]
@@ -0,0 +1,83 @@
+from tools.html_extract import PageParser, charset_of, sniff_charset
+
+PARAGRAPH = "This paragraph is comfortably longer than the sixty characters."
+
+
+def parse(markup: bytes, encoding=None, chunk_size=None) -> dict:
+    parser = PageParser(encoding=encoding)
+    chunk_size = chunk_size or len(markup) or 1
+    for i in range(0, len(markup), chunk_size):
+        parser.feed_bytes(markup[i:i + chunk_size])
+    parser.finish()
+    return parser.result()
+
+
+def test_captures_title_headings_paragraphs_and_links():
+    result = parse(
+        b"<html><head><title>Acme</title><meta name='description' content='Widgets'></head>"
+        b"<body><h1>Head</h1><p>" + PARAGRAPH.encode() + b"</p>"
+        b"<a href='https://example.com/a'>a</a><a href='/relative'>b</a></body></html>"
+    )
+    
+    assert result["title"] == "Acme"
+    assert result["description"] == "Widgets"
+    assert result["headings"] == ["Head"]
+    assert result["paragraphs"] == [PARAGRAPH]
+    assert result["links"] == ["https://example.com/a"]
+
+
+def test_skips_script_and_style_content():
+    result = parse(b"<p>Visible<script>var hidden = 1;</script><style>p{}</style> text</p>")
+    assert result["paragraphs"] == ["Visible text"]
+
+
+def test_self_closing_skipped_tags_do_not_hide_later_content():
+    for tag in (b"svg", b"script", b"template", b"noscript"):
+        result = parse(b'<' + tag + b' class="i"/><h1>Head</h1><p>' + PARAGRAPH.encode() + b"</p>")
+        assert result["headings"] == ["Head"], tag
+        assert result["paragraphs"] == [PARAGRAPH], tag
+
+
+def test_captured_tags_inside_skipped_content_are_ignored():
+    result = parse(
+        b"<html><head><svg><title>Menu icon</title></svg><title>Acme</title></head><body>"
+        b"<h1>Pricing <svg><title>arrow</title></svg>plans</h1>"
+        b"<noscript><h1>Enable JavaScript</h1><a href='https://example.com/js'>help</a></noscript>"
+        b"<p>" + PARAGRAPH.encode() + b"</p></body></html>"
+    )
+    
+    assert result["title"] == "Acme"
+    assert result["headings"] == ["Pricing plans"]
+    assert result["paragraphs"] == [PARAGRAPH]
+    assert result["links"] == []
+
+
+def test_unclosed_paragraphs_end_at_the_next_one():
+    result = parse(b"<p>First<p>Second")
+    assert result["paragraphs"] == ["First", "Second"]
+
+
+def test_header_charset_wins():
+    assert charset_of("text/html; charset=ISO-8859-1") == "ISO-8859-1"
+    assert charset_of("text/html; charset=bogus") is None
+    assert charset_of("text/html") is None
+    
+    result = parse("<title>Café</title>".encode("latin-1"), encoding="latin-1")
+    assert result["title"] == "Café"
+
+
+def test_meta_charset_is_honoured_without_a_header():
+    markup = '<meta charset="windows-1252"><title>Café – Preise</title>'.encode("windows-1252")
+    assert parse(markup)["title"] == "Café – Preise"
+    
+    # The declaration may arrive split across chunks before the first kilobyte is buffered
+    padded = b"<!-- " + b"x" * 900 + b' --><meta http-equiv="Content-Type" content="text/html; charset=iso-8859-1">'
+    padded += "<title>Übersicht</title>".encode("latin-1") + b"<p>" + b"y" * 2000 + b"</p>"
+    assert parse(padded, chunk_size=100)["title"] == "Übersicht"
+
+
+def test_sniff_charset_defaults_and_boms():
+    assert sniff_charset(b"<html><title>x</title>") == "utf-8"
+    assert sniff_charset(b"\xef\xbb\xbf<html>") == "utf-8-sig"
+    assert sniff_charset(b'<meta charset="utf-16">') == "utf-8"
+    assert sniff_charset(b'<meta charset="nonsense">') == "utf-8"
@@ -0,0 +1,30 @@
+import asyncio
+from jobs import JobManager
+
+
+def test_jobs_pass_sections_through_and_dedupe_on_them():
+    calls = []
+    
+    async def run(product_name, competitors, sections):
+        calls.append((product_name, sections))
+        return {"product_name": product_name}
+    
+    async def scenario():
+        manager = JobManager(run, workers=1)
+        await manager.start()
+        try:
+            full = await manager.submit("Widget", "Acme")
+            summary = await manager.submit("Widget", "Acme", frozenset({"executive_summary"}))
+            again = await manager.submit("widget", "acme", frozenset({"executive_summary"}))
+            await manager.queue.join()
+            return full, summary, again, await manager.get(summary.id)
+        finally:
+            await manager.stop()
+    
+    full, summary, again, stored = asyncio.run(scenario())
+    
+    assert full.id != summary.id
+    assert again.id == summary.id
+    assert calls == [("Widget", None), ("Widget", frozenset({"executive_summary"}))]
+    assert stored.status == "completed"
+    assert stored.to_dict()["fields"] == ["executive_summary"]
@@ -0,0 +1,51 @@
+import asyncio
+import time
+from tools.rate_limit import TokenBucket
+
+
+def test_burst_is_immediate_then_paced_by_the_rate():
+    async def scenario():
+        bucket = TokenBucket(rate=20, capacity=3)
+        started = time.perf_counter()
+        for _ in range(3):
+            await bucket.acquire()
+        burst = time.perf_counter() - started
+        for _ in range(2):
+            await bucket.acquire()
+        return burst, time.perf_counter() - started
+    
+    burst, total = asyncio.run(scenario())
+    
+    assert burst < 0.02
+    # Two more tokens at 20/s take about 0.1s
+    assert 0.08 < total < 0.3
+
+
+def test_waiters_are_served_in_arrival_order():
+    order = []
+    
+    async def take(bucket, name):
+        await bucket.acquire()
+        order.append(name)
+    
+    async def scenario():
+        bucket = TokenBucket(rate=50, capacity=1)
+        await bucket.acquire()
+        tasks = []
+        for name in range(5):
+            tasks.append(asyncio.ensure_future(take(bucket, name)))
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+    
+    asyncio.run(scenario())
+    assert order == [0, 1, 2, 3, 4]
+
+
+def test_tokens_never_exceed_capacity():
+    async def scenario():
+        bucket = TokenBucket(rate=1000, capacity=2)
+        await asyncio.sleep(0.02)
+        bucket.refill()
+        return bucket.tokens
+    
+    assert asyncio.run(scenario()) == 2
@@ -0,0 +1,38 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.stubs import FakeReddit, Fixtures
+from tools.rate_limit import TokenBucket
+from tools.reddit_scraper import AsyncRedditScraper
+
+
+def test_each_executor_thread_uses_its_own_client():
+    posts = Fixtures().posts
+    clients = []
+    
+    class RecordingReddit(FakeReddit):
+        def __init__(self):
+            super().__init__(posts)
+            self.thread = threading.get_ident()
+            clients.append(self)
+        
+        def submission(self, id: str = "", url: str = ""):
+            assert threading.get_ident() == self.thread
+            return super().submission(id, url)
+    
+    executor = ThreadPoolExecutor(max_workers=4)
+    scraper = AsyncRedditScraper(
+        limiter=TokenBucket(rate=1e9, capacity=1e9), executor=executor, factory=RecordingReddit
+    )
+    try:
+        collected = asyncio.run(scraper.collect("widget", post_limit=5, comment_limit=3))
+    finally:
+        executor.shutdown()
+    
+    expected = {post["id"]: post["comments"][:3] for post in posts}
+    assert len(collected) == min(5, len(posts))
+    assert all(post["comments"] == expected[post["id"]] for post in collected)
+    # One client on the loop thread to check configuration, then at most one per pool thread
+    threads = [client.thread for client in clients[1:]]
+    assert len(threads) == len(set(threads)) <= 4
+    assert clients[0].thread not in threads
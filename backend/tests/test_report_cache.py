@@ -0,0 +1,127 @@
+import asyncio
+import time
+from agents.report_cache import EventChannel, ReportCache
+
+
+def runner(calls, report, delay=0.01):
+    async def run(listener):
+        calls.append(1)
+        listener("stage", {"agent": "competitive"})
+        await asyncio.sleep(delay)
+        return report
+    return run
+
+
+def test_concurrent_misses_share_one_run():
+    calls = []
+    
+    async def scenario():
+        cache = ReportCache(fresh_ttl=60, stale_ttl=120)
+        run = runner(calls, {"product_name": "Widget"})
+        reports = await asyncio.gather(*(cache.get_report("Widget", "", run) for _ in range(3)))
+        return cache, reports
+    
+    cache, reports = asyncio.run(scenario())
+    
+    assert len(calls) == 1
+    assert reports == [{"product_name": "Widget"}] * 3
+    assert cache.stats()["misses"] == 3 and cache.stats()["in_flight"] == 0
+
+
+def test_stale_report_is_served_while_one_refresh_runs():
+    calls = []
+    
+    async def scenario():
+        cache = ReportCache(fresh_ttl=60, stale_ttl=120)
+        key = cache.make_key("Widget")
+        cache.cache.set(key, ({"version": 1}, time.time() - 90), 120)
+        run = runner(calls, {"version": 2})
+        
+        stale = await asyncio.gather(*(cache.get_report("Widget", "", run) for _ in range(3)))
+        await cache.in_flight[key]
+        return cache, stale, await cache.get_report("Widget", "", run)
+    
+    cache, stale, fresh = asyncio.run(scenario())
+    
+    assert stale == [{"version": 1}] * 3
+    assert fresh == {"version": 2}
+    assert len(calls) == 1
+    stats = cache.stats()
+    assert (stats["stale_hits"], stats["refreshes"], stats["fresh_hits"]) == (3, 1, 1)
+
+
+def test_failed_refresh_keeps_serving_the_stale_report():
+    async def fail(listener):
+        raise RuntimeError("search down")
+    
+    async def scenario():
+        cache = ReportCache(fresh_ttl=60, stale_ttl=120)
+        key = cache.make_key("Widget")
+        cache.cache.set(key, ({"version": 1}, time.time() - 90), 120)
+        first = await cache.get_report("Widget", "", fail)
+        await asyncio.gather(cache.in_flight[key], return_exceptions=True)
+        # The entry is still stale, so the next request tries again
+        second = await cache.get_report("Widget", "", fail)
+        await asyncio.gather(cache.in_flight[key], return_exceptions=True)
+        await asyncio.sleep(0)
+        return cache, first, second
+    
+    cache, first, second = asyncio.run(scenario())
+    
+    assert first == second == {"version": 1}
+    assert (cache.stats()["refreshes"], cache.stats()["run_errors"]) == (2, 2)
+
+
+def test_fresh_full_report_answers_a_projection():
+    async def scenario():
+        cache = ReportCache(fresh_ttl=60, stale_ttl=120)
+        full = {"product_name": "Widget", "analysis_timestamp": "now", "executive_summary": "ok", "launch_strategy": {}}
+        cache.cache.set(cache.make_key("Widget"), (full, time.time()), 120)
+        return cache, await cache.get_report("Widget", "", runner([], {}), frozenset({"executive_summary"}))
+    
+    cache, projected = asyncio.run(scenario())
+    
+    assert projected == {"product_name": "Widget", "analysis_timestamp": "now", "executive_summary": "ok"}
+    assert cache.stats()["projected_hits"] == 1
+
+
+def test_event_channel_replays_history_to_late_subscribers():
+    async def collect(channel):
+        return [event async for event in channel.subscribe()]
+    
+    async def scenario():
+        channel = EventChannel()
+        channel.publish("stage", 1)
+        early = asyncio.ensure_future(collect(channel))
+        await asyncio.sleep(0)
+        channel.publish("stage", 2)
+        late = asyncio.ensure_future(collect(channel))
+        await asyncio.sleep(0)
+        channel.publish("report", 3)
+        channel.close()
+        after_close = await collect(channel)
+        return await early, await late, after_close, channel
+    
+    early, late, after_close, channel = asyncio.run(scenario())
+    
+    expected = [("stage", 1), ("stage", 2), ("report", 3)]
+    assert early == late == after_close == expected
+    assert channel.queues == []
+
+
+def test_stream_report_follows_the_shared_run():
+    calls = []
+    
+    async def scenario():
+        cache = ReportCache(fresh_ttl=60, stale_ttl=120)
+        run = runner(calls, {"product_name": "Widget"})
+        
+        async def stream():
+            return [event async for event in cache.stream_report("Widget", "", run)]
+        
+        return await asyncio.gather(stream(), stream())
+    
+    first, second = asyncio.run(scenario())
+    
+    assert len(calls) == 1
+    assert first == second == [("stage", {"agent": "competitive"}), ("report", {"product_name": "Widget"})]
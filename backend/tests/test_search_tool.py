@@ -0,0 +1,33 @@
+import asyncio
+import time
+import httpx
+import pytest
+from config import settings
+from tools.cache import SingleFlight, TTLCache
+from tools.host_health import HostHealth
+from tools.search_tool import AsyncSearchTool
+
+FOUND = {"AbstractURL": "https://acme.test/", "Heading": "Acme", "AbstractText": "Widgets"}
+
+
+def cached_ttl(payload=None, status=200) -> float:
+    def handler(request):
+        return httpx.Response(status, json=payload or {})
+    
+    cache = TTLCache()
+    tool = AsyncSearchTool(
+        client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        cache=cache, single_flight=SingleFlight(), health=HostHealth()
+    )
+    asyncio.run(tool.search("acme"))
+    [(_, expires_at)] = cache.entries.values()
+    return expires_at - time.monotonic()
+
+
+def test_results_are_cached_for_the_full_ttl():
+    assert cached_ttl(FOUND) == pytest.approx(settings.search_cache_ttl, abs=1)
+
+
+@pytest.mark.parametrize("payload, status", [({"RelatedTopics": []}, 200), (None, 500)])
+def test_empty_results_and_errors_are_cached_briefly(payload, status):
+    assert cached_ttl(payload, status) == pytest.approx(settings.search_cache_error_ttl, abs=1)
@@ -0,0 +1,55 @@
+import asyncio
+from config import settings
+from agents.base_agent import AgentState
+from agents.sentiment_agent import SentimentAnalysisAgent
+from tools.sentiment_analyzer import SentimentAnalyzer
+
+
+class FakeReddit:
+    def __init__(self, posts):
+        self.posts = posts
+    
+    async def collect(self, query, post_limit=5, comment_limit=10, subreddit="all", since=None, seen=()):
+        return [
+            post for post in self.posts
+            if post["id"] not in seen and (since is None or post["created_utc"] > since)
+        ][:post_limit]
+
+
+def make_posts(count: int, comments: int):
+    return [
+        {
+            "id": f"p{i}",
+            "title": f"Widget thread {i}",
+            "text": "",
+            "created_utc": 1000.0 - i,
+            "comments": [f"I really like the widget, comment {j}" for j in range(comments)]
+        }
+        for i in range(count)
+    ]
+
+
+def run(agent, previous=None):
+    state = AgentState()
+    state.previous = previous or {}
+    asyncio.run(agent.execute(state, "widget"))
+    return state.snapshot["sentiment"]
+
+
+def test_posts_past_the_sample_limit_are_scored_by_the_next_run():
+    # 11 texts per post: four posts fit the limit of 50; the fifth, also the
+    # oldest, waits for the next run
+    posts = make_posts(5, comments=10)
+    agent = SentimentAnalysisAgent(sentiment_tool=SentimentAnalyzer(parallel=False), reddit_scraper=FakeReddit(posts))
+    assert settings.sentiment_sample_limit == 50
+    
+    first = run(agent)
+    assert set(first["posts"]) == {"p0", "p1", "p2", "p3"}
+    assert first["aggregates"]["count"] == 44
+    
+    second = run(agent, {"sentiment": first})
+    assert set(second["posts"]) == {f"p{i}" for i in range(5)}
+    assert second["aggregates"]["count"] == 55
+    
+    # Nothing new: the third run reuses the totals instead of rescoring
+    assert run(agent, {"sentiment": second})["aggregates"]["count"] == 55
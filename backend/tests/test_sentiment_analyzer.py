@@ -0,0 +1,24 @@
+import asyncio
+import threading
+import numpy as np
+import tools.sentiment_analyzer as sentiment_analyzer
+from tools.sentiment_analyzer import SentimentAnalyzer
+
+TEXTS = ["I love this product", "This is terrible and broken", "It arrived on Tuesday"]
+
+
+def test_async_scoring_matches_sync_and_runs_off_the_loop(monkeypatch):
+    analyzer = SentimentAnalyzer(parallel=False)
+    threads = []
+    score_with = sentiment_analyzer.score_with
+    
+    def recording(vader, texts):
+        threads.append(threading.get_ident())
+        return score_with(vader, texts)
+    
+    monkeypatch.setattr(sentiment_analyzer, "score_with", recording)
+    batch = asyncio.run(analyzer.score_batch_async(TEXTS))
+    
+    assert threads and threads[0] != threading.get_ident()
+    assert np.allclose(batch.compound, analyzer.score_batch(TEXTS).compound)
+    assert list(batch.labels) == ["positive", "negative", "neutral"]
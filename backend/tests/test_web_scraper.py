@@ -0,0 +1,62 @@
+import asyncio
+import httpx
+from tools.host_health import HostHealth
+from tools.http_cache import ResponseCache
+from tools.web_scraper import AsyncWebScraper, page_fingerprint
+
+URL = "http://shop.test/pricing"
+OLD = b"<html><title>Shop</title><p>Pricing starts at $10/month for teams of any size at all.</p></html>"
+NEW = b"<html><title>Shop</title><p>Pricing starts at $12/month for teams of any size at all.</p></html>"
+
+
+def make_scraper(tmp_path, responses):
+    requests = []
+    
+    def handler(request):
+        requests.append(request)
+        body, headers = responses[0]
+        return httpx.Response(200, headers={"content-type": "text/html", **headers}, content=body)
+    
+    cache = ResponseCache(str(tmp_path / "http"), 1 << 20)
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return AsyncWebScraper(client=client, cache=cache, health=HostHealth()), cache, requests
+
+
+def test_unchanged_body_renews_the_stale_cache_entry(tmp_path):
+    responses = [(OLD, {"etag": '"v1"', "cache-control": "max-age=0"})]
+    scraper, cache, requests = make_scraper(tmp_path, responses)
+    
+    async def scenario():
+        known = await scraper.extract_product_info(URL)
+        responses[0] = (OLD, {"etag": '"v2"', "cache-control": "max-age=60"})
+        again = await scraper.extract_product_info(URL, known)
+        cached = await scraper.extract_product_info(URL, known)
+        return known, again, cached
+    
+    known, again, cached = asyncio.run(scenario())
+    
+    assert again is known
+    assert cached["title"] == "Shop"
+    assert len(requests) == 2
+    entry = cache.get(URL)
+    assert cache.is_fresh(entry) and entry["etag"] == '"v2"'
+    assert cache.stats()["not_modified"] == 0
+
+
+def test_unchanged_body_replaces_an_older_cached_copy(tmp_path):
+    responses = [(OLD, {"etag": '"v1"', "cache-control": "max-age=0"})]
+    scraper, cache, requests = make_scraper(tmp_path, responses)
+    
+    async def scenario():
+        await scraper.extract_product_info(URL)
+        responses[0] = (NEW, {"etag": '"v2"', "cache-control": "max-age=60"})
+        # The caller already saw the new body, e.g. through another worker
+        known = {"url": URL, "fingerprint": page_fingerprint(NEW)}
+        return known, await scraper.extract_product_info(URL, known)
+    
+    known, result = asyncio.run(scenario())
+    
+    assert result is known
+    entry = cache.get(URL)
+    assert entry["page"]["fingerprint"] == page_fingerprint(NEW)
+    assert cache.is_fresh(entry)
@@ -0,0 +1,117 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+from tools.shared_cache import SharedCache
+
+
+class TTLCache:
+    def __init__(self, maxsize: int = 1024, shared: Optional[SharedCache] = None):
+        self.maxsize = maxsize
+        self.shared = shared
+        self.entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.counters = {"hits": 0, "shared_hits": 0, "misses": 0, "evictions": 0}
+    
+    def local(self, key: Hashable) -> Any:
+        item = self.entries.get(key)
+        if item is None:
+            return None
+        if item[1] <= time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return item[0]
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self.local(key)
+        if value is not None:
+            self.counters["hits"] += 1
+            return value
+        # Another worker process may already have stored it
+        return self.adopt(key, self.shared.get(key) if self.shared is not None else None, default)
+    
+    async def get_async(self, key: Hashable, default: Any = None) -> Any:
+        # Same as get(), with the shared-tier read kept off the event loop
+        value = self.local(key)
+        if value is not None:
+            self.counters["hits"] += 1
+            return value
+        found = await asyncio.to_thread(self.shared.get, key) if self.shared is not None else None
+        return self.adopt(key, found, default)
+    
+    async def reload(self, key: Hashable) -> Any:
+        # Re-reads the shared tier, which may hold a newer copy than this process
+        if self.shared is None:
+            return None
+        found = await asyncio.to_thread(self.shared.get, key)
+        if found is None:
+            return None
+        return self.adopt(key, found, None)
+    
+    def adopt(self, key: Hashable, found: Optional[tuple], default: Any) -> Any:
+        if found is None:
+            self.counters["misses"] += 1
+            return default
+        
+        value, expires_at = found
+        self.remember(key, value, time.monotonic() + expires_at - time.time())
+        self.counters["shared_hits"] += 1
+        return value
+    
+    def set(self, key: Hashable, value: Any, ttl: float):
+        self.remember(key, value, time.monotonic() + ttl)
+        if self.shared is not None:
+            self.shared.set(key, value, ttl)
+    
+    async def set_async(self, key: Hashable, value: Any, ttl: float):
+        self.remember(key, value, time.monotonic() + ttl)
+        if self.shared is not None:
+            await asyncio.to_thread(self.shared.set, key, value, ttl)
+    
+    def remember(self, key: Hashable, value: Any, expires_at: float):
+        self.entries[key] = (value, expires_at)
+        self.entries.move_to_end(key)
+        
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.counters["evictions"] += 1
+    
+    def pop(self, key: Hashable):
+        self.entries.pop(key, None)
+        if self.shared is not None:
+            self.shared.delete(key)
+    
+    def clear(self):
+        self.entries.clear()
+    
+    def stats(self) -> Dict:
+        lookups = self.counters["hits"] + self.counters["shared_hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "entries": len(self.entries),
+            "maxsize": self.maxsize,
+            "shared": self.shared.stats() if self.shared is not None else None,
+            "hit_rate": (self.counters["hits"] + self.counters["shared_hits"]) / lookups if lookups else 0.0
+        }
+
+
+class SingleFlight:
+    # Concurrent calls with the same key share one in-flight coroutine
+    def __init__(self):
+        self.in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.coalesced = 0
+    
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        future = self.in_flight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+        
+        future = asyncio.ensure_future(func())
+        self.in_flight[key] = future
+        future.add_done_callback(lambda _: self.forget(key, future))
+        return await asyncio.shield(future)
+    
+    def forget(self, key: Hashable, future: asyncio.Future):
+        if self.in_flight.get(key) is future:
+            del self.in_flight[key]
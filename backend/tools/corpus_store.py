@@ -0,0 +1,201 @@
+import hashlib
+import threading
+import time
+import orjson
+from typing import Dict, Iterable, List, Optional
+from config import settings
+from tools.shared_cache import open_database
+
+
+class CorpusStore:
+    # Scraped pages and social text, deduplicated by content hash and indexed
+    # with FTS5 so earlier crawls can answer lookups and cross-product queries
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS documents ("
+        "id INTEGER PRIMARY KEY, hash TEXT UNIQUE, kind TEXT, source TEXT, parent TEXT, "
+        "title TEXT, body TEXT, meta TEXT, created_at REAL, seen_at REAL)",
+        "CREATE INDEX IF NOT EXISTS documents_source ON documents (kind, source)",
+        "CREATE INDEX IF NOT EXISTS documents_parent ON documents (parent)",
+        "CREATE TABLE IF NOT EXISTS topics (topic TEXT, doc_id INTEGER, PRIMARY KEY (topic, doc_id))",
+        "CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5("
+        "title, body, content='documents', content_rowid='id')",
+        "CREATE TRIGGER IF NOT EXISTS documents_ai AFTER INSERT ON documents BEGIN "
+        "INSERT INTO documents_fts (rowid, title, body) VALUES (new.id, new.title, new.body); END",
+        "CREATE TRIGGER IF NOT EXISTS documents_ad AFTER DELETE ON documents BEGIN "
+        "INSERT INTO documents_fts (documents_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body); "
+        "DELETE FROM topics WHERE doc_id = old.id; END"
+    )
+    
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self.db = open_database(path)
+        self.lock = threading.Lock()
+        self.counters = {"stored": 0, "duplicates": 0, "lookup_hits": 0, "lookup_misses": 0, "searches": 0}
+        
+        with self.lock:
+            for statement in self.SCHEMA:
+                self.db.execute(statement)
+            self.db.commit()
+    
+    @staticmethod
+    def content_hash(kind: str, title: str, body: str, scope: str = "") -> str:
+        normalised = " ".join(f"{title}\n{body}".split())
+        return hashlib.blake2b(f"{kind}:{scope}:{normalised}".encode("utf-8"), digest_size=16).hexdigest()
+    
+    @staticmethod
+    def normalize_topic(topic: str) -> str:
+        return " ".join(topic.split()).casefold()
+    
+    def insert(self, kind: str, source: str, title: str, body: str, parent: Optional[str] = None,
+               created_at: Optional[float] = None) -> int:
+        # Callers hold the lock; an existing hash only gets its seen_at bumped.
+        # Pages dedupe per URL, since product info and topics attach by URL,
+        # and comments per parent post, so "+1" under two posts stays under both
+        now = time.time()
+        digest = self.content_hash(kind, title, body, source if kind == "page" else parent or "")
+        row = self.db.execute("SELECT id FROM documents WHERE hash = ?", (digest,)).fetchone()
+        if row is not None:
+            self.db.execute("UPDATE documents SET seen_at = ? WHERE id = ?", (now, row[0]))
+            self.counters["duplicates"] += 1
+            return row[0]
+        
+        cursor = self.db.execute(
+            "INSERT INTO documents (hash, kind, source, parent, title, body, created_at, seen_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (digest, kind, source, parent, title, body, created_at or now, now)
+        )
+        self.counters["stored"] += 1
+        return cursor.lastrowid
+    
+    def add_page(self, url: str, title: str, text: str):
+        with self.lock:
+            doc_id = self.insert("page", url, title, text)
+            # A changed page replaces the previous version of the same URL
+            self.db.execute("DELETE FROM documents WHERE kind = 'page' AND source = ? AND id != ?", (url, doc_id))
+            self.db.commit()
+    
+    def attach_product_info(self, url: str, product_info: Dict):
+        with self.lock:
+            self.db.execute(
+                "UPDATE documents SET meta = ? WHERE kind = 'page' AND source = ?",
+                (orjson.dumps(product_info), url)
+            )
+            self.db.commit()
+    
+    def tag_pages(self, topic: str, urls: Iterable[str]):
+        topic = self.normalize_topic(topic)
+        with self.lock:
+            self.db.executemany(
+                "INSERT OR IGNORE INTO topics (topic, doc_id) "
+                "SELECT ?, id FROM documents WHERE kind = 'page' AND source = ?",
+                [(topic, url) for url in urls]
+            )
+            self.db.commit()
+    
+    def add_posts(self, topic: str, posts: List[Dict]):
+        topic = self.normalize_topic(topic)
+        with self.lock:
+            doc_ids = []
+            for post in posts:
+                doc_ids.append(self.insert(
+                    "post", post["id"], post.get("title") or "", post.get("text") or "",
+                    created_at=post.get("created_utc")
+                ))
+                for comment in post.get("comments", []):
+                    doc_ids.append(self.insert("comment", post["id"], "", comment, parent=post["id"]))
+            
+            self.db.executemany(
+                "INSERT OR IGNORE INTO topics (topic, doc_id) VALUES (?, ?)",
+                [(topic, doc_id) for doc_id in doc_ids]
+            )
+            self.db.commit()
+    
+    def record_lookup(self, found: bool):
+        self.counters["lookup_hits" if found else "lookup_misses"] += 1
+    
+    def pages_for(self, topic: str, max_age: float, limit: int = 2) -> List[Dict]:
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT d.meta FROM documents d JOIN topics t ON t.doc_id = d.id "
+                "WHERE t.topic = ? AND d.kind = 'page' AND d.meta IS NOT NULL AND d.seen_at >= ? "
+                "ORDER BY d.seen_at DESC LIMIT ?",
+                (self.normalize_topic(topic), time.time() - max_age, limit)
+            ).fetchall()
+            self.record_lookup(bool(rows))
+        return [orjson.loads(meta) for meta, in rows]
+    
+    def posts_for(self, topic: str, max_age: float, limit: int = 5, comment_limit: int = 10) -> List[Dict]:
+        with self.lock:
+            posts = self.db.execute(
+                "SELECT d.source, d.title, d.body, d.created_at FROM documents d JOIN topics t ON t.doc_id = d.id "
+                "WHERE t.topic = ? AND d.kind = 'post' AND d.seen_at >= ? ORDER BY d.created_at DESC LIMIT ?",
+                (self.normalize_topic(topic), time.time() - max_age, limit)
+            ).fetchall()
+            self.record_lookup(bool(posts))
+            
+            results = []
+            for source, title, body, created_at in posts:
+                comments = self.db.execute(
+                    "SELECT body FROM documents WHERE kind = 'comment' AND parent = ? ORDER BY id LIMIT ?",
+                    (source, comment_limit)
+                ).fetchall()
+                results.append({
+                    "id": source,
+                    "title": title,
+                    "text": body,
+                    "created_utc": created_at,
+                    "comments": [comment for comment, in comments]
+                })
+        return results
+    
+    def search(self, query: str, kind: Optional[str] = None, topic: Optional[str] = None,
+               limit: int = 20) -> List[Dict]:
+        sql = (
+            "SELECT d.kind, d.source, d.title, snippet(documents_fts, 1, '[', ']', '...', 12), "
+            "bm25(documents_fts) FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid "
+        )
+        params: List = []
+        if topic:
+            sql += "JOIN topics t ON t.doc_id = d.id AND t.topic = ? "
+            params.append(self.normalize_topic(topic))
+        sql += "WHERE documents_fts MATCH ? "
+        params.append(query)
+        if kind:
+            sql += "AND d.kind = ? "
+            params.append(kind)
+        sql += "ORDER BY bm25(documents_fts) LIMIT ?"
+        params.append(limit)
+        
+        with self.lock:
+            self.counters["searches"] += 1
+            rows = self.db.execute(sql, params).fetchall()
+        
+        return [
+            {"kind": kind, "source": source, "title": title, "snippet": snippet, "rank": rank}
+            for kind, source, title, snippet, rank in rows
+        ]
+    
+    def stats(self) -> Dict:
+        with self.lock:
+            counts = dict(self.db.execute("SELECT kind, COUNT(*) FROM documents GROUP BY kind").fetchall())
+        lookups = self.counters["lookup_hits"] + self.counters["lookup_misses"]
+        return {
+            **self.counters,
+            "documents": sum(counts.values()),
+            "pages": counts.get("page", 0),
+            "posts": counts.get("post", 0),
+            "comments": counts.get("comment", 0),
+            "hit_rate": self.counters["lookup_hits"] / lookups if lookups else 0.0
+        }
+
+
+_corpus_store: Optional[CorpusStore] = None
+
+
+def get_corpus_store() -> Optional[CorpusStore]:
+    global _corpus_store
+    if not settings.corpus_enabled:
+        return None
+    if _corpus_store is None:
+        _corpus_store = CorpusStore(path=settings.corpus_path or ":memory:")
+    return _corpus_store
@@ -0,0 +1,116 @@
+import re
+from typing import Dict, List, Optional, Sequence
+
+PRICING_TERMS = ("price", "prices", "pricing", "cost", "costs", "plan", "plans", "per month", "per year",
+                 "billed", "billing", "subscription", "free trial", "discount")
+FEATURE_TERMS = ("feature", "features", "benefit", "benefits", "capability", "capabilities",
+                 "includes", "including", "integrations", "integrates")
+
+CURRENCIES = {"$": "USD", "€": "EUR", "£": "GBP", "¥": "JPY", "usd": "USD", "eur": "EUR", "gbp": "GBP"}
+PERIODS = {
+    "mo": "month", "month": "month", "monthly": "month",
+    "yr": "year", "year": "year", "annum": "year", "annually": "year", "yearly": "year",
+    "week": "week", "day": "day",
+    "user": "user", "seat": "user", "member": "user"
+}
+
+PRICE_PATTERN = (
+    r"(?P<currency>[$€£¥]|\b(?:USD|EUR|GBP)\s?)"
+    # US (1,299.00) and European (1.299,00 / 9,99) grouping and decimal marks
+    r"(?P<amount>\d{1,3}(?:,\d{3})+(?:\.\d{1,2})?|\d{1,3}(?:\.\d{3})+(?:,\d{1,2})?|\d+(?:[.,]\d{1,2})?(?!\d))"
+    r"(?:\s*(?:/|per|a|an)\s*(?:(?:user|seat|member)\s*(?:/|per)\s*)?"
+    r"(?P<period>mo|month|yr|year|annum|week|day|user|seat|member)\b)?"
+    r"(?:,?\s*(?:billed\s+)?(?P<billing>monthly|annually|yearly)\b)?"
+)
+
+
+def terms_pattern(terms: Sequence[str]) -> str:
+    # Longest first so "per month" wins over shorter overlapping terms
+    return r"\b(?:" + "|".join(re.escape(t) for t in sorted(terms, key=len, reverse=True)) + r")\b"
+
+
+class ProductInfoExtractor:
+    # Both vocabularies and the price grammar compile into one alternation,
+    # so a page's text is scanned once no matter how many terms there are
+    def __init__(self, pricing_terms: Sequence[str] = PRICING_TERMS, feature_terms: Sequence[str] = FEATURE_TERMS,
+                 max_pricing: int = 3, max_features: int = 5, max_prices: int = 10, max_snippet: int = 300,
+                 min_snippet: int = 40):
+        self.max_pricing = max_pricing
+        self.max_features = max_features
+        self.max_prices = max_prices
+        self.max_snippet = max_snippet
+        self.min_snippet = min_snippet
+        self.pattern = re.compile(
+            f"(?P<price>{PRICE_PATTERN})|(?P<pricing>{terms_pattern(pricing_terms)})|(?P<feature>{terms_pattern(feature_terms)})",
+            re.IGNORECASE
+        )
+    
+    @staticmethod
+    def parse_amount(text: str) -> float:
+        # The last separator is the decimal mark only when one or two digits follow it
+        last = max(text.rfind(","), text.rfind("."))
+        if last != -1 and len(text) - last - 1 <= 2:
+            return float(text[:last].replace(",", "").replace(".", "") + "." + text[last + 1:])
+        return float(text.replace(",", "").replace(".", ""))
+    
+    @staticmethod
+    def parse_price(match: re.Match) -> Dict:
+        # "$12/mo billed annually" is a monthly rate paid yearly; a bare
+        # "$99 billed annually" is a yearly price
+        billing = match.group("billing")
+        period = match.group("period") or billing
+        return {
+            "currency": CURRENCIES[match.group("currency").strip().lower()],
+            "amount": ProductInfoExtractor.parse_amount(match.group("amount")),
+            "period": PERIODS[period.lower()] if period else None,
+            "billing": PERIODS[billing.lower()] if billing else None,
+            "text": match.group("price").strip()
+        }
+    
+    def extract(self, text: str) -> Dict[str, List]:
+        # Text holds one heading or paragraph per line; a match reports its whole
+        # line, found around the match so an early stop skips the rest of the page
+        pricing: Dict[int, str] = {}
+        features: Dict[int, str] = {}
+        prices: List[Dict] = []
+        
+        def add(found: Dict[int, str], cap: int, position: int, is_price: bool = False):
+            start = text.rfind("\n", 0, position) + 1
+            if len(found) >= cap or start in found:
+                return
+            end = text.find("\n", position)
+            line = text[start:end if end != -1 else len(text)].strip()
+            # A bare heading like "Pricing" says nothing on its own
+            if is_price or len(line) >= self.min_snippet:
+                found[start] = line[:self.max_snippet]
+        
+        for match in self.pattern.finditer(text):
+            kind = match.lastgroup if match.lastgroup in ("pricing", "feature") else "price"
+            
+            if kind == "price":
+                if len(prices) < self.max_prices:
+                    prices.append(self.parse_price(match))
+                add(pricing, self.max_pricing, match.start(), is_price=True)
+            elif kind == "pricing":
+                add(pricing, self.max_pricing, match.start())
+            else:
+                add(features, self.max_features, match.start())
+            
+            if len(pricing) >= self.max_pricing and len(features) >= self.max_features and len(prices) >= self.max_prices:
+                break
+        
+        return {
+            "pricing_mentions": list(pricing.values()),
+            "feature_mentions": list(features.values()),
+            "prices": prices
+        }
+
+
+_default_extractor: Optional[ProductInfoExtractor] = None
+
+
+def get_extractor() -> ProductInfoExtractor:
+    global _default_extractor
+    if _default_extractor is None:
+        _default_extractor = ProductInfoExtractor()
+    return _default_extractor
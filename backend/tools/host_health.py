@@ -0,0 +1,194 @@
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, TypeVar
+from urllib.parse import urlsplit
+import httpx
+from config import settings
+
+T = TypeVar("T")
+
+
+class CircuitOpen(httpx.HTTPError):
+    pass
+
+
+class HostState:
+    __slots__ = ("latencies", "failures", "opened_at", "probing")
+    
+    def __init__(self, window: int):
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+    
+    def percentile(self, q: float, min_samples: int) -> Optional[float]:
+        if len(self.latencies) < min_samples:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+class HostHealth:
+    # Per-host latency windows and circuit breakers for outbound fetches, so a
+    # dead or slow host costs its own requests a short timeout instead of every
+    # analysis the full one
+    def __init__(self, window: int = 100, min_samples: int = 10, timeout_multiplier: float = 3.0,
+                 min_timeout: float = 1.0, max_timeout: float = 10.0, failure_threshold: int = 5,
+                 cooldown: float = 30.0, hedge_ratio: float = 0.1):
+        self.window = window
+        self.min_samples = min_samples
+        self.timeout_multiplier = timeout_multiplier
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.hedge_ratio = hedge_ratio
+        self.hosts: Dict[str, HostState] = {}
+        self.counters = {"calls": 0, "failures": 0, "rejected": 0, "opened": 0, "hedges": 0, "hedge_wins": 0}
+    
+    @staticmethod
+    def host_of(url: str) -> str:
+        return urlsplit(url).netloc.lower()
+    
+    def state(self, host: str) -> HostState:
+        state = self.hosts.get(host)
+        if state is None:
+            state = self.hosts[host] = HostState(self.window)
+        return state
+    
+    def timeout_for(self, host: str) -> float:
+        # Until a host has history it gets the ceiling; after that a multiple of its own p99
+        p99 = self.state(host).percentile(0.99, self.min_samples)
+        if p99 is None:
+            return self.max_timeout
+        return min(max(p99 * self.timeout_multiplier, self.min_timeout), self.max_timeout)
+    
+    def hedge_delay(self, host: str) -> Optional[float]:
+        return self.state(host).percentile(0.95, self.min_samples)
+    
+    def check(self, host: str):
+        state = self.state(host)
+        if state.opened_at is None:
+            return
+        
+        # After the cool-off exactly one probe goes through (half-open)
+        if state.probing or time.monotonic() - state.opened_at < self.cooldown:
+            self.counters["rejected"] += 1
+            raise CircuitOpen(f"Circuit open for {host}")
+        state.probing = True
+    
+    def record_success(self, host: str, latency: float):
+        state = self.state(host)
+        state.latencies.append(latency)
+        state.failures = 0
+        state.opened_at = None
+        state.probing = False
+    
+    def record_failure(self, host: str):
+        state = self.state(host)
+        state.failures += 1
+        state.probing = False
+        self.counters["failures"] += 1
+        
+        # A failed half-open probe re-opens straight away
+        if state.opened_at is not None or state.failures >= self.failure_threshold:
+            if state.opened_at is None:
+                self.counters["opened"] += 1
+            state.opened_at = time.monotonic()
+    
+    @staticmethod
+    def is_host_failure(error: Exception) -> bool:
+        # 4xx and refused content still prove the host is up and answering
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code >= 500
+        return isinstance(error, httpx.TransportError)
+    
+    async def call(self, url: str, fetch: Callable[[float], Awaitable[T]]) -> T:
+        host = self.host_of(url)
+        self.check(host)
+        timeout = self.timeout_for(host)
+        self.counters["calls"] += 1
+        
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(fetch(timeout), timeout)
+        except asyncio.CancelledError:
+            # A cancelled attempt (e.g. a losing hedge) says nothing about the host
+            self.state(host).probing = False
+            raise
+        except asyncio.TimeoutError:
+            self.record_failure(host)
+            raise httpx.TimeoutException(f"No response from {host} within {timeout:.2f}s")
+        except Exception as e:
+            if self.is_host_failure(e):
+                self.record_failure(host)
+            else:
+                self.record_success(host, time.perf_counter() - started)
+            raise
+        
+        self.record_success(host, time.perf_counter() - started)
+        return result
+    
+    async def hedged(self, url: str, fetch: Callable[[float], Awaitable[T]]) -> T:
+        # Only for idempotent requests: when the first attempt outlives the
+        # host's p95 a second one races it and the first success wins
+        delay = self.hedge_delay(self.host_of(url))
+        first = asyncio.ensure_future(self.call(url, fetch))
+        tasks = [first]
+        try:
+            if delay is None:
+                return await first
+            
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            # The first attempt has counted itself in calls by now; the hedge is
+            # only sent if hedges stay within hedge_ratio of all calls with it
+            if not done and self.counters["hedges"] + 1 <= self.hedge_ratio * self.counters["calls"]:
+                self.counters["hedges"] += 1
+                tasks.append(asyncio.ensure_future(self.call(url, fetch)))
+            
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self.counters["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+    
+    def stats(self) -> Dict:
+        now = time.monotonic()
+        return {
+            **self.counters,
+            "hosts": len(self.hosts),
+            "open_circuits": sum(
+                1 for state in self.hosts.values()
+                if state.opened_at is not None and now - state.opened_at < self.cooldown
+            )
+        }
+
+
+_host_health: Optional[HostHealth] = None
+
+
+def get_host_health() -> HostHealth:
+    global _host_health
+    if _host_health is None:
+        _host_health = HostHealth(
+            window=settings.host_latency_window,
+            min_samples=settings.host_min_samples,
+            timeout_multiplier=settings.host_timeout_multiplier,
+            min_timeout=settings.host_min_timeout,
+            max_timeout=settings.host_max_timeout,
+            failure_threshold=settings.circuit_failure_threshold,
+            cooldown=settings.circuit_cooldown,
+            hedge_ratio=settings.hedge_max_ratio
+        )
+    return _host_health
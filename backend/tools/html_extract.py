@@ -0,0 +1,151 @@
+import codecs
+import re
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+
+CAPTURED = {"title", "h1", "h2", "h3", "p"}
+SKIPPED = {"script", "style", "noscript", "template", "svg"}
+HTML_TYPES = ("text/html", "application/xhtml+xml")
+# Browsers look for a <meta> charset declaration within the first kilobyte
+SNIFF_BYTES = 1024
+META_CHARSET = re.compile(rb"""<meta[^>]+?charset\s*=\s*["']?\s*([a-z0-9_.:-]+)""", re.IGNORECASE)
+BOMS = ((codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16"))
+
+
+def is_html(content_type: Optional[str]) -> bool:
+    # A missing header is given the benefit of the doubt
+    if not content_type:
+        return True
+    return content_type.split(";")[0].strip().lower() in HTML_TYPES
+
+
+def known_charset(charset: str) -> Optional[str]:
+    try:
+        codecs.lookup(charset)
+        return charset
+    except LookupError:
+        return None
+
+
+def charset_of(content_type: Optional[str]) -> Optional[str]:
+    for param in (content_type or "").split(";")[1:]:
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "charset" and value.strip():
+            return known_charset(value.strip().strip('"\''))
+    return None
+
+
+def sniff_charset(head: bytes, default: str = "utf-8") -> str:
+    for bom, charset in BOMS:
+        if head.startswith(bom):
+            return charset
+    
+    match = META_CHARSET.search(head[:SNIFF_BYTES])
+    if match:
+        charset = known_charset(match.group(1).decode("ascii").lower())
+        # A page that reached us as bytes cannot really be UTF-16 if its meta tag is readable
+        if charset and not charset.startswith("utf-16"):
+            return charset
+    return default
+
+
+class PageParser(HTMLParser):
+    # Single pass over the markup that keeps only what the scraper reports:
+    # title, meta description, h1-h3, paragraphs and absolute links. Bytes can
+    # be fed chunk by chunk as they arrive. Without a charset from the headers,
+    # decoding waits for the first kilobyte so a <meta charset> can be honoured.
+    def __init__(self, encoding: Optional[str] = None, max_links: int = 10):
+        super().__init__(convert_charrefs=True)
+        self.decoder = codecs.getincrementaldecoder(encoding)(errors="replace") if encoding else None
+        self.head = b""
+        self.max_links = max_links
+        self.title: Optional[str] = None
+        self.description = ""
+        self.headings: List[str] = []
+        self.paragraphs: List[str] = []
+        self.links: List[str] = []
+        self.open: List[tuple] = []
+        self.skip_depth = 0
+    
+    def feed_bytes(self, chunk: bytes):
+        if self.decoder is None:
+            self.head += chunk
+            if len(self.head) < SNIFF_BYTES:
+                return
+            chunk = self.start_decoding()
+        self.feed(self.decoder.decode(chunk))
+    
+    def start_decoding(self) -> bytes:
+        head, self.head = self.head, b""
+        self.decoder = codecs.getincrementaldecoder(sniff_charset(head))(errors="replace")
+        return head
+    
+    def finish(self):
+        if self.decoder is None:
+            head = self.start_decoding()
+            self.feed(self.decoder.decode(head))
+        self.feed(self.decoder.decode(b"", final=True))
+        self.close()
+        while self.open:
+            self.close_element(self.open[-1][0])
+    
+    def handle_starttag(self, tag: str, attrs):
+        if tag in SKIPPED:
+            self.skip_depth += 1
+        elif self.skip_depth:
+            # Inline <svg><title> or <noscript><h1> is not page content
+            return
+        elif tag in CAPTURED:
+            # <p> cannot nest; a new one implicitly ends the previous paragraph
+            if tag == "p" and any(name == "p" for name, _ in self.open):
+                self.close_element("p")
+            self.open.append((tag, []))
+        elif tag == "meta":
+            values = dict(attrs)
+            if (values.get("name") or "").lower() == "description" and values.get("content") and not self.description:
+                self.description = values["content"]
+        elif tag == "a" and len(self.links) < self.max_links:
+            href = dict(attrs).get("href")
+            if href and href.startswith("http"):
+                self.links.append(href)
+    
+    def handle_startendtag(self, tag: str, attrs):
+        # A self-closed skipped or captured element has no content to track
+        if tag not in CAPTURED and tag not in SKIPPED:
+            self.handle_starttag(tag, attrs)
+    
+    def handle_endtag(self, tag: str):
+        if tag in SKIPPED:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif tag in CAPTURED and not self.skip_depth:
+            self.close_element(tag)
+    
+    def close_element(self, tag: str):
+        for i in range(len(self.open) - 1, -1, -1):
+            if self.open[i][0] == tag:
+                name, parts = self.open.pop(i)
+                text = "".join(parts).strip()
+                if name == "title":
+                    if self.title is None:
+                        self.title = text
+                elif name == "p":
+                    self.paragraphs.append(text)
+                else:
+                    self.headings.append(text)
+                return
+    
+    def handle_data(self, data: str):
+        # Text counts towards every open element, as get_text() on a parent would
+        if self.skip_depth:
+            return
+        for _, parts in self.open:
+            parts.append(data)
+    
+    def result(self) -> Dict:
+        return {
+            "title": self.title or "No title found",
+            "description": self.description,
+            "headings": self.headings,
+            "paragraphs": self.paragraphs,
+            "links": self.links
+        }
@@ -0,0 +1,255 @@
+import hashlib
+import os
+import threading
+import time
+import orjson
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Mapping
+from config import settings
+from tools.shared_cache import open_database
+
+
+class ResponseCache:
+    # Bodies live in files named by URL hash; the index is a SQLite table so
+    # every worker process sees the same entries and LRU order
+    COLUMNS = "key, size, etag, last_modified, expires_at, page, product_info"
+    # Reads only note their access time; the LRU column is written in batches
+    TOUCH_BATCH = 64
+    
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.touched: Dict[str, float] = {}
+        self.counters = {
+            "hits": 0,
+            "misses": 0,
+            "revalidations": 0,
+            "not_modified": 0,
+            "stores": 0,
+            "evictions": 0
+        }
+        
+        os.makedirs(directory, exist_ok=True)
+        self.db = open_database(os.path.join(directory, "index.sqlite3"))
+        with self.lock:
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS responses (url TEXT PRIMARY KEY, key TEXT, size INTEGER, "
+                "etag TEXT, last_modified TEXT, expires_at REAL, page BLOB, product_info BLOB, used_at REAL)"
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS responses_used ON responses (used_at)")
+            self.db.commit()
+    
+    def body_path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+    
+    @staticmethod
+    def to_entry(row: tuple) -> Dict:
+        key, size, etag, last_modified, expires_at, page, product_info = row
+        return {
+            "key": key,
+            "size": size,
+            "etag": etag,
+            "last_modified": last_modified,
+            "expires_at": expires_at,
+            "page": orjson.loads(page),
+            "product_info": orjson.loads(product_info) if product_info else None
+        }
+    
+    def get(self, url: str) -> Optional[Dict]:
+        with self.lock:
+            row = self.db.execute(f"SELECT {self.COLUMNS} FROM responses WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                return None
+            self.touched[url] = time.time()
+            if len(self.touched) >= self.TOUCH_BATCH:
+                self.flush_touched()
+        return self.to_entry(row)
+    
+    def flush_touched(self):
+        # Callers hold the lock
+        if self.touched:
+            self.db.executemany(
+                "UPDATE responses SET used_at = MAX(used_at, ?) WHERE url = ?",
+                [(used_at, url) for url, used_at in self.touched.items()]
+            )
+            self.db.commit()
+            self.touched.clear()
+    
+    def is_fresh(self, entry: Dict) -> bool:
+        return entry["expires_at"] > time.time()
+    
+    def conditional_headers(self, entry: Optional[Dict]) -> Dict:
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+    
+    def freshness(self, headers: Mapping[str, str]) -> Optional[float]:
+        # Returns the expiry time, or None when the response must not be stored
+        directives = {}
+        for part in headers.get("cache-control", "").split(","):
+            name, _, value = part.strip().partition("=")
+            if name:
+                directives[name.lower()] = value.strip('"')
+        
+        if "no-store" in directives:
+            return None
+        
+        now = time.time()
+        if "no-cache" in directives:
+            return now
+        
+        for name in ("s-maxage", "max-age"):
+            if directives.get(name, "").isdigit():
+                age = int(headers.get("age", "0")) if headers.get("age", "").isdigit() else 0
+                return now + max(int(directives[name]) - age, 0)
+        
+        if headers.get("expires"):
+            try:
+                return parsedate_to_datetime(headers["expires"]).timestamp()
+            except (TypeError, ValueError):
+                return now
+        
+        return now
+    
+    def put(self, url: str, headers: Mapping[str, str], body: bytes, page: Dict) -> Optional[Dict]:
+        expires_at = self.freshness(headers)
+        etag = headers.get("etag")
+        last_modified = headers.get("last-modified")
+        
+        # Nothing to serve or revalidate later
+        if expires_at is None or (expires_at <= time.time() and not etag and not last_modified):
+            self.discard(url)
+            return None
+        
+        if len(body) > self.max_bytes:
+            return None
+        
+        key = hashlib.sha256(url.encode()).hexdigest()
+        # Write then rename so a reader in another worker never sees half a body
+        tmp_path = f"{self.body_path(key)}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(body)
+        os.replace(tmp_path, self.body_path(key))
+        
+        entry = {
+            "key": key,
+            "size": len(body),
+            "etag": etag,
+            "last_modified": last_modified,
+            "expires_at": expires_at,
+            "page": page,
+            "product_info": None
+        }
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, NULL, ?)",
+                (url, key, len(body), etag, last_modified, expires_at,
+                 orjson.dumps(page, option=orjson.OPT_SERIALIZE_NUMPY), time.time())
+            )
+            self.db.commit()
+        self.counters["stores"] += 1
+        
+        self.evict()
+        return entry
+    
+    def revalidated(self, url: str, headers: Mapping[str, str]) -> Optional[Dict]:
+        entry = self.refresh(url, headers)
+        if entry is not None:
+            self.counters["not_modified"] += 1
+        return entry
+    
+    def refresh(self, url: str, headers: Mapping[str, str]) -> Optional[Dict]:
+        # Renews freshness and validators of a stored body the origin says is current
+        entry = self.get(url)
+        if entry is None:
+            # Evicted by another worker while the request was out
+            return None
+        expires_at = self.freshness(headers)
+        entry["expires_at"] = expires_at if expires_at is not None else time.time()
+        entry["etag"] = headers.get("etag", entry.get("etag"))
+        entry["last_modified"] = headers.get("last-modified", entry.get("last_modified"))
+        with self.lock:
+            self.db.execute(
+                "UPDATE responses SET expires_at = ?, etag = ?, last_modified = ? WHERE url = ?",
+                (entry["expires_at"], entry["etag"], entry["last_modified"], url)
+            )
+            self.db.commit()
+        return entry
+    
+    def attach_product_info(self, url: str, product_info: Dict):
+        with self.lock:
+            self.db.execute(
+                "UPDATE responses SET product_info = ? WHERE url = ?",
+                (orjson.dumps(product_info, option=orjson.OPT_SERIALIZE_NUMPY), url)
+            )
+            self.db.commit()
+    
+    def read_body(self, entry: Dict) -> bytes:
+        with open(self.body_path(entry["key"]), "rb") as f:
+            return f.read()
+    
+    def discard(self, url: str):
+        with self.lock:
+            row = self.db.execute("SELECT key FROM responses WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                return
+            self.db.execute("DELETE FROM responses WHERE url = ?", (url,))
+            self.db.commit()
+        try:
+            os.remove(self.body_path(row[0]))
+        except OSError:
+            pass
+    
+    def total_bytes(self) -> int:
+        with self.lock:
+            return self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+    
+    def evict(self):
+        excess = self.total_bytes() - self.max_bytes
+        if excess <= 0:
+            return
+        
+        victims = []
+        with self.lock:
+            self.flush_touched()
+            for url, size in self.db.execute("SELECT url, size FROM responses ORDER BY used_at"):
+                if excess <= 0:
+                    break
+                victims.append(url)
+                excess -= size
+        
+        for url in victims:
+            self.discard(url)
+            self.counters["evictions"] += 1
+    
+    def record(self, counter: str):
+        self.counters[counter] += 1
+    
+    def stats(self) -> Dict:
+        lookups = self.counters["hits"] + self.counters["misses"] + self.counters["revalidations"]
+        with self.lock:
+            entries = self.db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {
+            **self.counters,
+            "entries": entries,
+            "bytes": self.total_bytes(),
+            "max_bytes": self.max_bytes,
+            "hit_rate": (self.counters["hits"] + self.counters["not_modified"]) / lookups if lookups else 0.0
+        }
+
+
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    global _response_cache
+    if not settings.scrape_cache_enabled:
+        return None
+    if _response_cache is None:
+        _response_cache = ResponseCache(settings.scrape_cache_dir, settings.scrape_cache_max_bytes)
+    return _response_cache
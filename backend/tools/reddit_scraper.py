@@ -1,54 +1,187 @@
+import asyncio
+import threading
 import praw
-from typing import List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Collection, List, Dict, Optional
 from config import settings
+from tools.rate_limit import TokenBucket
+from telemetry import span
+
+
+def make_reddit() -> Optional[praw.Reddit]:
+    if not (settings.reddit_client_id and settings.reddit_client_secret):
+        return None
+    return praw.Reddit(
+        client_id=settings.reddit_client_id,
+        client_secret=settings.reddit_client_secret,
+        user_agent=settings.reddit_user_agent
+    )
 
 
 class RedditScraper:
-    def __init__(self):
-        self.reddit = None
-        if settings.reddit_client_id and settings.reddit_client_secret:
-            self.reddit = praw.Reddit(
-                client_id=settings.reddit_client_id,
-                client_secret=settings.reddit_client_secret,
-                user_agent=settings.reddit_user_agent
-            )
+    def __init__(self, factory: Callable[[], Optional[praw.Reddit]] = make_reddit):
+        self.use_factory(factory)
     
-    def search_posts(self, query: str, subreddit: str = "all", limit: int = 10) -> List[Dict]:
+    def use_factory(self, factory: Callable[[], Optional[praw.Reddit]]):
+        self.factory = factory
+        self.reddit = factory()
+    
+    def client(self) -> Optional[praw.Reddit]:
+        return self.reddit
+    
+    def post_from_submission(self, submission) -> Dict:
+        return {
+            "id": submission.id,
+            "title": submission.title,
+            "text": submission.selftext,
+            "score": submission.score,
+            "url": submission.url,
+            "permalink": f"https://www.reddit.com{submission.permalink}",
+            "created_utc": submission.created_utc,
+            "num_comments": submission.num_comments,
+            "subreddit": str(submission.subreddit)
+        }
+    
+    def fetch_submissions(self, query: str, subreddit: str = "all", limit: int = 10,
+                          sort: str = "relevance") -> List:
         if not self.reddit:
             return []
         
-        posts = []
+        subreddit_obj = self.client().subreddit(subreddit)
+        return list(subreddit_obj.search(query, limit=limit, sort=sort))
+    
+    def search_submissions(self, query: str, subreddit: str = "all", limit: int = 10) -> List:
         try:
-            subreddit_obj = self.reddit.subreddit(subreddit)
-            
-            for submission in subreddit_obj.search(query, limit=limit, sort='relevance'):
-                posts.append({
-                    "title": submission.title,
-                    "text": submission.selftext,
-                    "score": submission.score,
-                    "url": submission.url,
-                    "created_utc": submission.created_utc,
-                    "num_comments": submission.num_comments,
-                    "subreddit": str(submission.subreddit)
-                })
+            return self.fetch_submissions(query, subreddit, limit)
         except Exception as e:
             print(f"Error scraping Reddit: {e}")
-        
-        return posts
+            return []
+    
+    def search_posts(self, query: str, subreddit: str = "all", limit: int = 10) -> List[Dict]:
+        return [self.post_from_submission(s) for s in self.search_submissions(query, subreddit, limit)]
+    
+    def fetch_comments(self, submission, limit: int = 20) -> List[str]:
+        submission.comments.replace_more(limit=0)
+        return [comment.body for comment in submission.comments.list()[:limit] if hasattr(comment, 'body')]
+    
+    def comments_for(self, submission, limit: int = 20) -> List[str]:
+        try:
+            return self.fetch_comments(submission, limit)
+        except Exception as e:
+            print(f"Error getting comments: {e}")
+            return []
     
     def get_comments(self, post_url: str, limit: int = 20) -> List[str]:
         if not self.reddit:
             return []
         
-        comments = []
         try:
-            submission = self.reddit.submission(url=post_url)
-            submission.comments.replace_more(limit=0)
-            
-            for comment in submission.comments.list()[:limit]:
-                if hasattr(comment, 'body'):
-                    comments.append(comment.body)
+            submission = self.client().submission(url=post_url)
         except Exception as e:
             print(f"Error getting comments: {e}")
+            return []
+        
+        return self.comments_for(submission, limit)
+
+
+class AsyncRedditScraper(RedditScraper):
+    # PRAW has no async transport, so its blocking calls run on a dedicated
+    # thread pool while the token bucket keeps us inside Reddit's quota
+    def __init__(self, limiter: Optional[TokenBucket] = None, executor: Optional[ThreadPoolExecutor] = None,
+                 factory: Callable[[], Optional[praw.Reddit]] = make_reddit):
+        super().__init__(factory)
+        self.limiter = limiter or get_reddit_limiter()
+        self.executor = executor or get_reddit_executor()
+    
+    def use_factory(self, factory: Callable[[], Optional[praw.Reddit]]):
+        # self.reddit only tells whether Reddit is configured; calls go through client()
+        super().use_factory(factory)
+        self.clients = threading.local()
+    
+    def client(self) -> Optional[praw.Reddit]:
+        # PRAW is not thread-safe (one session, rate-limit state and token
+        # refresh per instance), so every executor thread builds its own
+        if not hasattr(self.clients, "reddit"):
+            self.clients.reddit = self.factory()
+        return self.clients.reddit
+    
+    def fetch_comments_for(self, submission_id: str, limit: int = 20) -> List[str]:
+        # Submissions from another thread's client are re-bound to this thread's
+        return self.fetch_comments(self.client().submission(id=submission_id), limit)
+    
+    async def call(self, stage: str, func, *args):
+        await self.limiter.acquire()
+        loop = asyncio.get_running_loop()
+        
+        with span(stage) as call_span:
+            try:
+                return await loop.run_in_executor(self.executor, func, *args)
+            except Exception as e:
+                call_span.fail(e)
+                print(f"Reddit {stage} error: {e}")
+                return []
+    
+    async def search_posts(self, query: str, subreddit: str = "all", limit: int = 10) -> List[Dict]:
+        submissions = await self.call("reddit.search", self.fetch_submissions, query, subreddit, limit)
+        return [self.post_from_submission(s) for s in submissions]
+    
+    async def get_comments(self, post_url: str, limit: int = 20) -> List[str]:
+        return await self.call("reddit.comments", RedditScraper.get_comments, self, post_url, limit)
+    
+    async def collect(self, query: str, post_limit: int = 5, comment_limit: int = 10,
+                      subreddit: str = "all", since: Optional[float] = None,
+                      seen: Collection[str] = ()) -> List[Dict]:
+        if not self.reddit:
+            return []
+        
+        # Incremental runs ask for the newest posts and drop anything already scored
+        sort = "relevance" if since is None else "new"
+        submissions = await self.call("reddit.search", self.fetch_submissions, query, subreddit, post_limit, sort)
+        submissions = [s for s in submissions if s.id not in seen and (since is None or s.created_utc > since)]
+        
+        # Search results are full submission objects, so comments load straight
+        # from them instead of re-resolving post['url'], which is often an
+        # external link rather than the Reddit permalink
+        comments = await asyncio.gather(*(
+            self.call("reddit.comments", self.fetch_comments_for, submission.id, comment_limit)
+            for submission in submissions
+        ))
         
-        return comments
+        posts = []
+        for submission, post_comments in zip(submissions, comments):
+            post = self.post_from_submission(submission)
+            post["comments"] = post_comments
+            posts.append(post)
+        
+        return posts
+
+
+_reddit_limiter: Optional[TokenBucket] = None
+_reddit_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_reddit_limiter() -> TokenBucket:
+    global _reddit_limiter
+    if _reddit_limiter is None:
+        _reddit_limiter = TokenBucket(
+            rate=settings.reddit_requests_per_minute / 60,
+            capacity=settings.reddit_burst
+        )
+    return _reddit_limiter
+
+
+def get_reddit_executor() -> ThreadPoolExecutor:
+    global _reddit_executor
+    if _reddit_executor is None:
+        _reddit_executor = ThreadPoolExecutor(
+            max_workers=settings.reddit_max_concurrency,
+            thread_name_prefix="reddit"
+        )
+    return _reddit_executor
+
+
+def shutdown_reddit_executor():
+    global _reddit_executor
+    if _reddit_executor is not None:
+        _reddit_executor.shutdown(wait=False, cancel_futures=True)
+        _reddit_executor = None
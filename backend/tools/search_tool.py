@@ -1,41 +1,49 @@
 import requests
-from typing import List, Dict
+import httpx
+from typing import List, Dict, Optional
+from config import settings
+from tools.cache import TTLCache, SingleFlight
+from tools.shared_cache import get_shared_cache
+from tools.host_health import HostHealth, get_host_health
+from telemetry import span, BYTES_FETCHED
 
 
 class SearchTool:
     def __init__(self):
-        self.base_url = "https://api.duckduckgo.com/"
+        self.base_url = settings.search_base_url
     
-    def search(self, query: str, max_results: int = 5) -> List[Dict]:
-        try:
-            params = {
-                'q': query,
-                'format': 'json',
-                'no_html': 1,
-                'skip_disambig': 1
-            }
-            
-            response = requests.get(self.base_url, params=params, timeout=10)
-            data = response.json()
-            
-            results = []
-            
-            if data.get('AbstractURL'):
+    def build_params(self, query: str) -> Dict:
+        return {
+            'q': query,
+            'format': 'json',
+            'no_html': 1,
+            'skip_disambig': 1
+        }
+    
+    def parse_results(self, data: Dict, max_results: int = 5) -> List[Dict]:
+        results = []
+        
+        if data.get('AbstractURL'):
+            results.append({
+                'title': data.get('Heading', 'No title'),
+                'snippet': data.get('AbstractText', 'No description'),
+                'url': data.get('AbstractURL')
+            })
+        
+        for topic in data.get('RelatedTopics', [])[:max_results]:
+            if isinstance(topic, dict) and 'Text' in topic:
                 results.append({
-                    'title': data.get('Heading', 'No title'),
-                    'snippet': data.get('AbstractText', 'No description'),
-                    'url': data.get('AbstractURL')
+                    'title': topic.get('Text', '').split(' - ')[0],
+                    'snippet': topic.get('Text', ''),
+                    'url': topic.get('FirstURL', '')
                 })
-            
-            for topic in data.get('RelatedTopics', [])[:max_results]:
-                if isinstance(topic, dict) and 'Text' in topic:
-                    results.append({
-                        'title': topic.get('Text', '').split(' - ')[0],
-                        'snippet': topic.get('Text', ''),
-                        'url': topic.get('FirstURL', '')
-                    })
-            
-            return results[:max_results]
+        
+        return results[:max_results]
+    
+    def search(self, query: str, max_results: int = 5) -> List[Dict]:
+        try:
+            response = requests.get(self.base_url, params=self.build_params(query), timeout=10)
+            return self.parse_results(response.json(), max_results)
             
         except Exception as e:
             print(f"Search error: {e}")
@@ -44,3 +52,78 @@ class SearchTool:
     def search_competitor(self, company_name: str, product_name: str = "") -> List[Dict]:
         query = f"{company_name} {product_name} product features pricing"
         return self.search(query.strip())
+
+
+class AsyncSearchTool(SearchTool):
+    def __init__(self, client: Optional[httpx.AsyncClient] = None, cache: Optional[TTLCache] = None,
+                 single_flight: Optional[SingleFlight] = None, health: Optional[HostHealth] = None):
+        super().__init__()
+        self.client = client
+        self.cache = cache
+        self.single_flight = single_flight or _search_flight
+        self.health = health or get_host_health()
+    
+    async def _get(self, params: Dict, timeout: float) -> httpx.Response:
+        if self.client is not None:
+            response = await self.client.get(self.base_url, params=params, timeout=timeout)
+        else:
+            async with httpx.AsyncClient() as client:
+                response = await client.get(self.base_url, params=params, timeout=timeout)
+        
+        BYTES_FETCHED.inc(len(response.content), source="search")
+        response.raise_for_status()
+        return response
+    
+    async def request(self, params: Dict) -> httpx.Response:
+        # Search requests are idempotent, so a slow one can be raced by a backup
+        fetch = lambda timeout: self._get(params, timeout)
+        if settings.search_hedging:
+            return await self.health.hedged(self.base_url, fetch)
+        return await self.health.call(self.base_url, fetch)
+    
+    async def search(self, query: str, max_results: int = 5) -> List[Dict]:
+        key = (query, max_results)
+        
+        if self.cache is not None:
+            cached = await self.cache.get_async(key)
+            if cached is not None:
+                return list(cached)
+        
+        results = await self.single_flight.run(key, lambda: self.fetch_results(key, query, max_results))
+        return list(results)
+    
+    async def fetch_results(self, key: tuple, query: str, max_results: int) -> List[Dict]:
+        with span("search", query=query) as search_span:
+            try:
+                response = await self.request(self.build_params(query))
+                results = self.parse_results(response.json(), max_results)
+                # An empty page may be an upstream blip too, so it must not pin
+                # "no competitors" for the full TTL
+                ttl = settings.search_cache_ttl if results else settings.search_cache_error_ttl
+                
+            except Exception as e:
+                search_span.fail(e)
+                print(f"Search error: {e}")
+                # Cache failures briefly so a blip neither sticks nor stampedes upstream
+                results = []
+                ttl = settings.search_cache_error_ttl
+        
+        if self.cache is not None:
+            await self.cache.set_async(key, results, ttl)
+        
+        return results
+    
+    async def search_competitor(self, company_name: str, product_name: str = "") -> List[Dict]:
+        query = f"{company_name} {product_name} product features pricing"
+        return await self.search(query.strip())
+
+
+_search_flight = SingleFlight()
+_search_cache: Optional[TTLCache] = None
+
+
+def get_search_cache() -> TTLCache:
+    global _search_cache
+    if _search_cache is None:
+        _search_cache = TTLCache(maxsize=settings.search_cache_maxsize, shared=get_shared_cache("search"))
+    return _search_cache
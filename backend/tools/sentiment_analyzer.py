@@ -1,11 +1,176 @@
+import asyncio
+import multiprocessing
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-from typing import Dict, List
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 from datetime import datetime
+from config import settings
+from tools.sentiment_cache import SentimentScoreCache
+from telemetry import span
+
+
+LABELS = np.array(["negative", "neutral", "positive"])
+NEGATIVE, NEUTRAL, POSITIVE = 0, 1, 2
+
+
+def label_codes(compound: np.ndarray) -> np.ndarray:
+    return np.where(compound >= 0.05, POSITIVE, np.where(compound <= -0.05, NEGATIVE, NEUTRAL))
+
+
+def merge_aggregates(*aggregates: Optional[Dict]) -> Dict:
+    # Counts and compound sums add up, so earlier runs never need rescoring
+    merged = {"count": 0, "compound_sum": 0.0, "distribution": {"positive": 0, "negative": 0, "neutral": 0}}
+    for aggregate in aggregates:
+        if not aggregate:
+            continue
+        merged["count"] += aggregate["count"]
+        merged["compound_sum"] += aggregate["compound_sum"]
+        for label, count in aggregate["distribution"].items():
+            merged["distribution"][label] += count
+    return merged
+
+
+def summarize_aggregates(aggregates: Dict) -> Dict:
+    count = aggregates["count"]
+    avg_compound = aggregates["compound_sum"] / count if count else 0
+    
+    return {
+        "total_analyzed": count,
+        "average_compound_score": avg_compound,
+        "sentiment_distribution": dict(aggregates["distribution"]),
+        "overall_sentiment": "positive" if avg_compound >= 0.05 else "negative" if avg_compound <= -0.05 else "neutral"
+    }
+
+
+def score_with(analyzer: SentimentIntensityAnalyzer, texts: Sequence[str]) -> np.ndarray:
+    scores = np.empty((len(texts), 4), dtype=np.float64)
+    polarity_scores = analyzer.polarity_scores
+    
+    for i, text in enumerate(texts):
+        result = polarity_scores(text)
+        scores[i] = (result['pos'], result['neg'], result['neu'], result['compound'])
+    
+    return scores
+
+
+_worker_analyzer: Optional[SentimentIntensityAnalyzer] = None
+
+
+def _init_worker():
+    # Each pool process loads the VADER lexicon once and keeps it
+    global _worker_analyzer
+    _worker_analyzer = SentimentIntensityAnalyzer()
+
+
+def _score_chunk(texts: List[str]) -> np.ndarray:
+    return score_with(_worker_analyzer, texts)
+
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def pool_size() -> int:
+    return settings.sentiment_workers or os.cpu_count() or 1
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        # spawn avoids forking a parent that already runs threads and an event loop
+        _process_pool = ProcessPoolExecutor(
+            max_workers=pool_size(),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker
+        )
+    return _process_pool
+
+
+def warm_process_pool():
+    # One chunk per worker makes the pool spawn every process and load VADER now
+    list(get_process_pool().map(_score_chunk, [["warm-up"]] * pool_size()))
+
+
+def shutdown_process_pool():
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(cancel_futures=True)
+        _process_pool = None
+
+
+class SentimentBatch:
+    # Columnar scores for a batch of texts; per-text dicts are only built on request
+    def __init__(self, texts: Sequence[str], scores: np.ndarray, cache_hits: int = 0):
+        self.texts = list(texts)
+        self.cache_hits = cache_hits
+        scores = np.asarray(scores, dtype=np.float64).reshape(-1, 4)
+        self.positive = scores[:, 0]
+        self.negative = scores[:, 1]
+        self.neutral = scores[:, 2]
+        self.compound = scores[:, 3]
+        self.codes = label_codes(self.compound)
+        self.timestamp = datetime.now().isoformat()
+    
+    def __len__(self) -> int:
+        return len(self.texts)
+    
+    @property
+    def labels(self) -> np.ndarray:
+        return LABELS[self.codes]
+    
+    def distribution(self) -> Dict[str, int]:
+        counts = np.bincount(self.codes, minlength=3)
+        return {
+            "positive": int(counts[POSITIVE]),
+            "negative": int(counts[NEGATIVE]),
+            "neutral": int(counts[NEUTRAL])
+        }
+    
+    def average_compound(self) -> float:
+        return float(self.compound.mean()) if len(self) else 0
+    
+    def indices(self, label: str) -> np.ndarray:
+        return np.flatnonzero(self.codes == int(np.flatnonzero(LABELS == label)[0]))
+    
+    def aggregates(self) -> Dict:
+        return {
+            "count": len(self),
+            "compound_sum": float(self.compound.sum()),
+            "distribution": self.distribution()
+        }
+    
+    def summary(self) -> Dict:
+        return summarize_aggregates(self.aggregates())
+    
+    def records(self, indices: Optional[Sequence[int]] = None) -> List[Dict]:
+        if indices is None:
+            indices = range(len(self))
+        
+        return [
+            {
+                "text": self.texts[i],
+                "sentiment": str(LABELS[self.codes[i]]),
+                "scores": {
+                    "positive": float(self.positive[i]),
+                    "negative": float(self.negative[i]),
+                    "neutral": float(self.neutral[i]),
+                    "compound": float(self.compound[i])
+                },
+                "timestamp": self.timestamp
+            }
+            for i in indices
+        ]
 
 
 class SentimentAnalyzer:
-    def __init__(self):
+    def __init__(self, parallel: Optional[bool] = None, parallel_threshold: Optional[int] = None,
+                 chunk_size: Optional[int] = None, cache: Optional[SentimentScoreCache] = None):
         self.analyzer = SentimentIntensityAnalyzer()
+        self.cache = cache
+        self.parallel = settings.sentiment_parallel if parallel is None else parallel
+        self.parallel_threshold = parallel_threshold or settings.sentiment_parallel_threshold
+        self.chunk_size = chunk_size or settings.sentiment_chunk_size
     
     def analyze_text(self, text: str) -> Dict:
         scores = self.analyzer.polarity_scores(text)
@@ -29,27 +194,91 @@ class SentimentAnalyzer:
             "timestamp": datetime.now().isoformat()
         }
     
-    def analyze_batch(self, texts: List[str]) -> List[Dict]:
-        results = []
-        for text in texts:
-            results.append(self.analyze_text(text))
-        return results
+    def use_pool(self, texts: Sequence[str]) -> bool:
+        # Below the threshold the IPC round trip costs more than it saves
+        return self.parallel and len(texts) >= self.parallel_threshold
+    
+    def chunks(self, texts: Sequence[str]) -> List[List[str]]:
+        return [list(texts[i:i + self.chunk_size]) for i in range(0, len(texts), self.chunk_size)]
     
-    def get_overall_sentiment(self, texts: List[str]) -> Dict:
-        analyses = self.analyze_batch(texts)
+    def compute_scores(self, texts: Sequence[str]) -> np.ndarray:
+        if not self.use_pool(texts):
+            return score_with(self.analyzer, texts)
         
-        total_compound = sum(a['scores']['compound'] for a in analyses)
-        avg_compound = total_compound / len(analyses) if analyses else 0
+        # map() yields chunks in submission order, so rows line up with texts
+        return np.vstack(list(get_process_pool().map(_score_chunk, self.chunks(texts))))
+    
+    async def compute_scores_async(self, texts: Sequence[str]) -> np.ndarray:
+        if not self.use_pool(texts):
+            # Up to parallel_threshold texts would block the loop for a noticeable
+            # time; VADER only reads its lexicon, so a worker thread can share it
+            return await asyncio.to_thread(score_with, self.analyzer, texts)
         
-        sentiment_counts = {
-            "positive": sum(1 for a in analyses if a['sentiment'] == 'positive'),
-            "negative": sum(1 for a in analyses if a['sentiment'] == 'negative'),
-            "neutral": sum(1 for a in analyses if a['sentiment'] == 'neutral')
-        }
+        loop = asyncio.get_running_loop()
+        pool = get_process_pool()
+        parts = await asyncio.gather(*(
+            loop.run_in_executor(pool, _score_chunk, chunk) for chunk in self.chunks(texts)
+        ))
+        return np.vstack(parts)
+    
+    def plan_scores(self, texts: Sequence[str]) -> Tuple[np.ndarray, Dict[str, List[int]]]:
+        # Fills cached rows and groups the remaining positions by content hash,
+        # so repeated texts in one batch are scored once
+        keys = [self.cache.make_key(text) for text in texts]
+        scores = np.empty((len(texts), 4), dtype=np.float64)
+        pending: Dict[str, List[int]] = {}
         
-        return {
-            "total_analyzed": len(analyses),
-            "average_compound_score": avg_compound,
-            "sentiment_distribution": sentiment_counts,
-            "overall_sentiment": "positive" if avg_compound >= 0.05 else "negative" if avg_compound <= -0.05 else "neutral"
-        }
+        for i, (key, cached) in enumerate(zip(keys, self.cache.get_many(keys))):
+            if cached is None:
+                pending.setdefault(key, []).append(i)
+            else:
+                scores[i] = cached
+        
+        return scores, pending
+    
+    def fill_scores(self, scores: np.ndarray, pending: Dict[str, List[int]], computed: np.ndarray):
+        for row, positions in zip(computed, pending.values()):
+            scores[positions] = row
+        self.cache.put_many(list(pending), computed)
+    
+    def score_texts(self, texts: Sequence[str]) -> Tuple[np.ndarray, int]:
+        if self.cache is None:
+            return self.compute_scores(texts), 0
+        
+        scores, pending = self.plan_scores(texts)
+        if pending:
+            computed = self.compute_scores([texts[positions[0]] for positions in pending.values()])
+            self.fill_scores(scores, pending, computed)
+        
+        return scores, len(texts) - sum(map(len, pending.values()))
+    
+    async def score_texts_async(self, texts: Sequence[str]) -> Tuple[np.ndarray, int]:
+        if self.cache is None:
+            return await self.compute_scores_async(texts), 0
+        
+        # Cache lookups may go to SQLite, so they stay off the event loop
+        scores, pending = await asyncio.to_thread(self.plan_scores, texts)
+        if pending:
+            computed = await self.compute_scores_async([texts[positions[0]] for positions in pending.values()])
+            await asyncio.to_thread(self.fill_scores, scores, pending, computed)
+        
+        return scores, len(texts) - sum(map(len, pending.values()))
+    
+    def score_batch(self, texts: Sequence[str]) -> SentimentBatch:
+        with span("sentiment.batch", texts=len(texts)) as batch_span:
+            scores, cache_hits = self.score_texts(texts)
+            batch_span.attributes["cache_hits"] = cache_hits
+        return SentimentBatch(texts, scores, cache_hits)
+    
+    async def score_batch_async(self, texts: Sequence[str]) -> SentimentBatch:
+        with span("sentiment.batch", texts=len(texts)) as batch_span:
+            scores, cache_hits = await self.score_texts_async(texts)
+            batch_span.attributes["cache_hits"] = cache_hits
+        return SentimentBatch(texts, scores, cache_hits)
+    
+    def analyze_batch(self, texts: List[str]) -> List[Dict]:
+        return self.score_batch(texts).records()
+    
+    def get_overall_sentiment(self, texts: Union[List[str], SentimentBatch]) -> Dict:
+        batch = texts if isinstance(texts, SentimentBatch) else self.score_batch(texts)
+        return batch.summary()
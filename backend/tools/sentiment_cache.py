@@ -0,0 +1,115 @@
+import hashlib
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+from config import settings
+from tools.shared_cache import open_database
+
+
+class SentimentScoreCache:
+    # SQLite caps bound parameters per statement, so disk lookups go in slices
+    QUERY_CHUNK = 500
+    
+    def __init__(self, maxsize: int = 100_000, path: Optional[str] = None):
+        self.maxsize = maxsize
+        self.path = path
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.counters = {"hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self.db = None
+        
+        if path:
+            self.db = open_database(path)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS scores "
+                "(key TEXT PRIMARY KEY, pos REAL, neg REAL, neu REAL, compound REAL)"
+            )
+            self.db.commit()
+    
+    @staticmethod
+    def make_key(text: str) -> str:
+        # Only whitespace is normalised: VADER scores capitalisation and punctuation
+        normalised = " ".join(text.split())
+        return hashlib.blake2b(normalised.encode("utf-8"), digest_size=16).hexdigest()
+    
+    def get_many(self, keys: Sequence[str]) -> List[Optional[tuple]]:
+        with self.lock:
+            found = []
+            for key in keys:
+                scores = self.entries.get(key)
+                if scores is not None:
+                    self.entries.move_to_end(key)
+                found.append(scores)
+            
+            missing = [key for key, scores in zip(keys, found) if scores is None]
+            disk = self.load(missing) if missing and self.db else {}
+            
+            for key, scores in disk.items():
+                self.remember(key, scores)
+            
+            results = [scores if scores is not None else disk.get(key) for key, scores in zip(keys, found)]
+            
+            disk_hits = sum(1 for key in missing if key in disk)
+            self.counters["hits"] += len(keys) - len(missing)
+            self.counters["disk_hits"] += disk_hits
+            self.counters["misses"] += len(missing) - disk_hits
+            return results
+    
+    def load(self, keys: List[str]) -> Dict[str, tuple]:
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        for i in range(0, len(unique), self.QUERY_CHUNK):
+            chunk = unique[i:i + self.QUERY_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.db.execute(
+                f"SELECT key, pos, neg, neu, compound FROM scores WHERE key IN ({placeholders})", chunk
+            )
+            for key, *scores in rows:
+                found[key] = tuple(scores)
+        return found
+    
+    def put_many(self, keys: Sequence[str], scores: np.ndarray):
+        rows = [(key, *map(float, row)) for key, row in zip(keys, scores)]
+        
+        with self.lock:
+            for key, *values in rows:
+                self.remember(key, tuple(values))
+            self.counters["stores"] += len(rows)
+            
+            if self.db:
+                self.db.executemany("INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?)", rows)
+                self.db.commit()
+    
+    def remember(self, key: str, scores: tuple):
+        self.entries[key] = scores
+        self.entries.move_to_end(key)
+        
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.counters["evictions"] += 1
+    
+    def stats(self) -> Dict:
+        lookups = self.counters["hits"] + self.counters["disk_hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "entries": len(self.entries),
+            "maxsize": self.maxsize,
+            "persistent": self.db is not None,
+            "hit_rate": (self.counters["hits"] + self.counters["disk_hits"]) / lookups if lookups else 0.0
+        }
+
+
+_sentiment_cache: Optional[SentimentScoreCache] = None
+
+
+def get_sentiment_cache() -> Optional[SentimentScoreCache]:
+    global _sentiment_cache
+    if not settings.sentiment_cache_enabled:
+        return None
+    if _sentiment_cache is None:
+        _sentiment_cache = SentimentScoreCache(
+            maxsize=settings.sentiment_cache_maxsize,
+            path=settings.sentiment_cache_path or None
+        )
+    return _sentiment_cache
@@ -0,0 +1,158 @@
+import os
+import sqlite3
+import threading
+import time
+import orjson
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+from config import settings
+
+
+def open_database(path: str) -> sqlite3.Connection:
+    # WAL lets every worker process read while one writes; writers wait on
+    # the busy timeout instead of failing with "database is locked"
+    if path != ":memory:":
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    db = sqlite3.connect(path, check_same_thread=False, timeout=settings.sqlite_busy_timeout)
+    if path != ":memory:":
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+    return db
+
+
+class SharedCache:
+    # Expiring key/value tier in one SQLite file that all serving workers share
+    PURGE_EVERY = 256
+    
+    def __init__(self, path: str, namespace: str):
+        self.path = path
+        self.namespace = namespace
+        self.db = open_database(path)
+        self.lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "stores": 0, "errors": 0}
+        self.writes = 0
+        
+        with self.lock:
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS entries "
+                "(namespace TEXT, key TEXT, value BLOB, expires_at REAL, PRIMARY KEY (namespace, key))"
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS entries_expiry ON entries (expires_at)")
+            self.db.commit()
+    
+    @staticmethod
+    def make_key(key: Hashable) -> str:
+        return key if isinstance(key, str) else orjson.dumps(key).decode()
+    
+    def get(self, key: Hashable) -> Optional[Tuple[Any, float]]:
+        # Returns (value, expires_at) with a wall-clock expiry, or None
+        try:
+            with self.lock:
+                row = self.db.execute(
+                    "SELECT value, expires_at FROM entries WHERE namespace = ? AND key = ? AND expires_at > ?",
+                    (self.namespace, self.make_key(key), time.time())
+                ).fetchone()
+        except sqlite3.Error as e:
+            self.counters["errors"] += 1
+            print(f"Shared cache error: {e}")
+            return None
+        
+        self.counters["hits" if row is not None else "misses"] += 1
+        return (orjson.loads(row[0]), row[1]) if row is not None else None
+    
+    def set(self, key: Hashable, value: Any, ttl: float):
+        try:
+            data = orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+            with self.lock:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                    (self.namespace, self.make_key(key), data, time.time() + ttl)
+                )
+                self.writes += 1
+                if self.writes % self.PURGE_EVERY == 0:
+                    self.db.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+                self.db.commit()
+        except (sqlite3.Error, orjson.JSONEncodeError) as e:
+            self.counters["errors"] += 1
+            print(f"Shared cache error: {e}")
+            return
+        
+        self.counters["stores"] += 1
+    
+    def delete(self, key: Hashable):
+        try:
+            with self.lock:
+                self.db.execute(
+                    "DELETE FROM entries WHERE namespace = ? AND key = ?", (self.namespace, self.make_key(key))
+                )
+                self.db.commit()
+        except sqlite3.Error as e:
+            self.counters["errors"] += 1
+            print(f"Shared cache error: {e}")
+    
+    def stats(self) -> Dict:
+        with self.lock:
+            entries = self.db.execute(
+                "SELECT COUNT(*) FROM entries WHERE namespace = ?", (self.namespace,)
+            ).fetchone()[0]
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "entries": entries,
+            "hit_rate": self.counters["hits"] / lookups if lookups else 0.0
+        }
+
+
+class SharedMetrics:
+    # Each serving worker publishes its metric samples here so /metrics can
+    # describe the whole server rather than whichever worker took the scrape
+    def __init__(self, path: str, max_age: float):
+        self.db = open_database(path)
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        
+        with self.lock:
+            self.db.execute("CREATE TABLE IF NOT EXISTS metrics (worker TEXT PRIMARY KEY, data BLOB, updated_at REAL)")
+            self.db.commit()
+    
+    def publish(self, worker: str, families: List):
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO metrics VALUES (?, ?, ?)", (worker, orjson.dumps(families), time.time())
+            )
+            self.db.commit()
+    
+    def gather(self) -> Dict[str, List]:
+        # Workers that stopped publishing (exited or restarted) drop out
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT worker, data FROM metrics WHERE updated_at > ?", (time.time() - self.max_age,)
+            ).fetchall()
+        return {worker: orjson.loads(data) for worker, data in rows}
+    
+    def remove(self, worker: str):
+        with self.lock:
+            self.db.execute("DELETE FROM metrics WHERE worker = ?", (worker,))
+            self.db.commit()
+
+
+_shared_caches: Dict[str, SharedCache] = {}
+
+
+def get_shared_cache(namespace: str) -> Optional[SharedCache]:
+    if not settings.shared_cache_enabled:
+        return None
+    if namespace not in _shared_caches:
+        _shared_caches[namespace] = SharedCache(settings.shared_cache_path, namespace)
+    return _shared_caches[namespace]
+
+
+_shared_metrics: Optional[SharedMetrics] = None
+
+
+def get_shared_metrics() -> Optional[SharedMetrics]:
+    global _shared_metrics
+    if not settings.shared_cache_enabled:
+        return None
+    if _shared_metrics is None:
+        _shared_metrics = SharedMetrics(settings.shared_cache_path, max_age=3 * settings.metrics_publish_interval)
+    return _shared_metrics
@@ -1,47 +1,93 @@
+import asyncio
+import hashlib
 import requests
-from bs4 import BeautifulSoup
-from typing import Dict, List, Optional
+import httpx
+from typing import Dict, List, Optional, Tuple
+from tools.http_cache import ResponseCache
+from tools.corpus_store import CorpusStore
+from tools.extraction import ProductInfoExtractor, get_extractor
+from tools.html_extract import PageParser, charset_of, is_html
+from tools.host_health import HostHealth, get_host_health
+from config import settings
+from telemetry import span, BYTES_FETCHED
 import time
 
 
+def page_fingerprint(content: bytes) -> str:
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+class UnsupportedContent(httpx.HTTPError):
+    pass
+
+
 class WebScraper:
-    def __init__(self):
+    def __init__(self, extractor: Optional[ProductInfoExtractor] = None, max_bytes: Optional[int] = None):
         self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+            'Accept': 'text/html,application/xhtml+xml;q=0.9,*/*;q=0.1'
         }
+        self.extractor = extractor or get_extractor()
+        self.max_bytes = max_bytes or settings.scrape_max_bytes
+    
+    def parse_page(self, url: str, content: bytes, content_type: Optional[str] = None) -> Dict:
+        page, _ = self.parse_document(url, content, content_type)
+        return page
+    
+    def parse_document(self, url: str, content: bytes, content_type: Optional[str] = None,
+                       truncated: bool = False) -> Tuple[Dict, str]:
+        parser = PageParser(encoding=charset_of(content_type))
+        parser.feed_bytes(content)
+        parser.finish()
+        return self.build_page(url, parser, page_fingerprint(content), truncated)
+    
+    def build_page(self, url: str, parser: PageParser, fingerprint: str, truncated: bool) -> Tuple[Dict, str]:
+        parsed = parser.result()
+        headings = parsed["headings"]
+        all_paragraphs = parsed["paragraphs"]
+        paragraphs = [text for text in all_paragraphs if len(text) > 50]
+        
+        text = "\n".join(headings + [text for text in all_paragraphs if text])
+        
+        return {
+            "url": url,
+            "fingerprint": fingerprint,
+            "title": parsed["title"],
+            "description": parsed["description"],
+            "headings": headings[:10],
+            "content_snippets": paragraphs[:5],
+            "external_links": parsed["links"],
+            **self.extractor.extract(text),
+            "truncated": truncated,
+            "status": "success"
+        }, text
     
     def scrape_page(self, url: str) -> Dict:
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            title = soup.find('title')
-            title_text = title.get_text().strip() if title else "No title found"
+            with requests.get(url, headers=self.headers, timeout=10, stream=True) as response:
+                response.raise_for_status()
+                
+                content_type = response.headers.get("content-type")
+                if not is_html(content_type):
+                    raise requests.exceptions.InvalidHeader(f"Unsupported content type: {content_type}")
+                
+                # Feed the parser as chunks arrive and stop at the byte cap
+                parser = PageParser(encoding=charset_of(content_type))
+                digest = hashlib.blake2b(digest_size=16)
+                received = 0
+                truncated = False
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    chunk = chunk[:self.max_bytes - received]
+                    received += len(chunk)
+                    digest.update(chunk)
+                    parser.feed_bytes(chunk)
+                    if received >= self.max_bytes:
+                        truncated = True
+                        break
             
-            meta_desc = soup.find('meta', attrs={'name': 'description'})
-            description = meta_desc['content'] if meta_desc and meta_desc.get('content') else ""
-            
-            headings = [h.get_text().strip() for h in soup.find_all(['h1', 'h2', 'h3'])]
-            
-            paragraphs = [p.get_text().strip() for p in soup.find_all('p') if len(p.get_text().strip()) > 50]
-            
-            links = []
-            for link in soup.find_all('a', href=True):
-                href = link['href']
-                if href.startswith('http'):
-                    links.append(href)
-            
-            return {
-                "url": url,
-                "title": title_text,
-                "description": description,
-                "headings": headings[:10],
-                "content_snippets": paragraphs[:5],
-                "external_links": links[:10],
-                "status": "success"
-            }
+            parser.finish()
+            page, _ = self.build_page(url, parser, digest.hexdigest(), truncated)
+            return page
             
         except requests.exceptions.RequestException as e:
             return {
@@ -58,30 +104,163 @@ class WebScraper:
             time.sleep(delay)
         return results
     
+    def build_product_info(self, url: str, data: Dict) -> Dict:
+        # Pages parsed before extraction ran over the full text only carry snippets
+        if "pricing_mentions" not in data:
+            data = {**data, **self.extractor.extract("\n".join(data.get('content_snippets', [])))}
+        
+        return {
+            "url": url,
+            "fingerprint": data.get('fingerprint'),
+            "title": data.get('title'),
+            "description": data.get('description'),
+            "pricing_mentions": data['pricing_mentions'],
+            "feature_mentions": data['feature_mentions'],
+            "prices": data['prices'],
+            "status": "success"
+        }
+    
     def extract_product_info(self, url: str) -> Dict:
         data = self.scrape_page(url)
         
         if data['status'] == 'error':
             return data
         
-        pricing_keywords = ['price', 'pricing', 'cost', '$', '€', '£']
-        features_keywords = ['feature', 'benefit', 'capability', 'includes']
+        return self.build_product_info(url, data)
+
+
+class AsyncWebScraper(WebScraper):
+    def __init__(self, client: Optional[httpx.AsyncClient] = None, cache: Optional[ResponseCache] = None,
+                 corpus: Optional[CorpusStore] = None, max_bytes: Optional[int] = None,
+                 health: Optional[HostHealth] = None):
+        super().__init__(max_bytes=max_bytes)
+        self.client = client
+        self.cache = cache
+        self.corpus = corpus
+        self.health = health or get_host_health()
+    
+    def parse_and_store(self, url: str, content: bytes, content_type: Optional[str], truncated: bool) -> Dict:
+        page, text = self.parse_document(url, content, content_type, truncated)
+        if self.corpus is not None:
+            self.corpus.add_page(url, page["title"], text)
+        return page
+    
+    async def _get(self, url: str, headers: Dict) -> Tuple[httpx.Response, bytes, bool]:
+        return await self.health.call(url, lambda timeout: self.fetch_capped(url, headers, timeout))
+    
+    async def fetch_capped(self, url: str, headers: Dict, timeout: float) -> Tuple[httpx.Response, bytes, bool]:
+        if self.client is not None:
+            return await self.read_capped(self.client, url, headers, timeout)
         
-        pricing_info = []
-        features_info = []
+        async with httpx.AsyncClient() as client:
+            return await self.read_capped(client, url, headers, timeout)
+    
+    async def read_capped(self, client: httpx.AsyncClient, url: str, headers: Dict,
+                          timeout: float) -> Tuple[httpx.Response, bytes, bool]:
+        # Non-HTML bodies are refused from the headers alone and HTML bodies are
+        # read only up to max_bytes, so a multi-megabyte SPA costs a bounded amount
+        async with client.stream("GET", url, headers=headers, timeout=timeout, follow_redirects=True) as response:
+            if response.status_code == 304:
+                return response, b"", False
+            response.raise_for_status()
+            
+            content_type = response.headers.get("content-type")
+            if not is_html(content_type):
+                raise UnsupportedContent(f"Unsupported content type for {url}: {content_type}")
+            
+            body = bytearray()
+            truncated = False
+            async for chunk in response.aiter_bytes():
+                body += chunk
+                if len(body) >= self.max_bytes:
+                    truncated = len(body) > self.max_bytes or not response.is_stream_consumed
+                    del body[self.max_bytes:]
+                    break
+            
+            return response, bytes(body), truncated
+    
+    async def fetch_page(self, url: str, fingerprint: Optional[str] = None) -> Tuple[Optional[Dict], Optional[Dict]]:
+        # Cache reads and writes hit SQLite and disk, so they run on worker threads
+        entry = await asyncio.to_thread(self.cache.get, url) if self.cache else None
         
-        for snippet in data.get('content_snippets', []):
-            snippet_lower = snippet.lower()
-            if any(keyword in snippet_lower for keyword in pricing_keywords):
-                pricing_info.append(snippet)
-            if any(keyword in snippet_lower for keyword in features_keywords):
-                features_info.append(snippet)
+        if entry is not None and self.cache.is_fresh(entry):
+            self.cache.record("hits")
+            return entry["page"], entry
         
-        return {
-            "url": url,
-            "title": data.get('title'),
-            "description": data.get('description'),
-            "pricing_mentions": pricing_info[:3],
-            "feature_mentions": features_info[:5],
-            "status": "success"
-        }
+        if self.cache:
+            self.cache.record("revalidations" if entry is not None else "misses")
+        
+        headers = {**self.headers, **(self.cache.conditional_headers(entry) if self.cache else {})}
+        with span("scrape", url=url):
+            response, body, truncated = await self._get(url, headers)
+            BYTES_FETCHED.inc(len(body), source="scrape")
+            
+            if response.status_code == 304 and entry is not None:
+                return entry["page"], await asyncio.to_thread(self.cache.revalidated, url, response.headers)
+        
+        # Body unchanged since the caller's snapshot: its product info still stands
+        unchanged = fingerprint is not None and page_fingerprint(body) == fingerprint
+        if unchanged:
+            if not self.cache:
+                return None, None
+            if entry is not None and entry["page"].get("fingerprint") == fingerprint:
+                # The cached copy is this same body, so only its freshness needs renewing
+                await asyncio.to_thread(self.cache.refresh, url, response.headers)
+                return None, None
+        
+        # Parsing is CPU-bound, keep it off the event loop
+        with span("parse", bytes=len(body)):
+            page = await asyncio.to_thread(
+                self.parse_and_store, url, body, response.headers.get("content-type"), truncated
+            )
+        
+        if self.cache:
+            entry = await asyncio.to_thread(self.cache.put, url, response.headers, body, page)
+        
+        return (None, None) if unchanged else (page, entry)
+    
+    async def scrape_page(self, url: str) -> Dict:
+        try:
+            page, _ = await self.fetch_page(url)
+            return page
+            
+        except httpx.HTTPError as e:
+            return {
+                "url": url,
+                "status": "error",
+                "error": str(e)
+            }
+    
+    async def scrape_multiple(self, urls: List[str], delay: float = 1.0) -> List[Dict]:
+        results = []
+        for url in urls:
+            result = await self.scrape_page(url)
+            results.append(result)
+            await asyncio.sleep(delay)
+        return results
+    
+    async def extract_product_info(self, url: str, known: Optional[Dict] = None) -> Dict:
+        try:
+            data, entry = await self.fetch_page(url, known.get("fingerprint") if known else None)
+        except httpx.HTTPError as e:
+            return {
+                "url": url,
+                "status": "error",
+                "error": str(e)
+            }
+        
+        if data is None:
+            return known
+        
+        if entry is not None and entry.get("product_info"):
+            return entry["product_info"]
+        
+        product_info = self.build_product_info(url, data)
+        if self.corpus is not None:
+            await asyncio.to_thread(self.corpus.attach_product_info, url, product_info)
+        if entry is not None:
+            # Point at the cached body rather than carrying the raw page around
+            product_info["content_ref"] = entry["key"]
+            await asyncio.to_thread(self.cache.attach_product_info, url, product_info)
+        
+        return product_info